@@ -0,0 +1,111 @@
+import re
+from contextlib import nullcontext
+from typing import NamedTuple, Optional
+
+FULL_SCAN_NODE = 'EnumerateCollectionNode'
+
+class QueryLimits(NamedTuple):
+    """Limits applied to generated AQL before and during execution."""
+    max_cost: Optional[float] = 5e7  # Highest accepted EXPLAIN estimatedCost
+    max_full_scans: Optional[int] = 1  # Most full collection scans in the plan
+    result_limit: Optional[int] = 1000  # LIMIT added when the query has none
+    max_runtime: Optional[float] = 60.0  # Server-side seconds before the query is killed
+    memory_limit: Optional[int] = 1 << 30  # Server-side bytes per query
+
+DEFAULT_LIMITS = QueryLimits()
+
+class QueryRejected(Exception):
+    """Generated AQL refused by the guardrails; ``reason`` is fed back to the LLM."""
+
+    def __init__(self, reason, query):
+        super().__init__(reason)
+        self.reason = reason
+        self.query = query
+
+def top_level_tokens(query):
+    """Yield ``(position, word)`` for every keyword-like word outside brackets and strings."""
+    depth = 0
+    quote = None
+    for match in re.finditer(r'''\\.|["'`]|[()\[\]{}]|\b[A-Za-z_]+\b''', query):
+        token = match.group()
+        if quote:
+            if token == quote:
+                quote = None
+        elif token in ('"', "'", '`'):
+            quote = token
+        elif token in '([{':
+            depth += 1
+        elif token in ')]}':
+            depth -= 1
+        elif depth == 0 and token[0] != '\\':
+            yield match.start(), token.upper()
+
+def add_result_limit(query, limit):
+    """Insert ``LIMIT limit`` before the final top-level RETURN of a top-level FOR loop.
+
+    Queries that already have a top-level LIMIT, or no top-level FOR, are
+    returned unchanged.
+    """
+    tokens = list(top_level_tokens(query))
+    if any(word == 'LIMIT' for _, word in tokens):
+        return query
+    returns = [position for position, word in tokens if word == 'RETURN']
+    if not returns or not any(word == 'FOR' and position < returns[-1] for position, word in tokens):
+        return query
+    return f"{query[:returns[-1]]}LIMIT {limit}\n{query[returns[-1]:]}"
+
+def plan_violations(plan, limits=DEFAULT_LIMITS):
+    """Return the reasons an EXPLAIN ``plan`` breaks ``limits`` (empty if none)."""
+    reasons = []
+    cost = plan.get('estimatedCost', 0)
+    if limits.max_cost is not None and cost > limits.max_cost:
+        reasons.append(f"estimated cost {cost:.0f} exceeds {limits.max_cost:.0f}")
+    scans = [node.get('collection') for node in plan.get('nodes', []) if node.get('type') == FULL_SCAN_NODE]
+    if limits.max_full_scans is not None and len(scans) > limits.max_full_scans:
+        reasons.append(f"{len(scans)} full collection scans ({', '.join(map(str, scans))}) exceed "
+                       f"{limits.max_full_scans}; filter on indexed fields (properties.name, properties.identifier, "
+                       f"label) or traverse from a single start node instead of joining collections")
+    return reasons
+
+def check_query(db, query, limits=DEFAULT_LIMITS):
+    """Add a result LIMIT to ``query``, EXPLAIN it and return it with its execution options.
+
+    Raises ``QueryRejected`` when the plan breaks ``limits`` or cannot be
+    built. The options carry the server-side runtime and memory limits for
+    python-arango's ``db.aql.execute``.
+    """
+    if limits.result_limit is not None:
+        query = add_result_limit(query, limits.result_limit)
+    try:
+        plan = db.aql.explain(query)
+    except Exception as e:
+        raise QueryRejected(f"EXPLAIN failed: {getattr(e, 'error_message', None) or e}", query) from e
+    reasons = plan_violations(plan, limits)
+    if reasons:
+        raise QueryRejected("; ".join(reasons), query)
+
+    options = {}
+    if limits.max_runtime is not None:
+        options['max_runtime'] = limits.max_runtime
+    if limits.memory_limit is not None:
+        options['memory_limit'] = limits.memory_limit
+    return query, options
+
+def guard_graph(graph, db, limits=DEFAULT_LIMITS, tracer=None):
+    """Route ``graph.query``, which ArangoGraphQAChain uses to run its AQL, through ``check_query``.
+
+    With a ``tracing.Tracer``, the check and the query are recorded as
+    ``aql_explain`` and ``aql_execution`` spans of the enclosing attempt.
+    """
+    query = graph.query
+
+    def guarded_query(aql_query, top_k=None, **kwargs):
+        with tracer.span('aql_explain') if tracer else nullcontext():
+            aql_query, options = check_query(db, aql_query, limits)
+        with tracer.span('aql_execution') if tracer else nullcontext({}) as execution_span:
+            result = query(aql_query, top_k, **dict(options, **kwargs))
+            execution_span['rows'] = len(result)
+        return result
+
+    graph.query = guarded_query
+    return graph
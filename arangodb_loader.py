@@ -1,8 +1,35 @@
 import json
+import multiprocessing
+import os
 from tqdm import tqdm
 from pyArango.connection import Connection
 from pyArango.collection import Edges
 from pyArango.theExceptions import CreationError
+from spoke_columnar import ColumnarGraph, is_columnar
+from spoke_dump import iter_dump_lines, is_compressed
+
+DEFAULT_BATCH_SIZE = 5000
+# Endpoint fields kept on edges by the production loader (see edge_document)
+DEFAULT_EDGE_PROJECTION = ()
+DEFAULT_WORKERS = os.cpu_count() or 1
+RANGES_PER_WORKER = 4
+
+# Collection layouts: everything in Nodes/Edges, or one vertex collection
+# per node type and one edge collection per relationship label, registered
+# as the GRAPH_NAME named graph.
+SINGLE_LAYOUT = "single"
+LABEL_LAYOUT = "per_label"
+GRAPH_NAME = "spoke"
+
+# Persistent indexes for the filters used by the few-shot AQL and the QA
+# chain: (collection, fields, index name).
+QUERY_INDEXES = [
+    ("Nodes", ["labels[*]"], "idx_nodes_labels"),
+    ("Nodes", ["properties.name"], "idx_nodes_name"),
+    ("Nodes", ["properties.identifier"], "idx_nodes_identifier"),
+    ("Edges", ["label"], "idx_edges_label"),
+    ("Edges", ["label", "_from"], "idx_edges_label_from"),
+]
 
 def ensure_collections(db):
     """Ensure the collections exist and are of correct type."""
@@ -12,48 +39,659 @@ def ensure_collections(db):
         # Specify the name for the edge collection
         db.createCollection(name="Edges", className="Edges", type=3)
 
-def load_data_from_json(filename, db, stop_at=-1):
-    """Load data from JSON file into the database."""
-    nodes_added = 0
-    edges_added = 0
+def ensure_collection(db, name, edges=False):
+    """Create the document or edge collection ``name`` if it does not exist."""
+    if db.hasCollection(name):
+        return
+    try:
+        if edges:
+            db.createCollection(name=name, className="Edges", type=3)
+        else:
+            db.createCollection(name=name)
+    except CreationError:
+        # Another worker created it first
+        db.reloadCollections()
+
+def node_collection(node, layout=SINGLE_LAYOUT):
+    """Return the vertex collection a node (or edge endpoint) belongs to."""
+    if layout == LABEL_LAYOUT and node.get('labels'):
+        return node['labels'][0]
+    return "Nodes"
+
+def edge_collection(data, layout=SINGLE_LAYOUT):
+    """Return the edge collection a relationship belongs to."""
+    if layout == LABEL_LAYOUT and data.get('label'):
+        return data['label']
+    return "Edges"
+
+def edge_definitions_list(edge_definitions):
+    """Convert ``{collection: {'from': set, 'to': set}}`` to ArangoDB edge definitions."""
+    return [
+        {'collection': name, 'from': sorted(ends['from']), 'to': sorted(ends['to'])}
+        for name, ends in sorted(edge_definitions.items())
+    ]
+
+def register_named_graph(db, edge_definitions, name=GRAPH_NAME):
+    """Create the named graph ``name``, or extend it with new edge definitions.
+
+    ``edge_definitions`` maps each edge collection to the sets of vertex
+    collections its edges come ``from`` and go ``to``.
+    """
+    url = "%s/gharial" % db.getURL()
+    session = db.connection.session
+    definitions = edge_definitions_list(edge_definitions)
+    r = session.get(f"{url}/{name}")
+    if r.status_code == 404:
+        r = session.post(url, data=json.dumps({'name': name, 'edgeDefinitions': definitions}))
+        if r.status_code not in (201, 202):
+            raise CreationError(r.json().get('errorMessage', "Unable to create graph"), r.json())
+        return definitions
+
+    existing = {d['collection']: d for d in r.json()['graph']['edgeDefinitions']}
+    for definition in definitions:
+        current = existing.get(definition['collection'])
+        if current is None:
+            session.post(f"{url}/{name}/edge", data=json.dumps(definition))
+        elif not (set(definition['from']) <= set(current['from']) and set(definition['to']) <= set(current['to'])):
+            definition = {
+                'collection': definition['collection'],
+                'from': sorted(set(definition['from']) | set(current['from'])),
+                'to': sorted(set(definition['to']) | set(current['to'])),
+            }
+            session.put(f"{url}/{name}/edge/{definition['collection']}", data=json.dumps(definition))
+    return definitions
 
-    with open(filename, 'r') as file:
-        total_lines = sum(1 for line in file)
-        file.seek(0)  # Reset file read position
-        
-        for line in tqdm(file, total=total_lines, desc="Loading Data"):
-            if stop_at > -1 and (nodes_added + edges_added) >= stop_at:
+def graph_edge_definitions(db, name=GRAPH_NAME):
+    """Return the edge definitions of the named graph ``name`` (empty if missing)."""
+    r = db.connection.session.get("%s/gharial/%s" % (db.getURL(), name))
+    if r.status_code != 200:
+        return []
+    return r.json()['graph']['edgeDefinitions']
+
+def layout_indexes(edge_definitions):
+    """Query indexes for the per-label layout.
+
+    Every vertex collection gets name and identifier indexes; edge
+    collections only need their built-in ``_from``/``_to`` edge index.
+    """
+    vertex_collections = sorted({name for d in edge_definitions for name in d['from'] + d['to']})
+    indexes = []
+    for collection in vertex_collections:
+        slug = collection.lower()
+        indexes.append((collection, ["properties.name"], f"idx_{slug}_name"))
+        indexes.append((collection, ["properties.identifier"], f"idx_{slug}_identifier"))
+    return indexes
+
+def index_key(collection, fields):
+    return (collection, tuple(fields))
+
+def existing_index_keys(db, collection):
+    """Return the (collection, fields) keys of the indexes on ``collection``.
+
+    The index API is called directly because pyArango's ``getIndexes``
+    raises KeyError on the built-in ``edge`` index of edge collections.
+    """
+    r = db.connection.session.get("%s/index?collection=%s" % (db.getURL(), collection))
+    return {index_key(collection, index.get('fields', [])) for index in r.json().get('indexes', [])}
+
+def missing_indexes(db, indexes=None):
+    """Return the entries of ``indexes`` (default ``QUERY_INDEXES``) not present in ``db``."""
+    indexes = QUERY_INDEXES if indexes is None else indexes
+    existing = {}
+    missing = []
+    for collection, fields, name in indexes:
+        if collection not in existing:
+            existing[collection] = existing_index_keys(db, collection)
+        if index_key(collection, fields) not in existing[collection]:
+            missing.append((collection, fields, name))
+    return missing
+
+def ensure_indexes(db, indexes=None):
+    """Build the persistent indexes the generated AQL filters on.
+
+    Meant to run once after the bulk load: building indexes while importing
+    slows every batch down. Indexes that already exist are left alone and
+    the list of created ones is returned.
+    """
+    created = []
+    for collection, fields, name in tqdm(missing_indexes(db, indexes), desc="Building Indexes"):
+        db[collection].ensureIndex("persistent", fields, name=name, sparse=False, inBackground=True)
+        created.append((collection, fields, name))
+    return created
+
+def check_indexes(db, indexes=None):
+    """Print and return the query indexes that are missing from ``db``."""
+    missing = missing_indexes(db, indexes)
+    for collection, fields, name in missing:
+        print(f"Missing index {name} on {collection}: {', '.join(fields)}")
+    if not missing:
+        print("All query indexes are present.")
+    return missing
+
+def node_document(data):
+    """Build the Nodes document for a parsed SPOKE node record."""
+    node_doc = dict(data)
+    node_doc['_key'] = str(data['id'])
+    return node_doc
+
+def project_endpoint(endpoint, fields):
+    """Keep the ``id`` and the allow-listed (dotted) ``fields`` of an edge endpoint."""
+    projected = {'id': endpoint['id']}
+    for field in fields:
+        source, target = endpoint, projected
+        *parents, leaf = field.split('.')
+        for parent in parents:
+            source = source.get(parent)
+            if not isinstance(source, dict):
                 break
-            
+            target = target.setdefault(parent, {})
+        else:
+            if leaf in source:
+                target[leaf] = source[leaf]
+    return projected
+
+def edge_document(data, edge_projection=None, layout=SINGLE_LAYOUT):
+    """Build the Edges document for a parsed SPOKE relationship record.
+
+    By default every field of the record is copied, including the complete
+    ``start`` and ``end`` nodes. With ``edge_projection`` set to a sequence
+    of endpoint fields (possibly empty) the document is slimmed to the
+    ``label``, the edge ``properties`` and the endpoint ids plus those
+    fields, e.g. ``('labels', 'properties.name')``. ``layout`` picks the
+    vertex collections ``_from`` and ``_to`` point into.
+    """
+    _from = node_collection(data['start'], layout) + '/' + str(data['start']['id'])
+    _to = node_collection(data['end'], layout) + '/' + str(data['end']['id'])
+    if edge_projection is not None:
+        edge_doc = {
+            '_from': _from,
+            '_to': _to,
+            'label': data.get('label'),
+            'properties': data.get('properties', {}),
+            'start': project_endpoint(data['start'], edge_projection),
+            'end': project_endpoint(data['end'], edge_projection),
+        }
+        if 'id' in data:
+            edge_doc['_key'] = str(data['id'])
+        return edge_doc
+
+    edge_doc = {
+        '_from': _from,
+        '_to': _to,
+    }
+    if 'id' in data:
+        # Deterministic key so that re-running a load skips existing edges
+        edge_doc['_key'] = str(data['id'])
+    # Copy other properties
+    for key, value in data.items():
+        if key not in ['_from', '_to', 'type', 'id']:
+            edge_doc[key] = value
+    return edge_doc
+
+def import_batch(collection, docs, on_duplicate="ignore"):
+    """Send one batch of documents through the bulk import API.
+
+    Returns a dict with the created/ignored/updated/errors counts reported by
+    ArangoDB for the batch. A batch that is rejected as a whole (e.g. a 503
+    or an oversized request) is counted as errors for every document in it
+    and marked ``rejected``.
+    """
+    try:
+        result = collection.importBulk(docs, type="list", onDuplicate=on_duplicate, details="true")
+    except CreationError as e:
+        return {'created': 0, 'ignored': 0, 'updated': 0, 'errors': len(docs), 'details': [e.message],
+                'rejected': True}
+    return {
+        'created': result.get('created', 0),
+        'ignored': result.get('ignored', 0),
+        'updated': result.get('updated', 0),
+        'errors': result.get('errors', 0),
+        'details': result.get('details', []),
+    }
+
+def open_input(filename):
+    """Open a columnar cache as a ``ColumnarGraph``; dumps are returned as paths.
+
+    The result can be passed to ``input_size`` and ``iter_input`` so one
+    load maps the cache once.
+    """
+    return ColumnarGraph(filename) if is_columnar(filename) else filename
+
+def iter_input(filename, offset=0, desc=None, full_endpoints=True):
+    """Yield the records of a dump or columnar cache in one pass.
+
+    Dumps yield raw JSON lines and ``offset`` is a byte offset; columnar
+    caches yield parsed dicts and ``offset`` is a record position (see
+    ``ColumnarGraph.iter_dicts``). ``full_endpoints`` is passed on to the
+    columnar reader, which otherwise reads endpoint ids and labels only.
+    ``filename`` may also be the result of ``open_input``.
+    """
+    graph = filename if isinstance(filename, ColumnarGraph) else open_input(filename)
+    if not isinstance(graph, ColumnarGraph):
+        yield from iter_dump_lines(filename, offset, desc=desc)
+        return
+    with tqdm(total=len(graph), initial=offset, desc=desc, disable=desc is None) as progress:
+        for count, data in enumerate(graph.iter_dicts(offset, full_endpoints), 1):
+            if count % 1000 == 0:
+                progress.update(1000)
+            yield data
+
+def input_size(filename):
+    """Size of an input in the units of its offsets (bytes or columnar records)."""
+    if isinstance(filename, ColumnarGraph):
+        return len(filename)
+    if is_columnar(filename):
+        return len(ColumnarGraph(filename))
+    return os.path.getsize(filename)
+
+def empty_report():
+    """Return a zeroed load report.
+
+    Besides the counts, ``edge_definitions`` maps every edge collection
+    written to the vertex collections its edges connect.
+    """
+    return {'nodes': 0, 'edges': 0, 'ignored': 0, 'errors': 0, 'edge_definitions': {}}
+
+def add_edge_definition(edge_definitions, name, edge_doc):
+    ends = edge_definitions.setdefault(name, {'from': set(), 'to': set()})
+    ends['from'].add(edge_doc['_from'].split('/', 1)[0])
+    ends['to'].add(edge_doc['_to'].split('/', 1)[0])
+
+def merge_reports(reports):
+    """Sum a sequence of load reports into one."""
+    merged = empty_report()
+    for report in reports:
+        for key in ('nodes', 'edges', 'ignored', 'errors'):
+            merged[key] += report[key]
+        for name, ends in report['edge_definitions'].items():
+            merged_ends = merged['edge_definitions'].setdefault(name, {'from': set(), 'to': set()})
+            merged_ends['from'] |= ends['from']
+            merged_ends['to'] |= ends['to']
+    return merged
+
+def bulk_load_lines(lines, db, batch_size=DEFAULT_BATCH_SIZE, on_duplicate="ignore",
+                    record_types=('node', 'relationship'), stop_at=-1, start_offset=0, on_commit=None,
+                    edge_projection=None, layout=SINGLE_LAYOUT, on_record=None):
+    """Bulk import an iterable of JSON lines and return a load report.
+
+    Lines may also be already parsed dicts (from a columnar cache), which
+    count as one unit of offset each. Only records whose ``type`` is in
+    ``record_types`` are imported, which
+    lets callers load all nodes before any edges. When ``on_commit`` is
+    given it is called with the byte offset (counted from ``start_offset``)
+    up to which every line has been imported, after each batch. A batch
+    rejected as a whole holds the offset at its first line for the rest of
+    the run, so resuming from the checkpoint retries it.
+    ``edge_projection`` is passed on to ``edge_document`` and ``layout``
+    decides which collection each document goes to. ``on_record`` is
+    called with every parsed record that is imported, so other indexes
+    can be built in the same pass.
+    """
+    report = empty_report()
+    buffers = {}
+    batch_numbers = {}
+    counters = {}
+    # Offset of the first line still waiting in each buffer
+    pending = {}
+    # Offsets of the first line of each batch rejected as a whole
+    rejected = []
+    position = committed = start_offset
+
+    def commit():
+        nonlocal committed
+        starts = [offset for offset in pending.values() if offset is not None] + rejected
+        offset = min(starts) if starts else position
+        if on_commit and offset > committed:
+            committed = offset
+            on_commit(offset)
+
+    def buffer(name, doc, counter, line_start):
+        if name not in buffers:
+            ensure_collection(db, name, edges=counter == 'edges')
+            buffers[name] = []
+            batch_numbers[name] = 0
+            counters[name] = counter
+            pending[name] = None
+        buffers[name].append(doc)
+        if pending[name] is None:
+            pending[name] = line_start
+        if len(buffers[name]) >= batch_size:
+            flush(name)
+
+    def flush(name):
+        docs = buffers[name]
+        if not docs:
+            return
+        batch_numbers[name] += 1
+        result = import_batch(db[name], docs, on_duplicate)
+        report[counters[name]] += result['created'] + result['updated']
+        report['ignored'] += result['ignored']
+        report['errors'] += result['errors']
+        if result['ignored'] or result['errors']:
+            tqdm.write(f"{name} batch {batch_numbers[name]}: {result['created']} created, "
+                       f"{result['ignored']} duplicates, {result['errors']} errors")
+        if result.get('rejected'):
+            tqdm.write(f"{name} batch {batch_numbers[name]} rejected: {result['details'][0]}")
+            rejected.append(pending[name])
+        buffers[name] = []
+        pending[name] = None
+        commit()
+
+    parsed = 0
+    for line in lines:
+        if stop_at > -1 and parsed >= stop_at:
+            break
+        line_start = position
+        if isinstance(line, dict):
+            position += 1
+            data = line
+        else:
+            position += len(line)
             try:
                 data = json.loads(line)
-                if data['type'] == 'node':
-                    node_doc = db["Nodes"].createDocument()
-                    node_doc['_key'] = str(data['id'])
-                    node_doc.set(data)
-                    node_doc.save()
-                    nodes_added += 1
-                elif data['type'] == 'relationship':
-                    edge_doc = db["Edges"].createDocument()
-                    edge_doc['_from'] = 'Nodes/' + str(data['start']['id'])
-                    edge_doc['_to'] = 'Nodes/' + str(data['end']['id'])
-                    # Copy other properties
-                    for key, value in data.items():
-                        if key not in ['_from', '_to', 'type', 'id']:
-                            edge_doc[key] = value
-                    edge_doc.save()
-                    edges_added += 1
-            except CreationError as e:
-                if 'unique constraint violated' in e.message:
-                    print(f"A document with _key {data['id']} already exists. Skipping...")
-                else:
-                    print(f"Failed to create document: {e}")
-                continue
             except json.JSONDecodeError:
                 continue  # Skip invalid JSON lines
 
+        if data['type'] not in record_types:
+            continue
+        if on_record is not None:
+            on_record(data)
+        if data['type'] == 'node':
+            buffer(node_collection(data, layout), node_document(data), 'nodes', line_start)
+        elif data['type'] == 'relationship':
+            name = edge_collection(data, layout)
+            edge_doc = edge_document(data, edge_projection, layout)
+            add_edge_definition(report['edge_definitions'], name, edge_doc)
+            buffer(name, edge_doc, 'edges', line_start)
+        else:
+            continue
+        parsed += 1
+
+    for name in list(buffers):
+        flush(name)
+    commit()
+
+    return report
+
+def bulk_load_data_from_json(filename, db, stop_at=-1, batch_size=DEFAULT_BATCH_SIZE, on_duplicate="ignore",
+                             checkpoint=None, resume=False, edge_projection=None, layout=SINGLE_LAYOUT,
+                             on_record=None):
+    """Load data from JSON file into the database using batched bulk imports.
+
+    Nodes and relationships are buffered into batches of ``batch_size``
+    documents and sent with one import request per batch. Duplicates and
+    failures are summarised once per batch instead of once per document.
+
+    With ``checkpoint`` set, committed byte offsets are appended to that
+    file and ``resume=True`` seeks straight past the last committed offset;
+    a run without ``resume`` starts the file afresh.
+    With the per-label ``layout`` the named graph is registered at the end.
+    """
+    source = open_input(filename)
+    size = input_size(source)
+    offset = 0
+    if checkpoint and resume:
+        offset = read_checkpoint(checkpoint)['offsets'].get(('all', 0, size), 0)
+    elif checkpoint:
+        reset_checkpoint(checkpoint)
+
+    on_commit = None
+    if checkpoint:
+        on_commit = lambda committed: append_checkpoint(checkpoint, 'all', 0, size, committed)
+    full_endpoints = edge_projection is None or bool(edge_projection)
+    lines = iter_input(source, offset, desc="Loading Data", full_endpoints=full_endpoints)
+    report = bulk_load_lines(lines, db, batch_size, on_duplicate, stop_at=stop_at,
+                             start_offset=offset, on_commit=on_commit, edge_projection=edge_projection,
+                             layout=layout, on_record=on_record)
+    if layout == LABEL_LAYOUT:
+        register_named_graph(db, report['edge_definitions'])
+
+    return report['nodes'], report['edges']
+
+def reset_checkpoint(checkpoint):
+    """Empty ``checkpoint`` so a fresh run does not inherit the offsets of an earlier one."""
+    open(checkpoint, 'w').close()
+
+def append_checkpoint(checkpoint, phase, start, end, offset):
+    """Record that ``[start, offset)`` of a byte range has been committed."""
+    entry = {'phase': phase, 'start': start, 'end': end, 'offset': offset}
+    # Small appends are atomic, so worker processes can share one file
+    with open(checkpoint, 'a') as file:
+        file.write(json.dumps(entry) + '\n')
+
+def write_checkpoint_ranges(checkpoint, ranges):
+    """Record the byte ranges a parallel load was split into."""
+    with open(checkpoint, 'a') as file:
+        file.write(json.dumps({'ranges': ranges}) + '\n')
+
+def read_checkpoint(checkpoint):
+    """Read a checkpoint file.
+
+    Returns a dict with the recorded ``ranges`` (or None) and ``offsets``
+    mapping ``(phase, start, end)`` to the highest committed offset. A
+    missing file or a truncated last line is treated as no progress.
+    """
+    state = {'ranges': None, 'offsets': {}}
+    if not os.path.exists(checkpoint):
+        return state
+    with open(checkpoint) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if 'ranges' in entry:
+                state['ranges'] = [tuple(r) for r in entry['ranges']]
+                continue
+            key = (entry['phase'], entry['start'], entry['end'])
+            state['offsets'][key] = max(state['offsets'].get(key, 0), entry['offset'])
+    return state
+
+def split_byte_ranges(filename, parts):
+    """Split a file into at most ``parts`` byte ranges that end on line boundaries."""
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    with open(filename, 'rb') as file:
+        for i in range(1, parts):
+            file.seek(max(size * i // parts, boundaries[-1]))
+            if file.tell() > 0:
+                file.readline()  # Move to the start of the next line
+            position = min(file.tell(), size)
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    if boundaries[-1] < size:
+        boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def iter_byte_range(filename, start, end):
+    """Yield the lines of ``filename`` that begin inside ``[start, end)``."""
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+def load_byte_range(filename, start, end, db, record_types, batch_size=DEFAULT_BATCH_SIZE, on_duplicate="ignore",
+                    checkpoint=None, offset=None, edge_projection=None, layout=SINGLE_LAYOUT):
+    """Bulk import the records of one byte range and return its load report.
+
+    Loading begins at ``offset`` (a committed offset inside the range) when
+    given, and progress is appended to ``checkpoint`` when set.
+    """
+    offset = start if offset is None else offset
+    on_commit = None
+    if checkpoint:
+        phase = '+'.join(record_types)
+        on_commit = lambda committed: append_checkpoint(checkpoint, phase, start, end, committed)
+    lines = iter_byte_range(filename, offset, end)
+    return bulk_load_lines(lines, db, batch_size, on_duplicate, record_types=record_types,
+                           start_offset=offset, on_commit=on_commit, edge_projection=edge_projection,
+                           layout=layout)
+
+_worker_db = None
+
+def _init_worker(db_name, username, password):
+    """Open a per-process database connection for a loader worker."""
+    global _worker_db
+    conn = connect_to_arangodb(username, password)
+    _worker_db = conn[db_name] if conn else None
+
+def _load_byte_range_task(task):
+    filename, start, end, record_types, batch_size, checkpoint, offset, edge_projection, layout = task
+    if _worker_db is None:
+        report = empty_report()
+        report['errors'] = 1
+        return report
+    return load_byte_range(filename, start, end, _worker_db, record_types, batch_size,
+                           checkpoint=checkpoint, offset=offset, edge_projection=edge_projection,
+                           layout=layout)
+
+def parallel_load_data_from_json(filename, db_name, username, password,
+                                 workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                                 checkpoint=None, resume=False, edge_projection=DEFAULT_EDGE_PROJECTION,
+                                 layout=SINGLE_LAYOUT):
+    """Load data from JSON file with a pool of worker processes.
+
+    The file is split into byte ranges aligned to line boundaries and each
+    range is bulk imported by a worker with its own database connection.
+    All ranges are loaded for nodes before any edges so that the ``_from``
+    and ``_to`` targets exist. Returns the merged load report. Compressed
+    dumps and columnar caches cannot be split and must be loaded with
+    ``bulk_load_data_from_json``.
+
+    With ``checkpoint`` set, every worker appends its committed offsets to
+    that file; ``resume=True`` reuses the recorded ranges and starts each
+    one at its last committed offset, skipping finished ranges entirely.
+    Without ``resume`` the file is started afresh.
+    Edges are slimmed with ``edge_projection`` (None keeps full copies).
+    With the per-label ``layout`` the parent registers the named graph.
+    """
+    if is_compressed(filename) or is_columnar(filename):
+        raise ValueError(f"Cannot split {filename} into byte ranges")
+    state = read_checkpoint(checkpoint) if checkpoint and resume else {'ranges': None, 'offsets': {}}
+    if checkpoint and not resume:
+        reset_checkpoint(checkpoint)
+    ranges = state['ranges']
+    if ranges is None:
+        ranges = split_byte_ranges(filename, workers * RANGES_PER_WORKER)
+        if checkpoint:
+            write_checkpoint_ranges(checkpoint, ranges)
+    reports = []
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(db_name, username, password)) as pool:
+        for record_types, desc in [(('node',), "Loading Nodes"), (('relationship',), "Loading Edges")]:
+            tasks = []
+            for start, end in ranges:
+                offset = state['offsets'].get(('+'.join(record_types), start, end), start)
+                if offset < end:
+                    tasks.append((filename, start, end, record_types, batch_size, checkpoint, offset,
+                                  edge_projection, layout))
+            results = pool.imap_unordered(_load_byte_range_task, tasks)
+            reports.extend(tqdm(results, total=len(tasks), desc=desc))
+    report = merge_reports(reports)
+
+    if layout == LABEL_LAYOUT:
+        conn = connect_to_arangodb(username, password)
+        if conn:
+            register_named_graph(conn[db_name], report['edge_definitions'])
+    return report
+
+def load_data_from_json(filename, db, stop_at=-1, batch_size=None, checkpoint=None, resume=False,
+                        edge_projection=None, layout=SINGLE_LAYOUT, on_record=None):
+    """Load data from JSON file (or a columnar cache directory) into the database.
+
+    With ``batch_size`` or ``checkpoint`` set, documents are sent through the
+    bulk import API in batches (see ``bulk_load_data_from_json``); otherwise
+    every node and relationship is saved with its own request. See
+    ``edge_document`` for ``edge_projection`` and ``layout``, and
+    ``bulk_load_lines`` for ``on_record``.
+    """
+    if batch_size or checkpoint:
+        return bulk_load_data_from_json(filename, db, stop_at=stop_at, batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                                        checkpoint=checkpoint, resume=resume, edge_projection=edge_projection,
+                                        layout=layout, on_record=on_record)
+
+    nodes_added = 0
+    edges_added = 0
+    edge_definitions = {}
+
+    for line in iter_input(filename, desc="Loading Data"):
+        if stop_at > -1 and (nodes_added + edges_added) >= stop_at:
+            break
+
+        try:
+            data = line if isinstance(line, dict) else json.loads(line)
+            if on_record is not None:
+                on_record(data)
+            if data['type'] == 'node':
+                name = node_collection(data, layout)
+                if layout == LABEL_LAYOUT:
+                    ensure_collection(db, name)
+                node_doc = db[name].createDocument()
+                node_doc['_key'] = str(data['id'])
+                node_doc.set(data)
+                node_doc.save()
+                nodes_added += 1
+            elif data['type'] == 'relationship':
+                name = edge_collection(data, layout)
+                fields = edge_document(data, edge_projection, layout)
+                if layout == LABEL_LAYOUT:
+                    ensure_collection(db, name, edges=True)
+                    add_edge_definition(edge_definitions, name, fields)
+                edge_doc = db[name].createDocument()
+                for key, value in fields.items():
+                    edge_doc[key] = value
+                edge_doc.save()
+                edges_added += 1
+        except CreationError as e:
+            if 'unique constraint violated' in e.message:
+                print(f"A document with _key {data['id']} already exists. Skipping...")
+            else:
+                print(f"Failed to create document: {e}")
+            continue
+        except json.JSONDecodeError:
+            continue  # Skip invalid JSON lines
+
+    if layout == LABEL_LAYOUT:
+        register_named_graph(db, edge_definitions)
+
     return nodes_added, edges_added
 
+def edge_projection_savings(filename, edge_projection=DEFAULT_EDGE_PROJECTION, sample_size=100000):
+    """Estimate how many bytes ``edge_projection`` saves per million edges.
+
+    Serialises up to ``sample_size`` relationships of the dump both in full
+    and projected form and extrapolates the average difference.
+    """
+    edges = full_bytes = slim_bytes = 0
+    for line in iter_dump_lines(filename):
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if data.get('type') != 'relationship':
+            continue
+        full_bytes += len(json.dumps(edge_document(data)))
+        slim_bytes += len(json.dumps(edge_document(data, edge_projection)))
+        edges += 1
+        if edges >= sample_size:
+            break
+
+    if not edges:
+        return {'edges_sampled': 0, 'full_bytes_per_edge': 0, 'slim_bytes_per_edge': 0, 'bytes_saved_per_million': 0}
+    full_per_edge = full_bytes / edges
+    slim_per_edge = slim_bytes / edges
+    return {
+        'edges_sampled': edges,
+        'full_bytes_per_edge': full_per_edge,
+        'slim_bytes_per_edge': slim_per_edge,
+        'bytes_saved_per_million': round((full_per_edge - slim_per_edge) * 1000000),
+    }
+
 def connect_to_arangodb(username, password):
     """Connect to ArangoDB and return the connection object."""
     try:
@@ -69,8 +707,27 @@ def create_or_get_database(conn, db_name):
         conn.createDatabase(name=db_name)
     return conn[db_name]
 
-def main(db_name, file_path, username, password):
-    """Main function to orchestrate the data loading process."""
+def main(db_name, file_path, username, password, workers=1, batch_size=None, checkpoint=None, resume=False,
+         edge_projection=DEFAULT_EDGE_PROJECTION, build_indexes=True, layout=SINGLE_LAYOUT, entity_index=None,
+         search_view=False):
+    """Main function to orchestrate the data loading process.
+
+    ``workers`` > 1 loads the file with ``parallel_load_data_from_json``;
+    ``batch_size`` enables bulk imports (required for the parallel loader,
+    which falls back to ``DEFAULT_BATCH_SIZE``). ``checkpoint`` records
+    committed offsets and ``resume=True`` continues from them. Edges are
+    slimmed with ``edge_projection`` unless it is None. With
+    ``build_indexes`` the query indexes are built once the load is done.
+    ``layout=LABEL_LAYOUT`` loads per-type vertex and per-label edge
+    collections and registers them as a named graph.
+
+    With ``entity_index`` set to a directory, an ``entity_index.EntityIndex``
+    of the node names is saved there for resolving entities in questions.
+    It is built from the records as they are loaded, except for parallel
+    or resumed loads, which do not see every node; those read the file a
+    second time. ``search_view`` creates the ArangoSearch view of node
+    names used with ``ENTITY_SEARCH_VIEW=1`` (see ``entity_index.ensure_search_view``).
+    """
     print("Connecting...")
     conn = connect_to_arangodb(username, password)
     if not conn:
@@ -79,15 +736,76 @@ def main(db_name, file_path, username, password):
     db = create_or_get_database(conn, db_name)
     ensure_collections(db)
 
-    nodes_added, edges_added = load_data_from_json(file_path, db)
+    if workers > 1 and (is_compressed(file_path) or is_columnar(file_path)):
+        print("Compressed dumps and columnar caches cannot be split; loading with a single worker")
+        workers, batch_size = 1, batch_size or DEFAULT_BATCH_SIZE
+
+    # Imported here because entity_index builds on this module
+    from entity_index import EntityIndex, EntityIndexBuilder, ensure_search_view
+    entities = EntityIndexBuilder(layout) if entity_index and workers == 1 and not resume else None
+    on_record = entities.add_record if entities is not None else None
+
+    if workers > 1:
+        report = parallel_load_data_from_json(file_path, db_name, username, password,
+                                              workers=workers, batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                                              checkpoint=checkpoint, resume=resume,
+                                              edge_projection=edge_projection, layout=layout)
+        nodes_added, edges_added = report['nodes'], report['edges']
+        print(f"Duplicates skipped: {report['ignored']}")
+        print(f"Failed documents: {report['errors']}")
+    else:
+        nodes_added, edges_added = load_data_from_json(file_path, db, batch_size=batch_size,
+                                                       checkpoint=checkpoint, resume=resume,
+                                                       edge_projection=edge_projection, layout=layout,
+                                                       on_record=on_record)
 
     print(f"Total nodes added: {nodes_added}")
     print(f"Total edges added: {edges_added}")
 
+    if build_indexes:
+        indexes = layout_indexes(graph_edge_definitions(db)) if layout == LABEL_LAYOUT else None
+        created = ensure_indexes(db, indexes)
+        print(f"Indexes built: {len(created)}")
+
+    if entity_index:
+        index = entities.build() if entities is not None else EntityIndex.from_dump(file_path, layout)
+        index.save(entity_index)
+        print(f"Entity index of {len(index.entry_text)} names saved to {entity_index}")
+
+    if search_view:
+        collections = vertex_collections(db)
+        ensure_search_view(db, collections)
+        print(f"Search view covers {len(collections)} collections")
+
+def vertex_collections(db):
+    """Return the vertex collections of the named graph, or ``['Nodes']`` for the single layout."""
+    return sorted({name for d in graph_edge_definitions(db) for name in d['from'] + d['to']}) or ['Nodes']
+
+def index_main(db_name, username, password, check_only=True, search_view=False):
+    """Report missing query indexes on an existing database, or build them.
+
+    ``search_view`` also creates the ArangoSearch view of node names used
+    with ``ENTITY_SEARCH_VIEW=1``.
+    """
+    conn = connect_to_arangodb(username, password)
+    if not conn:
+        return None
+
+    db = create_or_get_database(conn, db_name)
+    if search_view:
+        # Imported here because entity_index builds on this module
+        from entity_index import ensure_search_view
+        ensure_search_view(db, vertex_collections(db))
+    if check_only:
+        return check_indexes(db)
+    return ensure_indexes(db)
+
 if __name__ == "__main__":
     # Example usage
     db_name = "spoke23_human"
     file_path = '/path/to/your/spoke_2023_human.json'
     username = "root"
     password = "your_password_here"
-    main(db_name, file_path, username, password)
+    checkpoint = file_path + '.checkpoint'
+    main(db_name, file_path, username, password, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+         checkpoint=checkpoint, resume=True)
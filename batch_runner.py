@@ -0,0 +1,157 @@
+import argparse
+import csv
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 6  # Retries of a question after an LLM rate-limit error
+DEFAULT_BACKOFF = 2.0  # Seconds before the first retry, doubled on each further one
+MAX_BACKOFF = 120.0
+
+def read_questions(path):
+    """Read ``{'id', 'question'}`` records from a JSONL or CSV file.
+
+    JSONL lines are objects with a ``question`` (or are bare strings); CSV
+    files need a ``question`` column. An ``id`` field is optional and
+    defaults to the question text.
+    """
+    with open(path, newline='') as file:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+    questions = []
+    for row in rows:
+        if isinstance(row, str):
+            row = {'question': row}
+        questions.append({'id': str(row.get('id') or row['question']), 'question': row['question']})
+    return questions
+
+def completed_ids(output_path):
+    """Return the ids already answered in ``output_path``; failed questions are not included."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted run
+            if 'error' not in record:
+                done.add(record['id'])
+    return done
+
+def is_rate_limit(error):
+    """Return True for an HTTP 429 from the LLM API, e.g. ``openai.RateLimitError``."""
+    status_code = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    return status_code == 429 or 'rate limit' in str(error).lower()
+
+class RateLimiter:
+    """Space out calls to at most ``rate`` per second across threads.
+
+    ``pause(seconds)`` holds back every caller, so one rate-limit error
+    slows the whole pool rather than each worker discovering it in turn.
+    """
+
+    def __init__(self, rate=None, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.next_call = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = self.clock()
+            start = max(now, self.next_call)
+            self.next_call = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.next_call = max(self.next_call, self.clock() + seconds)
+
+def answer_with_backoff(answer, question, limiter, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF):
+    """Return ``(answer(question), retries)``, backing off exponentially with jitter on rate-limit errors."""
+    for retry in range(max_retries + 1):
+        limiter.wait()
+        try:
+            return answer(question), retry
+        except Exception as e:
+            if not is_rate_limit(e) or retry == max_retries:
+                raise
+            delay = min(backoff * 2 ** retry, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+            tqdm.write(f"Rate limited, retrying in {delay:.1f}s: {e}")
+            limiter.pause(delay)
+
+def answer_record(answer, question, limiter, max_retries, backoff):
+    """Answer one question and return its output record, with ``error`` set if it failed."""
+    record = {'id': question['id'], 'question': question['question']}
+    start = time.perf_counter()
+    try:
+        response, record['retries'] = answer_with_backoff(answer, question['question'], limiter, max_retries, backoff)
+        record.update(
+            attempts=response['attempts'],
+            aql_query=response['aql_query'],
+            result_size=len(response['aql_result'] or []),
+            scientific_story=response['scientific_story'],
+            timings=response.get('timings'),
+        )
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+def run_batch(questions, answer, output_path, workers=DEFAULT_WORKERS, rate=None, max_retries=DEFAULT_MAX_RETRIES,
+              backoff=DEFAULT_BACKOFF):
+    """Answer ``questions`` on ``workers`` threads, appending a JSON line to ``output_path`` as each finishes.
+
+    ``answer(question)`` returns a dict like ``QAService.answer``. Questions
+    already answered in ``output_path`` are skipped, so an interrupted run
+    resumes where it stopped and failed ones are retried. ``rate`` caps
+    questions started per second. Returns counts of answered, failed and
+    skipped questions.
+    """
+    done = completed_ids(output_path)
+    pending = [question for question in questions if question['id'] not in done]
+    limiter = RateLimiter(rate)
+    summary = {'answered': 0, 'failed': 0, 'skipped': len(questions) - len(pending)}
+    with open(output_path, 'a') as file, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(answer_record, answer, question, limiter, max_retries, backoff)
+                   for question in pending]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Answering"):
+            record = future.result()
+            file.write(json.dumps(record, default=str) + '\n')
+            file.flush()
+            summary['failed' if 'error' in record else 'answered'] += 1
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL or CSV file of questions with the SPOKE QA pipeline.")
+    parser.add_argument('questions', help="JSONL or CSV file of questions")
+    parser.add_argument('output', help="JSONL file answers are appended to; answered questions are skipped")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="questions answered at once")
+    parser.add_argument('--rate', type=float, help="most questions started per second")
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help="retries after a rate limit")
+    parser.add_argument('--trace', help="JSONL file to append per-stage timing spans to")
+    args = parser.parse_args(argv)
+
+    # Imported here so the batch helpers can be used without the LLM stack
+    from qa_service import QAService
+    from tracing import Tracer
+
+    service = QAService(args.workers, Tracer(args.trace))
+    summary = run_batch(read_questions(args.questions), service.answer, args.output, args.workers, args.rate,
+                        args.max_retries)
+    print(f"Answered {summary['answered']}, failed {summary['failed']}, skipped {summary['skipped']} already answered")
+    return summary
+
+if __name__ == "__main__":
+    main()
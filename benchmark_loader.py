@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from arangodb_loader import load_data_from_json, edge_projection_savings, DEFAULT_EDGE_PROJECTION
+
+class FakeDocument(dict):
+    """Stand-in for a pyArango document that costs one round-trip per save."""
+
+    def __init__(self, collection):
+        super().__init__()
+        self.collection = collection
+
+    def set(self, data):
+        self.update(data)
+
+    def save(self):
+        self.collection.round_trip()
+        self.collection.docs[self.get('_key', len(self.collection.docs))] = dict(self)
+
+class FakeCollection:
+    """In-memory collection that sleeps ``latency`` seconds per HTTP request."""
+
+    def __init__(self, latency, edges=False):
+        self.latency = latency
+        self.edges = edges
+        self.requests = 0
+        self.docs = {}
+        self.indexes = []
+
+    def round_trip(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def createDocument(self):
+        return FakeDocument(self)
+
+    def importBulk(self, docs, **params):
+        self.round_trip()
+        created = ignored = updated = 0
+        for doc in docs:
+            key = doc.get('_key', len(self.docs))
+            if key not in self.docs:
+                created += 1
+            elif params.get('onDuplicate') == 'replace':
+                updated += 1
+            else:
+                ignored += 1
+                continue
+            self.docs[key] = doc
+        return {'error': False, 'created': created, 'ignored': ignored, 'updated': updated, 'errors': 0}
+
+    def ensureIndex(self, index_type, fields, name=None, **index_args):
+        index = dict(index_args, type=index_type, fields=fields, name=name)
+        self.indexes.append(index)
+        return index
+
+    def index_infos(self):
+        """Indexes as ArangoDB lists them, including the built-in primary and edge indexes."""
+        indexes = [{'type': 'primary', 'fields': ['_key']}]
+        if self.edges:
+            indexes.append({'type': 'edge', 'fields': ['_from', '_to']})
+        return indexes + self.indexes
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+class FakeSession:
+    """Stand-in for the HTTP session of a pyArango connection, serving only the index API."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def get(self, url, **kwargs):
+        path, _, collection = url.partition('/index?collection=')
+        if path != self.db.getURL():
+            raise NotImplementedError(url)
+        if collection not in self.db:
+            return FakeResponse({'error': True, 'errorNum': 1203}, 404)
+        return FakeResponse({'indexes': self.db[collection].index_infos()})
+
+class FakeDatabase(dict):
+    """Dictionary of fake collections addressed like ``db["Nodes"]``."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(Nodes=FakeCollection(latency), Edges=FakeCollection(latency, edges=True))
+        self.connection = SimpleNamespace(session=FakeSession(self))
+
+    def getURL(self):
+        return 'http://localhost:8529/_db/spoke/_api'
+
+    def hasCollection(self, name):
+        return name in self
+
+    def createCollection(self, name, **kwargs):
+        self[name] = FakeCollection(self['Nodes'].latency, edges=kwargs.get('type') == 3)
+        return self[name]
+
+    def AQLQuery(self, query, bindVars=None, **kwargs):
+        """Run the only AQL the loaders send: removing ``@keys`` from ``@@collection``."""
+        if not query.startswith("FOR key IN @keys REMOVE"):
+            raise NotImplementedError(query)
+        collection = self[bindVars['@collection']]
+        collection.round_trip()
+        for key in bindVars['keys']:
+            collection.docs.pop(key, None)
+        return []
+
+def synthetic_node(i):
+    return {'id': str(i), 'labels': ['Gene'], 'properties': {'name': f'GENE{i}', 'identifier': str(i)}}
+
+def write_synthetic_spoke(path, n_nodes, edges_per_node=3):
+    """Write a SPOKE-shaped JSONL dump with ``n_nodes`` nodes and their edges.
+
+    As in the real dump, every relationship embeds complete copies of its
+    start and end nodes.
+    """
+    with open(path, 'w') as file:
+        for i in range(n_nodes):
+            file.write(json.dumps(dict(synthetic_node(i), type='node')) + '\n')
+        for i in range(n_nodes):
+            for j in range(1, edges_per_node + 1):
+                file.write(json.dumps({
+                    'type': 'relationship', 'id': f'{i}-{j}', 'label': 'INTERACTS_PiP',
+                    'properties': {'source': 'synthetic'},
+                    'start': synthetic_node(i), 'end': synthetic_node((i + j) % n_nodes),
+                }) + '\n')
+
+def time_load(file_path, latency, **load_kwargs):
+    """Load ``file_path`` into a fresh fake database and report timing."""
+    db = FakeDatabase(latency)
+    start = time.perf_counter()
+    nodes_added, edges_added = load_data_from_json(file_path, db, **load_kwargs)
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': elapsed,
+        'nodes': nodes_added,
+        'edges': edges_added,
+        'requests': db['Nodes'].requests + db['Edges'].requests,
+    }
+
+def main(n_nodes=2000, latency=0.0005, batch_size=1000):
+    """Compare per-document and bulk loading against a fake database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'spoke_synthetic.json')
+        write_synthetic_spoke(file_path, n_nodes)
+        single = time_load(file_path, latency)
+        bulk = time_load(file_path, latency, batch_size=batch_size)
+        savings = edge_projection_savings(file_path, DEFAULT_EDGE_PROJECTION)
+
+    print(f"Per-document: {single['seconds']:.2f}s, {single['requests']} requests")
+    print(f"Bulk (batch_size={batch_size}): {bulk['seconds']:.2f}s, {bulk['requests']} requests")
+    print(f"Speedup: {single['seconds'] / bulk['seconds']:.1f}x")
+    print(f"Slim edges: {savings['slim_bytes_per_edge']:.0f} vs {savings['full_bytes_per_edge']:.0f} bytes per edge, "
+          f"{savings['bytes_saved_per_million'] / 1e6:.0f} MB saved per million edges")
+    return single, bulk
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import re
+import time
+from types import SimpleNamespace
+from qa_pipeline import execute_query_with_retries, speculative_query
+
+class FakeLLM:
+    """Stand-in for ChatOpenAI that sleeps ``latency`` seconds per call and records prompts.
+
+    ``stream`` yields the content word by word, sleeping ``latency`` before
+    each word.
+    """
+
+    def __init__(self, content='story', latency=0.0, temperature=0):
+        self.content = content
+        self.latency = latency
+        self.temperature = temperature
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(content=self.content)
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        for word in re.findall(r'\S+\s*', self.content):
+            if self.latency:
+                time.sleep(self.latency)
+            yield SimpleNamespace(content=word)
+
+class FakeQAChain:
+    """Stand-in for ArangoGraphQAChain: generates and runs AQL in ``latency`` seconds.
+
+    ``results`` is a list of ``aql_result`` values returned in turn, or a
+    function of the question returning one.
+    """
+    input_key = 'query'
+
+    def __init__(self, results, latency=0.0):
+        self.results = results if callable(results) else list(results)
+        self.latency = latency
+        self.queries = []
+
+    def invoke(self, inputs):
+        query = inputs[self.input_key]
+        self.queries.append(query)
+        if self.latency:
+            time.sleep(self.latency)
+        result = self.results(query) if callable(self.results) else self.results.pop(0)
+        return {'result': 'answer', 'aql_query': f'QUERY {len(self.queries)}', 'aql_result': result}
+
+class FakeArangoCollection:
+    """Stand-in for a python-arango collection with a revision and a count."""
+
+    def __init__(self, count=0):
+        self.revision_number = 1
+        self.document_count = count
+
+    def revision(self):
+        return str(self.revision_number)
+
+    def count(self):
+        return self.document_count
+
+class FakeAQL:
+    """Stand-in for ``db.aql``: results are looked up by query text in ``results``.
+
+    ``explain`` returns ``plan(query)`` if a plan function is given, else a
+    cheap plan without collection scans.
+    """
+
+    def __init__(self, results, plan=None):
+        self.results = results
+        self.plan = plan
+        self.executed = []
+        self.options = []
+
+    def execute(self, query, **options):
+        self.executed.append(query)
+        self.options.append(options)
+        return iter(self.results.get(query, []))
+
+    def explain(self, query, **options):
+        if self.plan is not None:
+            return self.plan(query)
+        return {'nodes': [{'type': 'SingletonNode'}, {'type': 'ReturnNode'}], 'estimatedCost': 1}
+
+class FakeGraphDB:
+    """Stand-in for a python-arango database holding the Nodes and Edges collections."""
+    name = 'spoke'
+
+    def __init__(self, results=None, plan=None):
+        self.collections_by_name = {'Nodes': FakeArangoCollection(), 'Edges': FakeArangoCollection()}
+        self.aql = FakeAQL(results or {}, plan)
+
+    def collections(self):
+        return [{'name': '_graphs', 'system': True}] + [
+            {'name': name, 'system': False} for name in self.collections_by_name]
+
+    def collection(self, name):
+        return self.collections_by_name[name]
+
+def answer_after(failures, result):
+    """Return an ``aql_result`` function that fails the first ``failures`` calls."""
+    calls = []
+
+    def answer(query):
+        calls.append(query)
+        return result if len(calls) > failures else []
+    return answer
+
+def main(latency=0.2, failures=2, candidates=3):
+    """Compare sequential retries with speculative candidates when the first attempts fail."""
+    result = [{'gene': 'PPARG'}]
+    llm = FakeLLM()
+
+    start = time.perf_counter()
+    chain = FakeQAChain(answer_after(failures, result), latency)
+    sequential = execute_query_with_retries('question', chain, llm, max_attempts=10)
+    sequential_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chain = FakeQAChain(answer_after(failures, result), latency)
+    speculative = speculative_query('question', [chain] * candidates, llm, max_attempts=10)
+    speculative_seconds = time.perf_counter() - start
+
+    print(f"Sequential: {sequential_seconds:.2f}s, {sequential[0]} attempts")
+    print(f"Speculative ({candidates} candidates): {speculative_seconds:.2f}s, {speculative[0]} attempts")
+    return sequential_seconds, speculative_seconds
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import json
+import os
+import re
+import unicodedata
+from array import array
+import numpy as np
+from pyArango.theExceptions import CreationError
+from arangodb_loader import SINGLE_LAYOUT, node_collection
+from spoke_dump import SpokeNode, iter_spoke_records
+
+# Node properties whose values name the node (lists, such as synonyms, are flattened)
+NAME_PROPERTIES = ('name', 'identifier', 'synonyms')
+DEFAULT_K = 3
+DEFAULT_MIN_SCORE = 0.75  # Lowest trigram Dice similarity accepted for a fuzzy match
+MAX_MENTION_WORDS = 6
+MIN_SPAN_CHARS = 3  # Shortest part of a run matched on its own
+MAX_POSTINGS = 50000  # Trigrams shared by more names are skipped in fuzzy lookups
+# Words never taken as entity mentions on their own: question words and the
+# vocabulary of node types and relationships
+STOPWORDS = set("""
+a about all also an and any are as associated association associations at be between by can cause caused causes
+could did do does during each for from gene genes have how i in into involved is it its known linked list many may
+me most of on or other participate participates pathway pathways related relationship should show that the their
+them these they this those to treat treated treats used what when where which who why will with would disease
+diseases drug drugs compound compounds protein proteins anatomy symptom symptoms side effect effects node nodes
+""".split())
+# Search view and analyzer for resolving entities in ArangoDB instead of in memory
+SEARCH_VIEW = 'NodeSearch'
+TRIGRAM_ANALYZER = 'spoke_trigram'
+
+def normalize(text):
+    """Lower-case ``text``, strip accents and reduce punctuation to single spaces."""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode()
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+def trigrams(text):
+    """Return the set of character trigrams of normalized ``text``, padded with spaces."""
+    padded = f' {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def node_names(properties):
+    """Return the name, identifier and synonyms of a node's properties as strings."""
+    names = []
+    for key in NAME_PROPERTIES:
+        value = properties.get(key)
+        for name in value if isinstance(value, list) else [value]:
+            if name not in (None, ''):
+                names.append(str(name))
+    return names
+
+def mention_runs(question, stopwords=STOPWORDS):
+    """Split ``question`` into runs of consecutive normalized words that are not stopwords."""
+    runs, run = [], []
+    for word in normalize(question).split():
+        if word in stopwords:
+            if run:
+                runs.append(run)
+            run = []
+        else:
+            run.append(word)
+    if run:
+        runs.append(run)
+    return runs
+
+class EntityIndex:
+    """Exact and trigram index from node names, identifiers and synonyms to SPOKE nodes.
+
+    Every name is normalized (see ``normalize``) into an entry. Exact
+    lookups use a dictionary of entries; fuzzy lookups score entries by the
+    Dice similarity of their trigram sets, using a CSR posting list from
+    each trigram to the entries containing it.
+    """
+
+    def __init__(self, node_ids, node_type, types, names, entry_row, entry_text, layout=SINGLE_LAYOUT):
+        self.node_ids = list(node_ids)
+        self.node_type = np.asarray(node_type, dtype=np.int32)
+        self.types = list(types)
+        self.type_index = {name: i for i, name in enumerate(self.types)}
+        self.names = list(names)
+        self.entry_row = np.asarray(entry_row, dtype=np.int64)
+        self.entry_text = list(entry_text)
+        self.layout = layout
+        self.exact = {}
+        for entry, text in enumerate(self.entry_text):
+            self.exact.setdefault(text, []).append(entry)
+
+        grams, gram_ids, entries = {}, array('q'), array('q')
+        for entry, text in enumerate(self.entry_text):
+            for gram in trigrams(text):
+                gram_ids.append(grams.setdefault(gram, len(grams)))
+                entries.append(entry)
+        gram_ids, entries = np.frombuffer(gram_ids, dtype=np.int64), np.frombuffer(entries, dtype=np.int64)
+        self.trigram_index = grams
+        self.entry_size = np.bincount(entries, minlength=len(self.entry_text)).astype(np.int32)
+        self.postings = entries[np.argsort(gram_ids, kind='stable')]
+        self.offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(grams)), out=self.offsets[1:])
+
+    @classmethod
+    def from_dump(cls, path, layout=SINGLE_LAYOUT):
+        """Build the index from the node records of a SPOKE dump or columnar cache."""
+        builder = EntityIndexBuilder(layout)
+        for record in iter_spoke_records(path, desc="Indexing entities"):
+            if isinstance(record, SpokeNode):
+                builder.add(record.id, record.labels, record.properties)
+        return builder.build()
+
+    def save(self, path):
+        """Save the index to the directory ``path``; ``load`` rebuilds the trigram postings."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'node_type.npy'), self.node_type)
+        np.save(os.path.join(path, 'entry_row.npy'), self.entry_row)
+        with open(os.path.join(path, 'entities.json'), 'w') as file:
+            json.dump({'ids': self.node_ids, 'types': self.types, 'names': self.names, 'entries': self.entry_text,
+                       'layout': self.layout}, file)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by ``save``."""
+        with open(os.path.join(path, 'entities.json')) as file:
+            entities = json.load(file)
+        load = lambda name: np.load(os.path.join(path, f'{name}.npy'))
+        return cls(entities['ids'], load('node_type'), entities['types'], entities['names'], load('entry_row'),
+                   entities['entries'], entities['layout'])
+
+    def arango_id(self, row):
+        """Return the ArangoDB ``_id`` of a node row under the index's collection layout."""
+        node_type = self.types[self.node_type[row]]
+        return f"{node_collection({'labels': [node_type]}, self.layout)}/{self.node_ids[row]}"
+
+    def candidate(self, row, score):
+        return {'_id': self.arango_id(row), 'type': self.types[self.node_type[row]], 'name': self.names[row],
+                'score': round(float(score), 3)}
+
+    def lookup(self, name, node_type=None, k=DEFAULT_K, min_score=DEFAULT_MIN_SCORE):
+        """Return up to ``k`` nodes named like ``name``, best first, as ``{'_id', 'type', 'name', 'score'}``.
+
+        Exact matches of the normalized name score 1; otherwise entries
+        whose trigram similarity reaches ``min_score`` are returned.
+        """
+        text = normalize(name)
+        type_id = self.type_index.get(node_type, -2) if node_type else None
+        exact = self.entry_row[self.exact.get(text, [])]
+        if type_id is not None:
+            exact = exact[self.node_type[exact] == type_id]
+        if len(exact):
+            return [self.candidate(row, 1) for row in dict.fromkeys(exact.tolist())][:k]
+
+        grams = trigrams(text)
+        gram_ids = [self.trigram_index[gram] for gram in grams if gram in self.trigram_index]
+        lists = [self.postings[self.offsets[g]:self.offsets[g + 1]] for g in gram_ids]
+        lists = [postings for postings in lists if len(postings) <= MAX_POSTINGS] or lists
+        if not text or not lists:
+            return []
+        entries, shared = np.unique(np.concatenate(lists), return_counts=True)
+        scores = 2 * shared / (len(grams) + self.entry_size[entries])
+        keep = scores >= min_score
+        if type_id is not None:
+            keep &= self.node_type[self.entry_row[entries]] == type_id
+        entries, scores = entries[keep], scores[keep]
+        best = {}
+        for i in np.argsort(-scores, kind='stable'):
+            row = int(self.entry_row[entries[i]])
+            if row not in best:
+                best[row] = scores[i]
+                if len(best) == k:
+                    break
+        return [self.candidate(row, score) for row, score in best.items()]
+
+    def resolve(self, question, k=DEFAULT_K, min_score=DEFAULT_MIN_SCORE):
+        """Find the entities named in ``question``.
+
+        Each run of non-stopword words is first looked up as a whole,
+        exactly and then fuzzily. Only if that fails are its longest spans
+        with an exact match taken; spans shorter than ``MIN_SPAN_CHARS`` and
+        bare numbers, which match numeric identifiers, are skipped. Returns
+        ``[{'mention', 'candidates'}]``.
+        """
+        resolved = []
+        for words in mention_runs(question):
+            run = ' '.join(words)
+            candidates = []
+            if len(run) > 1 and run in self.exact:
+                candidates = self.lookup(run, k=k)
+            elif len(run) >= 4:
+                candidates = self.lookup(run, k=k, min_score=min_score)
+            if candidates:
+                resolved.append({'mention': run, 'candidates': candidates})
+                continue
+
+            used = [False] * len(words)
+            found = []
+            for size in range(min(MAX_MENTION_WORDS, len(words) - 1), 0, -1):
+                for start in range(len(words) - size + 1):
+                    mention = ' '.join(words[start:start + size])
+                    if (any(used[start:start + size]) or len(mention) < MIN_SPAN_CHARS
+                            or mention.replace(' ', '').isdigit() or mention not in self.exact):
+                        continue
+                    found.append((start, {'mention': mention, 'candidates': self.lookup(mention, k=k)}))
+                    used[start:start + size] = [True] * size
+            resolved += [entity for _, entity in sorted(found, key=lambda item: item[0])]
+        return resolved
+
+class EntityIndexBuilder:
+    """Collect node names one record at a time, e.g. from the loader's record stream, into an ``EntityIndex``."""
+
+    def __init__(self, layout=SINGLE_LAYOUT):
+        self.layout = layout
+        self.node_ids, self.node_type, self.types, self.type_index, self.names = [], [], [], {}, []
+        self.entry_row, self.entry_text = [], []
+
+    def add(self, node_id, labels, properties):
+        label = labels[0] if labels else ''
+        if label not in self.type_index:
+            self.type_index[label] = len(self.types)
+            self.types.append(label)
+        row = len(self.node_ids)
+        self.node_ids.append(str(node_id))
+        self.node_type.append(self.type_index[label])
+        self.names.append(properties.get('name'))
+        for text in dict.fromkeys(normalize(name) for name in node_names(properties)):
+            if text:
+                self.entry_row.append(row)
+                self.entry_text.append(text)
+
+    def add_record(self, data):
+        """Add a parsed dump record; relationships are ignored."""
+        if data.get('type') == 'node':
+            self.add(data['id'], data.get('labels'), data.get('properties') or {})
+
+    def build(self):
+        return EntityIndex(self.node_ids, self.node_type, self.types, self.names, self.entry_row, self.entry_text,
+                           self.layout)
+
+def entity_prompt(resolved):
+    """Render resolved entities as a prompt section, or '' if there are none."""
+    lines = [f'"{entity["mention"]}": ' + '; '.join(
+        f"{candidate['_id']} ({candidate['type']}: {candidate['name']})" for candidate in entity['candidates'])
+        for entity in resolved if entity['candidates']]
+    if not lines:
+        return ""
+    entities = "\n".join(lines)
+    return f"""
+    <Resolved Entities>These graph nodes match entities named in the question. Start traversals from their _id (e.g. FOR v IN 1..1 OUTBOUND "Nodes/1" Edges) or filter on it instead of matching names; if several are listed, use the one whose type fits the question.
+{entities}</Resolved Entities>
+"""
+
+def ensure_search_view(db, collections=('Nodes',), view=SEARCH_VIEW):
+    """Create the trigram analyzer and an ArangoSearch view over node names in a pyArango database.
+
+    Like ``arangodb_loader.register_named_graph`` this uses the HTTP API
+    directly. An existing view is linked to any new ``collections``.
+    """
+    url = db.getURL()
+    session = db.connection.session
+    analyzers = session.get(f"{url}/analyzer").json().get('result', [])
+    if not any(analyzer['name'].split('::')[-1] == TRIGRAM_ANALYZER for analyzer in analyzers):
+        r = session.post(f"{url}/analyzer", data=json.dumps({
+            'name': TRIGRAM_ANALYZER, 'type': 'pipeline', 'features': ['frequency', 'norm', 'position'],
+            'properties': {'pipeline': [
+                {'type': 'norm', 'properties': {'locale': 'en', 'case': 'lower', 'accent': False}},
+                {'type': 'ngram', 'properties': {'min': 3, 'max': 3, 'preserveOriginal': False, 'streamType': 'utf8'}},
+            ]},
+        }))
+        if r.status_code not in (200, 201):
+            raise CreationError(r.json().get('errorMessage', "Unable to create analyzer"), r.json())
+
+    fields = {'name': {'analyzers': [TRIGRAM_ANALYZER]}, 'synonyms': {'analyzers': [TRIGRAM_ANALYZER]},
+              'identifier': {'analyzers': ['identity']}}
+    links = {collection: {'fields': {'properties': {'fields': fields}}} for collection in collections}
+    if any(existing['name'] == view for existing in session.get(f"{url}/view").json().get('result', [])):
+        r = session.patch(f"{url}/view/{view}/properties", data=json.dumps({'links': links}))
+    else:
+        r = session.post(f"{url}/view", data=json.dumps({'name': view, 'type': 'arangosearch', 'links': links}))
+    if r.status_code not in (200, 201):
+        raise CreationError(r.json().get('errorMessage', "Unable to create search view"), r.json())
+
+class SearchViewResolver:
+    """Resolve entities with the ArangoSearch view made by ``ensure_search_view`` instead of an in-memory index."""
+
+    def __init__(self, db, view=SEARCH_VIEW):
+        self.db = db
+        self.view = view
+
+    def lookup(self, name, node_type=None, k=DEFAULT_K, min_score=DEFAULT_MIN_SCORE):
+        query = f"""
+        FOR doc IN {self.view}
+            SEARCH doc.properties.identifier == @name
+                OR NGRAM_MATCH(doc.properties.name, @name, @min_score, "{TRIGRAM_ANALYZER}")
+                OR NGRAM_MATCH(doc.properties.synonyms, @name, @min_score, "{TRIGRAM_ANALYZER}")
+            FILTER @type == null OR @type IN doc.labels
+            SORT BM25(doc) DESC
+            LIMIT @k
+            RETURN {{_id: doc._id, type: FIRST(doc.labels), name: doc.properties.name, score: BM25(doc)}}
+        """
+        bind_vars = {'name': name, 'min_score': min_score, 'type': node_type, 'k': k}
+        return list(self.db.aql.execute(query, bind_vars=bind_vars))
+
+    def resolve(self, question, k=DEFAULT_K, min_score=DEFAULT_MIN_SCORE):
+        """Look up each run of non-stopword words in ``question`` (see ``EntityIndex.resolve``)."""
+        resolved = []
+        for words in mention_runs(question):
+            mention = ' '.join(words)
+            candidates = self.lookup(mention, k=k, min_score=min_score) if len(mention) >= 3 else []
+            if candidates:
+                resolved.append({'mention': mention, 'candidates': candidates})
+        return resolved
+
+if __name__ == "__main__":
+    # Example usage
+    dump_path = '/path/to/your/spoke_2023_human.json'
+    out_dir = '/path/to/your/spoke_2023_human.entities'
+    index = EntityIndex.from_dump(dump_path)
+    index.save(out_dir)
+    print(f"Indexed {len(index.entry_text)} names of {len(index.node_ids)} nodes to {out_dir}")
+    print(index.resolve("Which genes are associated with type 2 diabetes?"))
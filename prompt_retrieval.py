@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from prompts_openai import available_edge_labels, build_graph_info, few_shot, format_prompt, layout_few_shot
+
+# Node-type abbreviations used in edge label suffixes, e.g. ASSOCIATES_DaG
+NODE_TYPE_ABBREVIATIONS = {
+    'A': 'Anatomy', 'BP': 'BiologicalProcess', 'C': 'Compound', 'CC': 'CellularComponent', 'CT': 'CellType',
+    'D': 'Disease', 'EC': 'EC', 'F': 'Food', 'G': 'Gene', 'GP': 'Gene', 'KG': 'Gene', 'M': 'MiRNA',
+    'MF': 'MolecularFunction', 'mG': 'Gene', 'O': 'Organism', 'OG': 'Gene', 'P': 'Protein',
+    'PC': 'PharmacologicClass', 'PD': 'ProteinDomain', 'PF': 'ProteinFamily', 'PW': 'Pathway', 'R': 'Reaction',
+    'S': 'Symptom', 'SE': 'SideEffect',
+}
+# Everyday words for node types, so questions about "drugs" find Compound edges
+NODE_TYPE_SYNONYMS = {
+    'Anatomy': 'tissue organ anatomical',
+    'BiologicalProcess': 'biological process GO',
+    'CellType': 'cell type',
+    'Compound': 'drug medication chemical molecule metabolite',
+    'Disease': 'disorder condition illness',
+    'EC': 'enzyme class',
+    'Gene': 'genetic variant mutation',
+    'MiRNA': 'microRNA miRNA',
+    'Organism': 'pathogen bacteria virus microbe',
+    'Protein': 'target enzyme',
+    'SideEffect': 'side effect adverse reaction',
+    'Symptom': 'sign phenotype',
+}
+DEFAULT_EDGE_K = 8
+DEFAULT_TYPE_K = 4
+DEFAULT_EXAMPLE_K = 1
+
+def split_edge_label(label):
+    """Return (relationship words, from type, to type) for a label like ``ASSOCIATES_DaG``."""
+    name, _, suffix = label.rpartition('_')
+    match = re.fullmatch(r'(m?[A-Z]+)([a-z]+)(m?[A-Z]+)', suffix)
+    if not name or not match:
+        return label.replace('_', ' ').lower(), None, None
+    return (name.replace('_', ' ').lower(), NODE_TYPE_ABBREVIATIONS.get(match.group(1)),
+            NODE_TYPE_ABBREVIATIONS.get(match.group(3)))
+
+def stem(token):
+    for suffix in ('ing', 'es', 'ed', 's', 'e'):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text):
+    """Lower-case, split camelCase and punctuation, and crudely stem ``text``."""
+    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+    return [stem(token) for token in re.findall(r'[a-z0-9]+', text.lower())]
+
+def parse_few_shot(text):
+    """Split a few-shot block into ``{'question', 'aql'}`` examples."""
+    questions = re.findall(r'<Example Question \d+>Question \d+:\s*(.*?)\s*</Example Question \d+>', text, re.S)
+    answers = re.findall(r'<Example Answer \d+>AQL Statement \d+:\s*(.*?)</Example Answer \d+>', text, re.S)
+    return [{'question': question, 'aql': aql} for question, aql in zip(questions, answers)]
+
+def format_examples(examples):
+    """Render examples in the prompt's few-shot markup."""
+    return "\n".join(
+        f"<Example Question {i}>Question {i}: {example['question']}</Example Question {i}>\n"
+        f"<Example Answer {i}>AQL Statement {i}: {example['aql']}</Example Answer {i}>"
+        for i, example in enumerate(examples, 1)
+    )
+
+class BM25:
+    """Okapi BM25 ranking over tokenized documents."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(counts.values()) for counts in self.documents]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        frequency = Counter(token for counts in self.documents for token in counts)
+        n = len(self.documents)
+        self.idf = {token: math.log(1 + (n - df + 0.5) / (df + 0.5)) for token, df in frequency.items()}
+
+    def scores(self, query):
+        tokens = tokenize(query)
+        scores = []
+        for counts, length in zip(self.documents, self.lengths):
+            score = 0.0
+            for token in tokens:
+                tf = counts.get(token)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+                    score += self.idf[token] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def top(self, query, k):
+        """Return the indexes of the ``k`` best-scoring documents with a positive score."""
+        scores = self.scores(query)
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+        return ranked[:k]
+
+class PromptIndex:
+    """Retrieval index over edge labels, node types and verified few-shot examples.
+
+    ``edges`` are ``{'label', 'from', 'to'}`` dicts; ``examples`` are
+    ``{'question', 'aql'}`` dicts. ``examples_path``, if given, is a JSONL
+    file the examples are loaded from and new ones appended to.
+    """
+
+    def __init__(self, edges, examples, edge_definitions=None, graph_name="spoke", examples_path=None):
+        self.edges = edges
+        self.examples = list(examples)
+        self.edge_definitions = edge_definitions
+        self.graph_name = graph_name
+        self.examples_path = examples_path
+        if examples_path and os.path.exists(examples_path):
+            with open(examples_path) as file:
+                self.examples.extend(json.loads(line) for line in file if line.strip())
+        self.node_types = sorted({t for edge in edges for t in (edge['from'], edge['to']) if t})
+        self.edge_index = BM25([self.edge_text(edge) for edge in edges])
+        self.type_index = BM25([f"{t} {NODE_TYPE_SYNONYMS.get(t, '')}" for t in self.node_types])
+        self.example_index = BM25([example['question'] for example in self.examples])
+
+    @staticmethod
+    def edge_text(edge):
+        words = [edge['label'], split_edge_label(edge['label'])[0]]
+        for node_type in (edge['from'], edge['to']):
+            if node_type:
+                words += [node_type, NODE_TYPE_SYNONYMS.get(node_type, '')]
+        return ' '.join(words)
+
+    def add_example(self, question, aql):
+        """Add a verified question/AQL pair, persisting it to ``examples_path`` if set."""
+        example = {'question': question, 'aql': aql}
+        self.examples.append(example)
+        self.example_index = BM25([example['question'] for example in self.examples])
+        if self.examples_path:
+            with open(self.examples_path, 'a') as file:
+                file.write(json.dumps(example) + '\n')
+
+    def edge_line(self, edge):
+        if self.edge_definitions or (edge['from'] and edge['to']):
+            return f"{edge['label']}: {edge['from']} -> {edge['to']}"
+        return edge['label']
+
+    def prompt(self, question, edge_k=DEFAULT_EDGE_K, type_k=DEFAULT_TYPE_K, example_k=DEFAULT_EXAMPLE_K):
+        """Build the prompt for ``question`` from the best-matching labels, node types and examples.
+
+        When nothing matches a section, its first entries are used instead.
+        """
+        edges = self.edge_index.top(question, edge_k) or list(range(min(edge_k, len(self.edges))))
+        types = self.type_index.top(question, type_k)
+        examples = self.example_index.top(question, example_k) or list(range(min(example_k, len(self.examples))))
+        return format_prompt(
+            build_graph_info(self.edge_definitions, self.graph_name),
+            "\n".join(self.edge_line(self.edges[i]) for i in edges),
+            format_examples([self.examples[i] for i in examples]),
+            ", ".join(self.node_types[i] for i in types),
+        )
+
+def build_prompt_index(edge_definitions=None, graph_name="spoke", examples_path=None):
+    """Index the labels and examples of the given layout (see ``prompts_openai.build_base_prompt``)."""
+    if edge_definitions:
+        edges = [{'label': d['collection'], 'from': ', '.join(d['from']), 'to': ', '.join(d['to'])}
+                 for d in edge_definitions]
+        examples = parse_few_shot(layout_few_shot)
+    else:
+        edges = []
+        for label in available_edge_labels.split():
+            _, from_type, to_type = split_edge_label(label)
+            edges.append({'label': label, 'from': from_type, 'to': to_type})
+        examples = parse_few_shot(few_shot)
+    return PromptIndex(edges, examples, edge_definitions, graph_name, examples_path)
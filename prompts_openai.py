@@ -16,7 +16,7 @@ graph_info = """
                 - Connects: `_from`, `_to`.
                 - `label`: Type of relationship, e.g., "INCLUDES_PCiC".
                 - `properties`: Edge attributes, like `license`, `source`, `vestige`, `forward_degrees`, etc.
-                - Nodes: `start`, `end` with their properties.
+                - Endpoints: `start`, `end` hold only the endpoint `id`; join `_from`/`_to` to Nodes for node properties.
 
                 ### Edge Labels
                 - Variety of labels for relationship types, e.g., `ADVRESPONSE_TO_mGarC`, `ASSOCIATES_DaG`, etc.
@@ -163,14 +163,78 @@ few_shot = """<Example Question 1>Question 1: What are the known targets of the
                                             }</Example Answer 2>
 """
 
-base_prompt = f"""
+layout_few_shot = """<Example Question 1>Question 1: Which genes are most strongly associated with the development of Type 2 Diabetes, and what pathways do they influence?</Example Question 1>
+              <Example Answer 1>AQL Statement 1: FOR disease IN Disease
+                                    FILTER CONTAINS(LOWER(disease.properties.name), 'type 2')
+                                    AND CONTAINS(LOWER(disease.properties.name), 'diabetes')
+                                    FOR gene IN 1..1 OUTBOUND disease ASSOCIATES_DaG
+                                        FOR pathway IN 1..1 OUTBOUND gene PARTICIPATES_GpPW
+                                            RETURN {
+                                                gene: {identifier: gene.properties.identifier, name: gene.properties.name},
+                                                pathway: {identifier: pathway.properties.identifier, name: pathway.properties.name}
+                                            }</Example Answer 1>
+"""
+
+def build_graph_info(edge_definitions=None, graph_name="spoke"):
+    """Describe the graph for the prompt.
+
+    Without ``edge_definitions`` this is ``graph_info`` for the single
+    Nodes/Edges layout. Given the edge definitions of the per-label layout
+    (``[{'collection', 'from', 'to'}]``), it describes the vertex and edge
+    collections of the ``graph_name`` named graph instead.
+    """
+    if not edge_definitions:
+        return graph_info
+    vertex_collections = sorted({name for d in edge_definitions for name in d['from'] + d['to']})
+    return f"""
+                ### Contextual Intro
+                ArangoDB graph DB represents a biomedical entity network, structured with nodes & edges, each carrying biomedical data types. Nodes = entities like proteins, drugs, diseases, genes. Edges = relationships/interactions. Aim: facilitate complex queries for insights into drug discovery, disease understanding, bio research.
+
+                ### Vertex Collections
+                - One collection per node type: {', '.join(vertex_collections)}.
+                - Elements: `_key`, `_id`, `_rev`, `labels`, `properties` (e.g. `identifier`, `name`, `description`).
+
+                ### Edge Collections
+                - One edge collection per relationship label, named after the label, e.g. `ASSOCIATES_DaG`.
+                - Elements: `_key`, `_id`, `_rev`, `_from`, `_to`, `label`, `properties`.
+                - All collections form the named graph `{graph_name}`.
+
+                ### Aim
+                Traverse with `FOR v, e IN 1..n OUTBOUND|INBOUND start EdgeCollection` over the edge collection of the relationship you need instead of filtering edges by label.
+
+            """
+
+def build_available_edge_labels(edge_definitions=None):
+    """List the edge labels for the prompt, with endpoint types in the per-label layout."""
+    if not edge_definitions:
+        return available_edge_labels
+    return "\n".join(
+        f"{d['collection']}: {', '.join(d['from'])} -> {', '.join(d['to'])}" for d in edge_definitions
+    )
+
+def format_prompt(graph_description, edge_labels, examples, node_types=None):
+    """Lay out the prompt sections; ``node_types`` adds a section listing the relevant node types."""
+    node_type_section = ""
+    if node_types:
+        node_type_section = f"""
+    <Relevant Node Types>{node_types}</Relevant Node Types>
+"""
+    return f"""
     <System Instructions>Answer the above question using the following data model and AQL query template.</System Instructions>
     
-    <Graph Description>{graph_info}</Graph Description>
-
+    <Graph Description>{graph_description}</Graph Description>
+{node_type_section}
     <Edge Label Description>This is a list of the available edge labels in the graph. You can use these to filter edges in your AQL query.</Edge Label Description>
-    <Available Edge Labels>{available_edge_labels}</Available Edge Labels>
+    <Available Edge Labels>{edge_labels}</Available Edge Labels>
     
     <Example Few-Shot Description>These questions and AQL queries demonstrate how to construct working AQL queries based on natural language questions using the provided node, edge, and edge label information. To adapt this query for different scenarios, modify the entity types, filter conditions, and return statements based on your specific data and question.</Example Few-Shot Description>
-    <Example Few-Shot>{few_shot}</Example Few-Shot>
+    <Example Few-Shot>{examples}</Example Few-Shot>
 """
+
+def build_base_prompt(edge_definitions=None, graph_name="spoke"):
+    """Assemble the prompt appended to every question for the given layout (see ``build_graph_info``)."""
+    examples = layout_few_shot if edge_definitions else few_shot
+    return format_prompt(build_graph_info(edge_definitions, graph_name), build_available_edge_labels(edge_definitions),
+                         examples)
+
+base_prompt = build_base_prompt()
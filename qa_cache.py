@@ -0,0 +1,239 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from tracing import span
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 24 * 60 * 60  # Seconds
+REVISION_CHECK_INTERVAL = 30  # Seconds between database revision checks
+QUESTION_LEVEL, RESULT_LEVEL = 'question', 'result'
+
+def normalize_question(question):
+    """Lower-case ``question``, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r'\s+', ' ', question).strip().rstrip('?.! ').lower()
+
+def database_revision(db):
+    """Fingerprint the user collections of a python-arango database by revision and count."""
+    parts = []
+    for info in sorted(db.collections(), key=lambda info: info['name']):
+        if info.get('system'):
+            continue
+        collection = db.collection(info['name'])
+        parts.append(f"{info['name']}:{collection.revision()}:{collection.count()}")
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=8).hexdigest()
+
+class LRUCache:
+    """Thread-safe LRU map whose entries expire ``ttl`` seconds after being stored.
+
+    Every entry records the database revision it was computed against and
+    is dropped when read under a different one.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'stale': 0}
+
+    def expired(self, stored_at):
+        return self.ttl is not None and self.clock() - stored_at > self.ttl
+
+    def get(self, key, revision=None):
+        """Return the value stored for ``key`` under ``revision``, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, stored_at, entry_revision = entry
+                expired = self.expired(stored_at)
+                if expired or entry_revision != revision:
+                    del self.entries[key]
+                    self.stats['expired' if expired else 'stale'] += 1
+                else:
+                    self.entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, value, revision=None, stored_at=None):
+        with self.lock:
+            self.entries[key] = (value, self.clock() if stored_at is None else stored_at, revision)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+class DiskStore:
+    """SQLite table of JSON values that lets cache entries survive restarts."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (level TEXT, key TEXT, value TEXT, stored_at REAL, "
+                "revision TEXT, PRIMARY KEY (level, key))")
+
+    def get(self, level, key):
+        """Return ``(value, stored_at, revision)`` for ``key`` in ``level``, or None."""
+        with self.lock:
+            row = self.connection.execute("SELECT value, stored_at, revision FROM cache WHERE level = ? AND key = ?",
+                                          (level, key)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def put(self, level, key, value, stored_at, revision):
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                                    (level, key, json.dumps(value), stored_at, revision))
+
+    def delete(self, level, key):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM cache WHERE level = ? AND key = ?", (level, key))
+
+    def clear(self):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM cache")
+
+    def close(self):
+        self.connection.close()
+
+class QACache:
+    """Two-level cache: normalized question -> successful AQL, and AQL -> result.
+
+    The question level also keeps the interpretation of the result. Both
+    levels are LRU with a TTL, optionally backed by a ``DiskStore`` at
+    ``path``. ``revision`` is a function returning the current database
+    revision (e.g. ``lambda: database_revision(db)``); it is checked at
+    most every ``revision_interval`` seconds and entries stored under an
+    older revision are treated as misses.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, revision=None,
+                 revision_interval=REVISION_CHECK_INTERVAL, clock=time.time):
+        self.levels = {level: LRUCache(max_entries, ttl, clock) for level in (QUESTION_LEVEL, RESULT_LEVEL)}
+        self.store = DiskStore(path) if path else None
+        self.revision = revision
+        self.revision_interval = revision_interval
+        self.clock = clock
+        self.disk_hits = {level: 0 for level in self.levels}
+        self._revision = None
+        self._revision_checked = None
+
+    def current_revision(self):
+        if self.revision is None:
+            return None
+        now = self.clock()
+        if self._revision_checked is None or now - self._revision_checked >= self.revision_interval:
+            self._revision = self.revision()
+            self._revision_checked = now
+        return self._revision
+
+    def get(self, level, key):
+        revision = self.current_revision()
+        cache = self.levels[level]
+        value = cache.get(key, revision)
+        if value is None and self.store is not None:
+            entry = self.store.get(level, key)
+            if entry is not None:
+                value, stored_at, entry_revision = entry
+                if cache.expired(stored_at) or entry_revision != revision:
+                    self.store.delete(level, key)
+                    value = None
+                else:
+                    cache.put(key, value, revision, stored_at)
+                    self.disk_hits[level] += 1
+        return value
+
+    def put(self, level, key, value):
+        revision = self.current_revision()
+        stored_at = self.clock()
+        self.levels[level].put(key, value, revision, stored_at)
+        if self.store is not None:
+            self.store.put(level, key, value, stored_at, revision)
+
+    def get_aql(self, question):
+        """Return ``{'aql_query', 'scientific_story'}`` last answering ``question``, or None."""
+        return self.get(QUESTION_LEVEL, normalize_question(question))
+
+    def put_aql(self, question, aql_query, scientific_story=None):
+        self.put(QUESTION_LEVEL, normalize_question(question),
+                 {'aql_query': aql_query, 'scientific_story': scientific_story})
+
+    def get_result(self, aql_query):
+        return self.get(RESULT_LEVEL, aql_query.strip())
+
+    def put_result(self, aql_query, aql_result):
+        self.put(RESULT_LEVEL, aql_query.strip(), aql_result)
+
+    def clear(self):
+        for cache in self.levels.values():
+            cache.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        """Return the hit/miss/eviction counters and size of each level.
+
+        ``misses`` counts memory misses; ``disk_hits`` those served from disk.
+        """
+        return {level: dict(cache.stats, disk_hits=self.disk_hits[level], size=len(cache))
+                for level, cache in self.levels.items()}
+
+def cache_answer(cache, user_question, attempt_count, aql_query, aql_result, scientific_story):
+    """Store a non-empty answer in both levels of ``cache``."""
+    if aql_result:
+        cache.put_result(aql_query, aql_result)
+        cache.put_aql(user_question, aql_query, scientific_story)
+
+def cached_attempts(cache, user_question, attempts, run_aql=None, trace=None):
+    """Yield ``(attempt, response)`` events for ``user_question``, from ``cache`` when possible.
+
+    A cached question whose AQL result is also cached gives one event with
+    the cached ``scientific_story``. If only the AQL is cached,
+    ``run_aql(aql_query)`` re-executes it, skipping AQL generation; if the
+    guardrails reject it or ArangoDB fails to run it (e.g. after a plan
+    change), that is treated as a miss. Otherwise the events of
+    ``attempts()`` are passed through. The lookup
+    is recorded as a ``cache_lookup`` span of ``trace`` whose ``hit`` is
+    ``answer``, ``aql`` or None.
+    """
+    with span(trace, 'cache_lookup', hit=None) as lookup_span:
+        entry = cache.get_aql(user_question)
+        aql_result = None
+        if entry is not None:
+            aql_query = entry['aql_query']
+            aql_result = cache.get_result(aql_query)
+            full_hit = aql_result and entry['scientific_story'] is not None
+            lookup_span['hit'] = 'answer' if full_hit else 'aql'
+    if entry is not None:
+        if full_hit:
+            yield 0, {'aql_query': aql_query, 'aql_result': aql_result, 'scientific_story': entry['scientific_story']}
+            return
+        if aql_result is None and run_aql is not None:
+            yield 0, None
+            with span(trace, 'aql_execution', cached_aql=True) as execution_span:
+                try:
+                    aql_result = run_aql(aql_query)
+                    execution_span['rows'] = len(aql_result)
+                except Exception as e:  # QueryRejected or an ArangoDB error such as AQLQueryExecuteError
+                    execution_span['error'] = type(e).__name__
+                    print(f"Cached AQL failed, generating a new query: {getattr(e, 'error_message', None) or e}")
+        if aql_result:
+            yield 0, {'aql_query': aql_query, 'aql_result': aql_result}
+            return
+    yield from attempts()
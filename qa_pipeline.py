@@ -0,0 +1,332 @@
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List
+from aql_guard import QueryRejected, check_query
+from result_compaction import DEFAULT_TOKEN_BUDGET, compact_result, count_tokens
+from tracing import span
+
+FAILURE_MESSAGE = ("The prior AQL query failed to return results. "
+                   "Please think this through step by step and refine your AQL statement. "
+                   "The original question is as follows:")
+PREVIEW_ROWS = 3  # Result rows shown while the interpretation streams
+PREVIEW_CHARS = 1500
+# Prompt prefixes cycled across speculative candidates so they explore different AQL
+CANDIDATE_HINTS = [
+    "",
+    "Think step by step about which edge labels connect the entities before writing the AQL. ",
+    "Match entity names case-insensitively and prefer the simplest traversal that answers the question. ",
+]
+
+def execute_aql(query: str, qa_chain) -> Dict[str, Any]:
+    """Run ``qa_chain`` and return the ``aql_query`` and ``aql_result`` it generated.
+
+    The chain must be built with ``return_aql_query=True`` and
+    ``return_aql_result=True``; its structured outputs are used as is. A
+    query refused by the guardrails (see ``aql_guard``) gives an empty
+    result and its ``rejection`` reason.
+    """
+    try:
+        response = qa_chain.invoke({qa_chain.input_key: query})
+    except QueryRejected as e:
+        return {'aql_query': e.query, 'aql_result': [], 'rejection': e.reason}
+    return {'aql_query': response.get('aql_query', ''), 'aql_result': response.get('aql_result') or []}
+
+def execute_attempt(query: str, qa_chain, attempt, trace=None) -> Dict[str, Any]:
+    """``execute_aql`` recorded as an ``attempt`` span of ``trace``.
+
+    The attempt's time outside its ``aql_explain``/``aql_execution`` child
+    spans is also recorded as ``aql_generation``.
+    """
+    with span(trace, 'attempt', attempt=attempt) as attempt_span:
+        response = execute_aql(query, qa_chain)
+        attempt_span.update(rows=len(response['aql_result']), rejected='rejection' in response)
+        if trace is not None:
+            attempt_span['prompt_tokens'] = count_tokens(query)
+    if trace is not None:
+        trace.record('aql_generation', attempt_span['seconds'] - attempt_span.get('child_seconds', 0), attempt=attempt)
+    return response
+
+def retry_prompt(query: str, response: Dict[str, Any]) -> str:
+    """Prepend the failure message, and any guardrail rejection reason, to ``query``."""
+    if response.get('rejection'):
+        return f"The prior AQL query was rejected: {response['rejection']}. {FAILURE_MESSAGE} {query}"
+    return f"{FAILURE_MESSAGE} {query}"
+
+def run_aql(db, aql_query: str, limits=None) -> List[Any]:
+    """Execute ``aql_query`` on a python-arango database and return its result.
+
+    With ``limits`` (an ``aql_guard.QueryLimits``) the query is checked and
+    bounded first, raising ``QueryRejected`` if refused.
+    """
+    options = {}
+    if limits is not None:
+        aql_query, options = check_query(db, aql_query, limits)
+    return list(db.aql.execute(aql_query, **options))
+
+def interpretation_prompt(aql_result: List[Dict[str, Any]], user_question=None,
+                          token_budget=DEFAULT_TOKEN_BUDGET, trace=None) -> str:
+    """Build the prompt asking for a scientific interpretation of ``aql_result``.
+
+    Results over ``token_budget`` tokens are compacted first (see
+    ``result_compaction``), as a ``compaction`` span of ``trace``;
+    ``token_budget=None`` sends them as is.
+    """
+    if token_budget is not None:
+        with span(trace, 'compaction', rows=len(aql_result)) as compaction_span:
+            aql_result, report = compact_result(aql_result, token_budget)
+            compaction_span.update(original_tokens=report['original_tokens'],
+                                   compacted_tokens=report['compacted_tokens'])
+        if report['saved_tokens']:
+            print(f"Compacted AQL result from {report['original_tokens']} to {report['compacted_tokens']} tokens")
+    prompt = (
+        f'''Based on the following AQL results, provide a detailed and comprehensive scientific interpretation answering the question: "{user_question}" based on the following template.
+
+        Introduction:
+            Context: Start with the broader context of your research.
+                Example: "In the study of hereditary breast cancer, the BRCA1 gene plays a crucial role."
+        Entity Description:
+            Gene Description:
+                ID: Reference the unique identifier.
+                Label: Use the human-readable name.
+                Example: "The gene BRCA1 (ID: genes/12345) is known for its involvement in DNA repair mechanisms."
+        Relationships:
+            Associations:
+                Describe the relationships and use both IDs and labels.
+                Example: "BRCA1 (ID: genes/12345) has been found to be associated with several diseases. Notably, it shows a strong association with breast cancer (ID: diseases/67890). This association (type: 'gene-disease') is crucial for understanding the genetic basis of the disease."
+        Detailed Explanation:
+            Exploring the Data:
+                Dive deeper into the data and explain the significance.
+                Example: "The association between BRCA1 and breast cancer (ID: diseases/67890) highlights the gene's role in tumor suppression. Mutations in BRCA1 can lead to a loss of function, contributing to the development of cancer."
+        Conclusion:
+            Summary and Implications:
+                Summarize the key points and discuss the implications.
+                Example: "Understanding the relationship between BRCA1 (ID: genes/12345) and breast cancer (ID: diseases/67890) is vital for developing targeted therapies. The genetic insights provided by this association can guide personalized treatment approaches.
+
+        AQL Results: {aql_result}'''
+    )
+    return prompt
+
+def interpret_aql_result(aql_result: List[Dict[str, Any]], llm, user_question=None,
+                         token_budget=DEFAULT_TOKEN_BUDGET, trace=None) -> str:
+    """Ask ``llm`` for a scientific interpretation of ``aql_result`` (see ``interpretation_prompt``)."""
+    prompt = interpretation_prompt(aql_result, user_question, token_budget, trace)
+    with span(trace, 'interpretation') as interpretation_span:
+        response = llm.invoke(prompt)
+        if trace is not None:
+            interpretation_span.update(prompt_tokens=count_tokens(prompt), story_tokens=count_tokens(response.content))
+    return response.content
+
+def stream_interpretation(aql_result: List[Dict[str, Any]], llm, user_question=None,
+                          token_budget=DEFAULT_TOKEN_BUDGET, trace=None):
+    """Yield the interpretation of ``aql_result`` in pieces as ``llm.stream`` produces them.
+
+    The whole stream is recorded as an ``interpretation`` span of ``trace``,
+    with the time to its first piece.
+    """
+    prompt = interpretation_prompt(aql_result, user_question, token_budget, trace)
+    start = time.perf_counter()
+    first_chunk_seconds = None
+    story = ''
+    for chunk in llm.stream(prompt):
+        if first_chunk_seconds is None:
+            first_chunk_seconds = time.perf_counter() - start
+        story += chunk.content
+        yield chunk.content
+    if trace is not None:
+        trace.record('interpretation', time.perf_counter() - start, first_chunk_seconds=first_chunk_seconds,
+                     prompt_tokens=count_tokens(prompt), story_tokens=count_tokens(story))
+
+def sequential_chain(query: str, qa_chain, llm, user_question=None, verbose=False) -> Dict[str, Any]:
+    """Generate and run AQL for ``query``, then interpret any result with ``llm``.
+
+    Returns a dict with ``aql_query``, ``aql_result`` and, when the result
+    is non-empty, ``scientific_story``. ``verbose`` prints the AQL and its
+    result for debugging.
+    """
+    response = execute_aql(query, qa_chain)
+    if verbose:
+        print(f"AQL Query:\n{response['aql_query']}\nAQL Result:\n{response['aql_result']}")
+
+    if response['aql_result']:
+        response['scientific_story'] = interpret_aql_result(response['aql_result'], llm, user_question)
+    return response
+
+def iter_attempts(query: str, qa_chain, max_attempts=3, verbose=False, time_budget=None, trace=None):
+    """Yield ``(attempt, None)`` as each AQL attempt starts and ``(attempt, response)`` when it ends.
+
+    Failed attempts are retried with ``retry_prompt`` until one returns a
+    non-empty ``aql_result`` or ``max_attempts`` run out. With
+    ``time_budget`` (seconds) no new attempt starts once it is spent. Each
+    attempt is recorded as a span of ``trace`` (see ``execute_attempt``).
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    for attempt in range(1, max_attempts + 1):
+        if attempt > 1 and deadline is not None and time.monotonic() >= deadline:
+            print(f"Time budget of {time_budget}s spent after {attempt - 1} tries.")
+            return
+        print(f"Attempt {attempt}: Executing query...")
+        yield attempt, None
+        response = execute_attempt(query, qa_chain, attempt, trace)
+        if verbose:
+            print(f"AQL Query:\n{response['aql_query']}\nAQL Result:\n{response['aql_result']}")
+        yield attempt, response
+
+        if response['aql_result']:
+            print(f"\nAttempt {attempt} - AQL Result:\n{response['aql_result']}")
+            return
+        print(f"\nAttempt {attempt} - AQL Result: No result found.")
+        query = retry_prompt(query, response)
+    print("No result found after", max_attempts, "tries.")
+
+def execute_query_with_retries(query: str, qa_chain, llm, max_attempts=3, user_question=None, verbose=False,
+                               time_budget=None, interpret=True, trace=None):
+    """Run ``iter_attempts`` to the end and interpret the result, if any.
+
+    Returns ``[attempt_count, aql_query, aql_result, scientific_story]``;
+    the story is None without a result or with ``interpret=False``. Every
+    stage is recorded as a span of ``trace`` (a ``tracing.Trace``), if given.
+    """
+    attempt_count, response = 0, {'aql_query': '', 'aql_result': []}
+    for attempt_count, event in iter_attempts(query, qa_chain, max_attempts, verbose, time_budget, trace):
+        if event is not None:
+            response = event
+
+    scientific_story = None
+    if response['aql_result'] and interpret:
+        scientific_story = interpret_aql_result(response['aql_result'], llm, user_question, trace=trace)
+        print(f"LLM Interpretation:\n{scientific_story}")
+    return [attempt_count, response['aql_query'], response['aql_result'], scientific_story]
+
+def speculative_query(query: str, qa_chains, llm, max_attempts=10, user_question=None, verbose=False,
+                      time_budget=None, interpret=True, trace=None, executors=None):
+    """Run candidate AQL generations concurrently and keep the first with a result.
+
+    Each round starts one candidate per chain in ``qa_chains`` (e.g. chains
+    whose LLMs use different temperatures), cycling ``CANDIDATE_HINTS`` into
+    the prompt. The first non-empty ``aql_result`` wins: queued candidates
+    are cancelled and running ones are left to finish in the background.
+    If a round finds nothing, the next one prepends ``FAILURE_MESSAGE``
+    (with a guardrail rejection reason, if any),
+    until ``max_attempts`` candidates have run or ``time_budget`` seconds
+    have passed. Only the winning result is interpreted, unless
+    ``interpret=False``. Candidates that raise (e.g. an LLM rate-limit
+    error) are logged; if none in a round returned a response, the first
+    error is raised, as on the sequential path.
+
+    Each chain runs on its own single-thread executor, so a chain is never
+    called twice at once. ``executors`` (one per chain) are reused and left
+    running, e.g. for a set of chains kept per worker; by default they are
+    created for the call and shut down at the end.
+
+    Returns ``[attempt_count, aql_query, aql_result, scientific_story]`` and
+    records spans of ``trace`` like ``execute_query_with_retries``.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    own_executors = executors is None
+    if own_executors:
+        executors = [ThreadPoolExecutor(max_workers=1) for _ in qa_chains]
+    attempts = 0
+    winner = {'aql_query': '', 'aql_result': []}
+    try:
+        while attempts < max_attempts and not winner['aql_result']:
+            rejected = None
+            errors = []
+            responded = False
+            round_size = min(len(qa_chains), max_attempts - attempts)
+            pending = {
+                executors[i].submit(execute_attempt, CANDIDATE_HINTS[i % len(CANDIDATE_HINTS)] + query,
+                                    qa_chains[i], attempts + i + 1, trace)
+                for i in range(round_size)
+            }
+            attempts += round_size
+            print(f"Attempts {attempts - round_size + 1}-{attempts}: Executing {round_size} candidate queries...")
+
+            while pending and not winner['aql_result']:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    break  # Time budget spent
+                for future in done:
+                    if future.exception() is not None:
+                        print(f"Candidate query failed: {type(future.exception()).__name__}: {future.exception()}")
+                        errors.append(future.exception())
+                    else:
+                        responded = True
+                        response = future.result()
+                        if verbose:
+                            print(f"AQL Query:\n{response['aql_query']}\nAQL Result:\n{response['aql_result']}")
+                        if response.get('rejection') and rejected is None:
+                            rejected = response
+                        if response['aql_result'] and not winner['aql_result']:
+                            winner = response
+                        elif not winner['aql_query']:
+                            winner = response
+            for future in pending:
+                future.cancel()
+            if errors and not responded:
+                raise errors[0]
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            query = retry_prompt(query, rejected or winner)
+    finally:
+        if own_executors:
+            for executor in executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    scientific_story = None
+    if winner['aql_result']:
+        print(f"\nAQL Result:\n{winner['aql_result']}")
+        if interpret:
+            scientific_story = interpret_aql_result(winner['aql_result'], llm, user_question, trace=trace)
+            print(f"LLM Interpretation:\n{scientific_story}")
+    else:
+        print("No result found after", attempts, "candidate queries.")
+    return [attempts, winner['aql_query'], winner['aql_result'], scientific_story]
+
+def format_answer(attempt_count, aql_query, scientific_story, aql_result=None, status=None):
+    """Render an answer, or a partial one while it streams, as Markdown."""
+    parts = [f'*{status}*'] if status else []
+    parts.append(f'Attempt Count: {attempt_count}\n\nAQL Info: {aql_query}')
+    if aql_result:
+        preview = json.dumps(aql_result[:PREVIEW_ROWS], indent=1, default=str)
+        if len(preview) > PREVIEW_CHARS:
+            preview = preview[:PREVIEW_CHARS] + '\n...'
+        parts.append(f'Result Preview ({len(aql_result)} rows):\n```json\n{preview}\n```')
+    parts.append(f'LLM Interpretation:\n{scientific_story}')
+    return '\n\n'.join(parts)
+
+def stream_answer(user_question, attempts, llm, token_budget=DEFAULT_TOKEN_BUDGET, on_complete=None, trace=None):
+    """Yield Markdown snapshots of an answer while it is produced.
+
+    ``attempts`` yields ``(attempt, response)`` events like ``iter_attempts``.
+    A status line is shown while attempts run, then the AQL and a preview
+    of its result, then the interpretation as ``llm.stream`` produces it.
+    A response that already holds a ``scientific_story`` is shown as is.
+    ``on_complete(attempt_count, aql_query, aql_result, scientific_story)``
+    is called with the finished answer. The interpretation and the whole
+    answer (``question``) are recorded as spans of ``trace``.
+    """
+    start = time.perf_counter()
+    attempt_count, response = 0, {'aql_query': '', 'aql_result': []}
+    for attempt_count, event in attempts:
+        if event is None:
+            yield format_answer(attempt_count, response['aql_query'], None, response['aql_result'],
+                                f'Generating and executing AQL (attempt {attempt_count})...')
+        else:
+            response = event
+
+    aql_query, aql_result = response['aql_query'], response['aql_result']
+    scientific_story = response.get('scientific_story')
+    if aql_result and scientific_story is None:
+        scientific_story = ''
+        yield format_answer(attempt_count, aql_query, scientific_story, aql_result, 'Interpreting results...')
+        for chunk in stream_interpretation(aql_result, llm, user_question, token_budget, trace):
+            scientific_story += chunk
+            yield format_answer(attempt_count, aql_query, scientific_story, aql_result, 'Interpreting results...')
+    yield format_answer(attempt_count, aql_query, scientific_story, aql_result)
+    if trace is not None:
+        trace.record('question', time.perf_counter() - start, attempts=attempt_count, rows=len(aql_result),
+                     generated=attempt_count > 0)
+    if on_complete is not None:
+        on_complete(attempt_count, aql_query, aql_result, scientific_story)
@@ -0,0 +1,211 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from arango import ArangoClient
+from arango.http import DefaultHTTPClient
+from langchain_community.graphs import ArangoGraph  # Updated import
+from langchain_openai import ChatOpenAI
+from langchain.chains import ArangoGraphQAChain
+from api_key import openai_api_key
+from prompts_openai import base_prompt, build_base_prompt
+from prompt_retrieval import build_prompt_index
+from aql_guard import QueryLimits, guard_graph
+from entity_index import EntityIndex, SearchViewResolver, entity_prompt
+from qa_cache import QACache, cache_answer, cached_attempts, database_revision
+from qa_pipeline import iter_attempts, run_aql, speculative_query, stream_answer
+from schema_cache import cached_schema
+from serving import ClientPool, Lazy, health
+from spoke_graph import SpokeGraph, answer_template
+from tracing import span
+
+# Set OpenAI API key
+os.environ["OPENAI_API_KEY"] = openai_api_key
+
+# The inferred graph schema is kept in SCHEMA_CACHE_PATH and reused until a
+# collection changes, instead of sampling every collection on each start
+SCHEMA_CACHE_PATH = os.environ.get('SCHEMA_CACHE_PATH', 'graph_schema.json')
+
+# EXPLAIN generated AQL before running it: reject expensive plans, add a
+# result LIMIT and cap server-side runtime and memory
+QUERY_LIMITS = QueryLimits()
+
+# Send only the edge labels, node types and few-shot examples relevant to the
+# question (DYNAMIC_PROMPT=0 sends the full base_prompt). Verified examples are
+# kept in FEW_SHOT_PATH.
+DYNAMIC_PROMPT = os.environ.get('DYNAMIC_PROMPT', '1') == '1'
+
+# Optional in-process graph (saved with SpokeGraph.save) that answers
+# template-matched 1-2 hop questions without AQL generation
+SPOKE_GRAPH_PATH = os.environ.get('SPOKE_GRAPH_PATH')
+
+# Entities named in the question are resolved to node _ids, which are added
+# to the prompt: from the EntityIndex saved in ENTITY_INDEX_PATH (see
+# arangodb_loader.main), or with ENTITY_SEARCH_VIEW=1 from the ArangoSearch
+# view made by arangodb_loader.main or index_main with search_view=True
+ENTITY_INDEX_PATH = os.environ.get('ENTITY_INDEX_PATH')
+ENTITY_SEARCH_VIEW = os.environ.get('ENTITY_SEARCH_VIEW', '') == '1'
+
+# Print generated AQL and results for debugging
+VERBOSE = os.environ.get('SPOKE_LLM_VERBOSE', '') == '1'
+
+# Concurrent candidate generation: SPECULATIVE_CANDIDATES > 1 runs that many
+# chains per round at increasing temperatures and keeps the first result.
+# Each worker leases its own set of candidate chains and threads, so at most
+# workers x SPECULATIVE_CANDIDATES candidate threads exist.
+# QUERY_TIME_BUDGET caps the wall-clock seconds spent retrying a question.
+SPECULATIVE_CANDIDATES = int(os.environ.get('SPECULATIVE_CANDIDATES', '1'))
+QUERY_TIME_BUDGET = float(os.environ.get('QUERY_TIME_BUDGET', '120'))
+
+# Cache of question -> AQL and AQL -> result, invalidated when the database
+# changes; QA_CACHE_PATH keeps it in an SQLite file across restarts
+QA_CACHE_PATH = os.environ.get('QA_CACHE_PATH')
+
+class CachedArangoGraph(ArangoGraph):
+    """ArangoGraph whose schema is read from SCHEMA_CACHE_PATH while the database is unchanged."""
+
+    def generate_schema(self, sample_ratio=0):
+        generate = lambda: super(CachedArangoGraph, self).generate_schema(sample_ratio)
+        return cached_schema(self.db, generate, SCHEMA_CACHE_PATH)
+
+class QAService:
+    """The question-answering pipeline behind ``ask()``, shared by the Gradio app and the batch runner.
+
+    Clients are created on first use (or by ``status(warm=True)``), so a
+    caller starts without waiting for ArangoDB and a failed connection is
+    retried on the next question. Up to ``workers`` questions can be
+    answered at once, each with its own QA chain or set of speculative
+    candidate chains; every stage is recorded
+    with ``tracer`` (a ``tracing.Tracer``) if given.
+    """
+
+    def __init__(self, workers, tracer=None):
+        self.workers = workers
+        self.tracer = tracer
+        self.llm = Lazy(lambda: ChatOpenAI(temperature=0, model='gpt-4o'))
+        self.backend = Lazy(self.connect)
+        self.spoke_graph = Lazy(lambda: SpokeGraph.load(SPOKE_GRAPH_PATH) if SPOKE_GRAPH_PATH else None)
+        self.entity_index = Lazy(lambda: EntityIndex.load(ENTITY_INDEX_PATH) if ENTITY_INDEX_PATH else None)
+        self.resources = {'llm': self.llm, 'arangodb': self.backend, 'spoke_graph': self.spoke_graph,
+                          'entity_index': self.entity_index}
+        self.qa_cache = QACache(QA_CACHE_PATH, revision=lambda: database_revision(self.backend.get().db))
+
+    def connect(self):
+        """Connect to ArangoDB and build the graph, prompts and QA chains that use it."""
+        # Initialize the ArangoDB client, with an HTTP connection per worker, and connect to the database
+        client = ArangoClient(hosts='http://127.0.0.1:8529', http_client=DefaultHTTPClient(pool_maxsize=self.workers))
+        db = client.db('spoke23_human', username='root', password='ph')
+
+        # Fetch the existing graph from the database
+        graph = CachedArangoGraph(db)
+        guard_graph(graph, db, QUERY_LIMITS, self.tracer)
+
+        # Databases loaded with the per-label layout register a named graph;
+        # describe its collections in the prompt instead of Nodes/Edges
+        edge_definitions = None
+        prompt = base_prompt
+        if db.has_graph('spoke'):
+            edge_definitions = [
+                {'collection': d['edge_collection'], 'from': d['from_vertex_collections'],
+                 'to': d['to_vertex_collections']}
+                for d in db.graph('spoke').edge_definitions()
+            ]
+            prompt = build_base_prompt(edge_definitions)
+
+        # Instantiate ArangoGraphQAChain, one per worker, or with speculative
+        # candidates a set of chains per worker, each run on its own thread
+        def make_qa_chain(llm):
+            return ArangoGraphQAChain.from_llm(llm, graph=graph, verbose=VERBOSE, return_aql_query=True,
+                                               return_aql_result=True)
+
+        def make_candidates():
+            return SimpleNamespace(
+                chains=[make_qa_chain(ChatOpenAI(temperature=0.3 * i, model='gpt-4o'))
+                        for i in range(SPECULATIVE_CANDIDATES)],
+                executors=[ThreadPoolExecutor(max_workers=1, thread_name_prefix='candidate')
+                           for _ in range(SPECULATIVE_CANDIDATES)],
+            )
+
+        return SimpleNamespace(
+            db=db,
+            base_prompt=prompt,
+            prompt_index=build_prompt_index(edge_definitions, examples_path=os.environ.get('FEW_SHOT_PATH')),
+            qa_chain_pool=ClientPool(lambda: make_qa_chain(self.llm.get()), self.workers),
+            candidate_pool=ClientPool(make_candidates, self.workers) if SPECULATIVE_CANDIDATES > 1 else None,
+        )
+
+    def resolve_entities(self, text, trace=None):
+        """Return the entities named in ``text`` and their candidate nodes (see ``EntityIndex.resolve``)."""
+        resolver = self.entity_index.get()
+        if resolver is None and ENTITY_SEARCH_VIEW:
+            resolver = SearchViewResolver(self.backend.get().db)
+        if resolver is None:
+            return []
+        with span(trace, 'entity_resolution') as resolution_span:
+            resolved = resolver.resolve(text)
+            resolution_span['mentions'] = len(resolved)
+        return resolved
+
+    def prompt(self, text, trace=None):
+        """Return ``text`` followed by its resolved entities and the schema prompt, as sent to the QA chain."""
+        services = self.backend.get()
+        schema_prompt = services.prompt_index.prompt(text) if DYNAMIC_PROMPT else services.base_prompt
+        return text + entity_prompt(self.resolve_entities(text, trace)) + schema_prompt
+
+    def attempts(self, question, text, trace):
+        services = self.backend.get()
+        if SPECULATIVE_CANDIDATES > 1:
+            yield 1, None
+            with services.candidate_pool.lease() as candidates:
+                attempt_count, aql_query, aql_result, _ = speculative_query(
+                    question, candidates.chains, self.llm.get(), 10, text, VERBOSE, QUERY_TIME_BUDGET,
+                    interpret=False, trace=trace, executors=candidates.executors)
+            yield attempt_count, {'aql_query': aql_query, 'aql_result': aql_result}
+        else:
+            with services.qa_chain_pool.lease() as qa_chain:
+                yield from iter_attempts(question, qa_chain, 10, VERBOSE, QUERY_TIME_BUDGET, trace)
+
+    def answer_stream(self, text, on_complete=None, trace=None):
+        """Yield Markdown snapshots of the answer to ``text`` (see ``qa_pipeline.stream_answer``).
+
+        ``on_complete(attempt_count, aql_query, aql_result, scientific_story)``
+        is called with the finished answer, after it is cached.
+        """
+        if trace is None and self.tracer is not None:
+            trace = self.tracer.trace()
+
+        def complete(*answer):
+            cache_answer(self.qa_cache, text, *answer)
+            if on_complete is not None:
+                on_complete(*answer)
+
+        if self.spoke_graph.get() is not None:
+            fast_answer = answer_template(self.spoke_graph.get(), text)
+            if fast_answer:
+                aql_info = f"answered by in-process graph template \"{fast_answer['template']}\""
+                yield from stream_answer(text, [(0, {'aql_query': aql_info, 'aql_result': fast_answer['result']})],
+                                         self.llm.get(), on_complete=on_complete, trace=trace)
+                return
+        services = self.backend.get()
+        events = cached_attempts(self.qa_cache, text, lambda: self.attempts(self.prompt(text, trace), text, trace),
+                                 lambda aql_query: run_aql(services.db, aql_query, QUERY_LIMITS), trace)
+        yield from stream_answer(text, events, self.llm.get(), on_complete=complete, trace=trace)
+
+    def answer(self, text):
+        """Answer ``text`` and return its ``attempts``, ``aql_query``, ``aql_result`` and ``scientific_story``.
+
+        With a tracer, ``timings`` holds the seconds spent in each stage.
+        """
+        trace = self.tracer.trace() if self.tracer is not None else None
+        answers = []
+        for _ in self.answer_stream(text, lambda *answer: answers.append(answer), trace):
+            pass
+        attempt_count, aql_query, aql_result, scientific_story = answers[0]
+        response = {'attempts': attempt_count, 'aql_query': aql_query, 'aql_result': aql_result,
+                    'scientific_story': scientific_story}
+        if trace is not None:
+            response['timings'] = trace.timings()
+        return response
+
+    def status(self, warm=False):
+        """Return the status of each client, creating them first if ``warm``."""
+        return health(self.resources, warm)
@@ -0,0 +1,138 @@
+import json
+from collections import Counter
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_TOKEN_BUDGET = 2000
+CHARS_PER_TOKEN = 4  # Rough estimate used when tiktoken is not installed
+ENTITY_FIELDS = ('name', 'identifier')
+
+_encoding = None
+
+def count_tokens(text):
+    """Count the tokens of ``text`` with tiktoken if installed, else estimate from its length."""
+    global _encoding
+    if tiktoken is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding('cl100k_base')
+    return len(_encoding.encode(text))
+
+def to_text(value):
+    return json.dumps(value, default=str, separators=(',', ':'))
+
+def is_edge(value):
+    return isinstance(value, dict) and '_from' in value and '_to' in value
+
+def is_entity(value):
+    """True for node documents and for ``SpokeGraph.describe`` dicts."""
+    if not isinstance(value, dict) or is_edge(value):
+        return False
+    return '_id' in value or ('id' in value and any(key in value for key in ('labels', 'type', 'properties')))
+
+def entity_id(value):
+    return str(value.get('_id', value.get('id')))
+
+def project_entity(value):
+    """Reduce a node to its id, type and name/identifier."""
+    properties = value.get('properties') or {}
+    labels = value.get('labels') or ([value['type']] if value.get('type') else [])
+    entity = {'id': entity_id(value)}
+    if labels:
+        entity['type'] = labels[0]
+    for field in ENTITY_FIELDS:
+        field_value = properties.get(field, value.get(field))
+        if field_value is not None:
+            entity[field] = field_value
+    return entity
+
+class Compactor:
+    """Collects the entities and relationships of a result while projecting its rows."""
+
+    def __init__(self):
+        self.entities = {}
+        self.frequency = Counter()
+        self.relationships = {}
+
+    def project(self, value):
+        """Replace nodes by their id and edges by ``[label, from, to]``, recording both."""
+        if is_edge(value):
+            edge = [value.get('label') or str(value.get('_id', '')).split('/')[0], value['_from'], value['_to']]
+            self.relationships.setdefault(edge[0], {})[(edge[1], edge[2])] = None
+            self.frequency.update([edge[1], edge[2]])
+            return edge
+        if is_entity(value):
+            entity = project_entity(value)
+            self.entities.setdefault(entity['id'], entity)
+            self.frequency[entity['id']] += 1
+            return entity['id']
+        if isinstance(value, dict):
+            return {key: self.project(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.project(item) for item in value]
+        return value
+
+    def score(self, row):
+        """Sum of the frequencies of the entities a projected row mentions."""
+        if isinstance(row, str):
+            return self.frequency.get(row, 0)
+        if isinstance(row, dict):
+            return sum(self.score(item) for item in row.values())
+        if isinstance(row, list):
+            return sum(self.score(item) for item in row)
+        return 0
+
+    def build(self, rows, k):
+        """Keep the top ``k`` rows, entities and edges per label and count the rest."""
+        ranked_rows = sorted(range(len(rows)), key=lambda i: -self.score(rows[i]))[:k]
+        ranked_entities = sorted(self.entities, key=lambda key: -self.frequency[key])[:k]
+        compacted = {'rows': [rows[i] for i in sorted(ranked_rows)]}
+        if self.entities:
+            compacted['entities'] = [self.entities[key] for key in ranked_entities]
+        if self.relationships:
+            edge_score = lambda edge: -self.frequency[edge[0]] - self.frequency[edge[1]]
+            compacted['relationships'] = {
+                label: [list(edge) for edge in sorted(edges, key=edge_score)[:k]]
+                for label, edges in self.relationships.items()
+            }
+        omitted = {
+            'rows': len(rows) - len(ranked_rows),
+            'entities': len(self.entities) - len(ranked_entities),
+            'relationships': {label: len(edges) - k for label, edges in self.relationships.items() if len(edges) > k},
+        }
+        omitted = {key: value for key, value in omitted.items() if value}
+        if omitted:
+            compacted['omitted'] = omitted
+        return compacted
+
+def compact_result(aql_result, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Shrink an AQL result to about ``token_budget`` tokens for the interpretation prompt.
+
+    Nodes are projected to id/type/name/identifier and listed once under
+    ``entities``, edges are grouped by label under ``relationships`` and
+    rows refer to both by id. The most frequently referenced rows, entities
+    and edges are kept, halving their number until the result fits, and
+    what was dropped is counted under ``omitted``.
+
+    Returns the compacted result and a report with the ``original_tokens``,
+    ``compacted_tokens`` and ``saved_tokens``.
+    """
+    original_tokens = count_tokens(to_text(aql_result))
+    if original_tokens <= token_budget:
+        return aql_result, {'original_tokens': original_tokens, 'compacted_tokens': original_tokens, 'saved_tokens': 0}
+
+    rows = aql_result if isinstance(aql_result, list) else [aql_result]
+    compactor = Compactor()
+    projected = [compactor.project(row) for row in rows]
+    k = max([len(projected), len(compactor.entities)] + [len(edges) for edges in compactor.relationships.values()])
+    compacted = compactor.build(projected, k)
+    tokens = count_tokens(to_text(compacted))
+    while tokens > token_budget and k > 1:
+        k //= 2
+        compacted = compactor.build(projected, k)
+        tokens = count_tokens(to_text(compacted))
+    return compacted, {'original_tokens': original_tokens, 'compacted_tokens': tokens,
+                       'saved_tokens': original_tokens - tokens}
@@ -0,0 +1,39 @@
+import json
+import os
+import time
+from qa_cache import database_revision
+
+SCHEMA_CACHE_VERSION = 1  # Bump when the cached schema format changes
+
+def schema_key(db):
+    """Identify the schema of ``db`` by cache version, database name and collection revisions."""
+    return {'version': SCHEMA_CACHE_VERSION, 'database': db.name, 'revision': database_revision(db)}
+
+def cached_schema(db, generate, path=None):
+    """Return the graph schema of ``db``, reusing the copy in ``path`` while the database is unchanged.
+
+    ``generate`` is called to infer the schema (e.g. ``ArangoGraph.generate_schema``,
+    which samples every collection) when ``path`` is missing, unreadable or was
+    written for another version, database or revision; the result is saved to
+    ``path`` for the next start.
+    """
+    if path is None:
+        return generate()
+    key = schema_key(db)
+    try:
+        with open(path) as file:
+            cached = json.load(file)
+        if cached.get('key') == key:
+            print(f"Loaded graph schema from {path}")
+            return cached['schema']
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+
+    start = time.perf_counter()
+    schema = generate()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({'key': key, 'schema': schema}, file)
+    os.replace(tmp_path, path)
+    print(f"Generated graph schema in {time.perf_counter() - start:.1f}s, cached in {path}")
+    return schema
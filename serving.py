@@ -0,0 +1,132 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_DEPTH = 16
+_DONE = object()
+
+class ServerBusy(Exception):
+    """Raised when a request arrives while ``queue_depth`` requests are already waiting."""
+
+class Lazy:
+    """Value built by ``factory`` on first use and then shared by all threads.
+
+    If ``factory`` raises, the error is recorded and re-raised, and the next
+    ``get`` tries again, so a briefly unavailable database only fails the
+    requests made while it is down.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.lock = threading.Lock()
+        self.value = None
+        self.ready = False
+        self.seconds = None
+        self.error = None
+
+    def get(self):
+        if not self.ready:
+            with self.lock:
+                if not self.ready:
+                    start = time.perf_counter()
+                    try:
+                        self.value = self.factory()
+                    except Exception as e:
+                        self.error = f"{type(e).__name__}: {e}"
+                        raise
+                    self.seconds = time.perf_counter() - start
+                    self.error = None
+                    self.ready = True
+        return self.value
+
+    def status(self):
+        return {'ready': self.ready, 'seconds': self.seconds, 'error': self.error}
+
+def health(resources, warm=False):
+    """Return the status of each ``Lazy`` in the ``resources`` dict, building them first if ``warm``."""
+    status = {}
+    for name, resource in resources.items():
+        if warm:
+            try:
+                resource.get()
+            except Exception:
+                pass  # Reported in the status
+        status[name] = resource.status()
+    return status
+
+class ClientPool:
+    """Fixed set of clients (e.g. QA chains), each lent to one request at a time."""
+
+    def __init__(self, factory, size):
+        self.clients = queue.Queue()
+        for _ in range(size):
+            self.clients.put(factory())
+
+    @contextmanager
+    def lease(self):
+        client = self.clients.get()
+        try:
+            yield client
+        finally:
+            self.clients.put(client)
+
+class AnswerServer:
+    """Serve blocking answer generators from async handlers on a bounded worker pool.
+
+    Each request runs its generator on one of ``workers`` threads, so at
+    most ``workers`` answers are computed at once and a slow LLM or AQL
+    call only holds up its own request. At most ``queue_depth`` further
+    requests wait for a worker; beyond that ``ServerBusy`` is raised.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_depth=DEFAULT_QUEUE_DEPTH):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='answer')
+        self.slots = asyncio.Semaphore(workers)
+        self.active = 0
+        self.waiting = 0
+        self.counts = {'served': 0, 'rejected': 0, 'failed': 0}
+
+    async def stream(self, make_generator, *args):
+        """Yield the items of ``make_generator(*args)``, computed on a worker thread."""
+        if self.waiting >= self.queue_depth:
+            self.counts['rejected'] += 1
+            raise ServerBusy(f"{self.waiting} requests are already waiting; please try again shortly")
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        loop = asyncio.get_running_loop()
+        generator = None
+        try:
+            generator = await loop.run_in_executor(self.executor, make_generator, *args)
+            while True:
+                item = await loop.run_in_executor(self.executor, next, generator, _DONE)
+                if item is _DONE:
+                    break
+                yield item
+            self.counts['served'] += 1
+        except Exception:
+            self.counts['failed'] += 1
+            raise
+        finally:
+            self.active -= 1
+            self.slots.release()
+            if generator is not None:
+                try:
+                    generator.close()
+                except ValueError:
+                    pass  # Still running on its worker after a cancelled request
+
+    def stats(self):
+        """Return the number of active and waiting requests and the served/rejected/failed counts."""
+        return dict(self.counts, workers=self.workers, active=self.active, waiting=self.waiting,
+                    queue_depth=self.queue_depth)
@@ -0,0 +1,290 @@
+import json
+import mmap
+import os
+from array import array
+import numpy as np
+from spoke_dump import iter_spoke_records, parse_record, SpokeNode
+
+COLUMNAR_VERSION = 2
+READABLE_VERSIONS = (1, 2)  # Version 1 caches kept string ids in JSON
+MANIFEST = 'manifest.json'
+
+def is_columnar(path):
+    """Return True if ``path`` is a directory written by ``convert_to_columnar``."""
+    return os.path.isfile(os.path.join(str(path), MANIFEST))
+
+def _intern(table, index, value):
+    if value not in index:
+        index[value] = len(table)
+        table.append(value)
+    return index[value]
+
+def _is_numeric_id(value):
+    """True for strings that round-trip through int64, like SPOKE's ``"12345"``."""
+    return (isinstance(value, str) and value.isascii() and value.isdigit()
+            and str(int(value)) == value and int(value) < 2 ** 63)
+
+class NumericStringIds:
+    """String ids stored as an int64 array and turned back into strings on access."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, index):
+        return str(int(self.values[index]))
+
+    def __len__(self):
+        return len(self.values)
+
+class BlobIds:
+    """String ids stored as UTF-8 bytes in one file, delimited by an int64 offsets array."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __getitem__(self, index):
+        return self.blob[int(self.offsets[index]):int(self.offsets[index + 1])].decode()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+def _map_file(path):
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _save_ids(out_dir, name, ids):
+    """Save ids in the most compact format that fits them and return its name.
+
+    Integers and numeric strings go to an int64 array (``npy`` and
+    ``npy_str``), other strings to an offsets array and a bytes blob
+    (``blob``); only mixed ids fall back to JSON.
+    """
+    if all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        np.save(os.path.join(out_dir, f'{name}.npy'), np.array(ids, dtype=np.int64))
+        return 'npy'
+    if all(_is_numeric_id(i) for i in ids):
+        np.save(os.path.join(out_dir, f'{name}.npy'), np.array([int(i) for i in ids], dtype=np.int64))
+        return 'npy_str'
+    if all(isinstance(i, str) for i in ids):
+        offsets = array('q', [0])
+        with open(os.path.join(out_dir, f'{name}.bin'), 'wb') as file:
+            for i in ids:
+                offsets.append(offsets[-1] + file.write(i.encode()))
+        np.save(os.path.join(out_dir, f'{name}.offsets.npy'), np.frombuffer(offsets, dtype=np.int64))
+        return 'blob'
+    with open(os.path.join(out_dir, f'{name}.json'), 'w') as file:
+        json.dump(ids, file)
+    return 'json'
+
+def _load_ids(path, name, fmt):
+    if fmt == 'npy':
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+    if fmt == 'npy_str':
+        return NumericStringIds(np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+    if fmt == 'blob':
+        return BlobIds(np.load(os.path.join(path, f'{name}.offsets.npy'), mmap_mode='r'),
+                       _map_file(os.path.join(path, f'{name}.bin')))
+    with open(os.path.join(path, f'{name}.json')) as file:
+        return json.load(file)
+
+def convert_to_columnar(dump_path, out_dir, desc="Converting"):
+    """Convert a SPOKE dump into the columnar cache format in one pass.
+
+    Writes to ``out_dir``:
+
+    - ``node_type.npy`` (int32 index into ``types.json``, -1 if the node
+      record never appeared), ``node_props.npy`` (int64 byte offset of the
+      node's line in ``node_properties.jsonl``, -1 if missing) and the node
+      ids (see ``_save_ids``), all indexed by node row;
+    - ``edge_src.npy``/``edge_dst.npy`` (int64 node rows), ``edge_label.npy``
+      (int32 index into ``labels.json``), ``edge_props.npy`` and the edge ids;
+    - ``manifest.json`` with counts and formats.
+
+    Returns the manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    node_ids, node_rows = [], {}
+    node_types, node_props = array('i'), array('q')
+    types, type_index = [], {}
+    labels, label_index = [], {}
+    edge_ids = []
+    edge_src, edge_dst, edge_label, edge_props = array('q'), array('q'), array('i'), array('q')
+
+    def row_of(node_id):
+        if node_id not in node_rows:
+            node_rows[node_id] = len(node_ids)
+            node_ids.append(node_id)
+            node_types.append(-1)
+            node_props.append(-1)
+        return node_rows[node_id]
+
+    with open(os.path.join(out_dir, 'node_properties.jsonl'), 'wb') as node_file, \
+            open(os.path.join(out_dir, 'edge_properties.jsonl'), 'wb') as edge_file:
+        for record in iter_spoke_records(dump_path, desc=desc):
+            if isinstance(record, SpokeNode):
+                row = row_of(record.data['id'])
+                node_type = record.labels[0] if record.labels else ''
+                node_types[row] = _intern(types, type_index, node_type)
+                node_props[row] = node_file.tell()
+                rest = {k: v for k, v in record.data.items() if k not in ('type', 'id')}
+                node_file.write(json.dumps(rest).encode() + b'\n')
+            else:
+                edge_ids.append(record.data['id'])
+                edge_src.append(row_of(record.data['start']['id']))
+                edge_dst.append(row_of(record.data['end']['id']))
+                edge_label.append(_intern(labels, label_index, record.label or ''))
+                edge_props.append(edge_file.tell())
+                rest = {k: v for k, v in record.data.items() if k not in ('type', 'id', 'label', 'start', 'end')}
+                edge_file.write(json.dumps(rest).encode() + b'\n')
+
+    for name, values, dtype in [('node_type', node_types, np.int32), ('node_props', node_props, np.int64),
+                                ('edge_src', edge_src, np.int64), ('edge_dst', edge_dst, np.int64),
+                                ('edge_label', edge_label, np.int32), ('edge_props', edge_props, np.int64)]:
+        np.save(os.path.join(out_dir, f'{name}.npy'), np.frombuffer(values, dtype=dtype))
+    for name, table in [('types', types), ('labels', labels)]:
+        with open(os.path.join(out_dir, f'{name}.json'), 'w') as file:
+            json.dump(table, file)
+
+    manifest = {
+        'version': COLUMNAR_VERSION,
+        'source': os.path.abspath(str(dump_path)),
+        'nodes': len(node_ids),
+        'edges': len(edge_ids),
+        'node_ids': _save_ids(out_dir, 'node_ids', node_ids),
+        'edge_ids': _save_ids(out_dir, 'edge_ids', edge_ids),
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as file:
+        json.dump(manifest, file)
+    return manifest
+
+class ColumnarGraph:
+    """Read-only view of a columnar SPOKE cache.
+
+    Arrays and ids are memory-mapped and property lines are read straight
+    from mapped files, so opening the cache parses only the small JSON
+    tables of types and labels.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(os.path.join(self.path, MANIFEST)) as file:
+            self.manifest = json.load(file)
+        if self.manifest['version'] not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported columnar cache version {self.manifest['version']}")
+        load = lambda name: np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        self.node_type = load('node_type')
+        self.node_props = load('node_props')
+        self.edge_src = load('edge_src')
+        self.edge_dst = load('edge_dst')
+        self.edge_label = load('edge_label')
+        self.edge_props = load('edge_props')
+        self.node_ids = _load_ids(self.path, 'node_ids', self.manifest['node_ids'])
+        self.edge_ids = _load_ids(self.path, 'edge_ids', self.manifest['edge_ids'])
+        with open(os.path.join(self.path, 'types.json')) as file:
+            self.types = json.load(file)
+        with open(os.path.join(self.path, 'labels.json')) as file:
+            self.labels = json.load(file)
+        self._node_lines = self._map('node_properties.jsonl')
+        self._edge_lines = self._map('edge_properties.jsonl')
+        self._rows = None
+
+    def _map(self, name):
+        return _map_file(os.path.join(self.path, name))
+
+    @staticmethod
+    def _read_line(lines, offset):
+        end = lines.find(b'\n', offset)
+        return json.loads(lines[offset:end])
+
+    @property
+    def num_nodes(self):
+        return self.manifest['nodes']
+
+    @property
+    def num_edges(self):
+        return self.manifest['edges']
+
+    def node_id(self, row):
+        """Return the original SPOKE id of node ``row``."""
+        node_id = self.node_ids[row]
+        return node_id.item() if isinstance(node_id, np.generic) else node_id
+
+    def edge_id(self, index):
+        """Return the original SPOKE id of edge ``index``."""
+        edge_id = self.edge_ids[index]
+        return edge_id.item() if isinstance(edge_id, np.generic) else edge_id
+
+    def row(self, node_id):
+        """Return the row of ``node_id``; the mapping is built on first use."""
+        if self._rows is None:
+            self._rows = {self.node_id(row): row for row in range(self.num_nodes)}
+        return self._rows[node_id]
+
+    def node_type_name(self, row):
+        index = int(self.node_type[row])
+        return self.types[index] if index >= 0 else None
+
+    def node_data(self, row):
+        """Return the node record of ``row`` as it appeared in the dump, or None."""
+        offset = int(self.node_props[row])
+        if offset < 0:
+            return None
+        data = {'type': 'node', 'id': self.node_id(row)}
+        data.update(self._read_line(self._node_lines, offset))
+        return data
+
+    def _endpoint(self, row, full):
+        if full:
+            data = self.node_data(row)
+            if data is not None:
+                return {k: v for k, v in data.items() if k != 'type'}
+        node_type = self.node_type_name(row)
+        return {'id': self.node_id(row), 'labels': [node_type] if node_type else []}
+
+    def edge_data(self, index, full_endpoints=False):
+        """Return the relationship record of edge ``index``.
+
+        Endpoints carry only ``id`` and ``labels`` unless ``full_endpoints``
+        is set, which reads the complete endpoint nodes back in.
+        """
+        data = {
+            'type': 'relationship',
+            'id': self.edge_id(index),
+            'label': self.labels[int(self.edge_label[index])],
+            'start': self._endpoint(int(self.edge_src[index]), full_endpoints),
+            'end': self._endpoint(int(self.edge_dst[index]), full_endpoints),
+        }
+        data.update(self._read_line(self._edge_lines, int(self.edge_props[index])))
+        return data
+
+    def iter_dicts(self, start=0, full_endpoints=False):
+        """Yield node records, then relationship records, as parsed dicts.
+
+        Position ``i`` in this sequence is node row ``i`` for ``i`` below
+        ``num_nodes`` and edge ``i - num_nodes`` after that; iteration
+        begins at ``start``. Rows without a node record are skipped.
+        """
+        for row in range(min(start, self.num_nodes), self.num_nodes):
+            data = self.node_data(row)
+            if data is not None:
+                yield data
+        for index in range(max(start - self.num_nodes, 0), self.num_edges):
+            yield self.edge_data(index, full_endpoints)
+
+    def iter_records(self, full_endpoints=False):
+        """Yield ``SpokeNode`` and ``SpokeEdge`` records, like ``iter_spoke_records``."""
+        for data in self.iter_dicts(full_endpoints=full_endpoints):
+            yield parse_record(data)
+
+    def __len__(self):
+        return self.num_nodes + self.num_edges
+
+if __name__ == "__main__":
+    # Example usage
+    dump_path = '/path/to/your/spoke_2023_human.json'
+    out_dir = '/path/to/your/spoke_2023_human.columnar'
+    manifest = convert_to_columnar(dump_path, out_dir)
+    print(f"Converted {manifest['nodes']} nodes and {manifest['edges']} edges to {out_dir}")
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import time
+from array import array
+import numpy as np
+from tqdm import tqdm
+from arangodb_loader import (DEFAULT_BATCH_SIZE, DEFAULT_EDGE_PROJECTION, SINGLE_LAYOUT, bulk_load_lines,
+                             connect_to_arangodb, create_or_get_database, edge_collection, edge_document,
+                             ensure_collections, iter_input, node_collection)
+
+FINGERPRINT_SUFFIX = '.fingerprint.npz'
+# Kinds recorded for every _id in a fingerprint
+NODE, EDGE = 0, 1
+REMOVE_QUERY = "FOR key IN @keys REMOVE key IN @@collection OPTIONS { ignoreErrors: true }"
+
+def document_id(data, layout=SINGLE_LAYOUT):
+    """Return the ``_id`` a parsed node or relationship record is loaded under, or None."""
+    if data.get('type') == 'node':
+        return node_collection(data, layout) + '/' + str(data['id'])
+    if data.get('type') == 'relationship':
+        return edge_collection(data, layout) + '/' + str(data['id'])
+    return None
+
+def record_hash(data):
+    """Stable 64-bit content hash of a parsed record, independent of key order."""
+    digest = hashlib.blake2b(json.dumps(data, sort_keys=True).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def document_hash(data, edge_projection=DEFAULT_EDGE_PROJECTION, layout=SINGLE_LAYOUT):
+    """Content hash of the document a record is stored as.
+
+    Relationships are hashed as ``edge_document`` writes them, so changes
+    to endpoint fields that ``edge_projection`` drops do not mark the
+    edges of an edited node as changed.
+    """
+    if data.get('type') == 'relationship':
+        return record_hash(edge_document(data, edge_projection, layout))
+    return record_hash(data)
+
+def iter_parsed(path, desc=None):
+    """Yield the parsed records of a dump or columnar cache, skipping invalid lines."""
+    for line in iter_input(path, desc=desc):
+        if isinstance(line, dict):
+            yield line
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+def id_key(doc_id):
+    """64-bit hash of a document ``_id``, the key fingerprints are sorted and searched by."""
+    return int.from_bytes(hashlib.blake2b(doc_id.encode(), digest_size=8).digest(), 'little')
+
+class FingerprintBuilder:
+    """Collect ``_id``/kind/hash triples in flat arrays and sort them into a fingerprint.
+
+    A fingerprint holds aligned arrays sorted by ``keys`` (see ``id_key``):
+    ``kinds`` (``NODE`` or ``EDGE``), content ``hashes``, and the ``_id``
+    strings as UTF-8 ``id_bytes`` ending at ``id_ends``. The strings are
+    only decoded for documents that have to be removed.
+    """
+
+    def __init__(self):
+        self.keys, self.kinds, self.hashes = array('Q'), array('B'), array('Q')
+        self.id_bytes, self.id_ends = bytearray(), array('q')
+
+    def add(self, doc_id, kind, content_hash):
+        self.keys.append(id_key(doc_id))
+        self.kinds.append(kind)
+        self.hashes.append(content_hash)
+        self.id_bytes += doc_id.encode()
+        self.id_ends.append(len(self.id_bytes))
+
+    def build(self):
+        keys = np.frombuffer(self.keys, dtype=np.uint64)
+        order = np.argsort(keys, kind='stable')
+        ends = np.frombuffer(self.id_ends, dtype=np.int64)
+        starts = ends - np.diff(ends, prepend=0)
+        blob = memoryview(self.id_bytes)
+        id_bytes = b''.join(blob[starts[row]:ends[row]] for row in order)
+        return {
+            'keys': keys[order],
+            'kinds': np.frombuffer(self.kinds, dtype=np.uint8)[order],
+            'hashes': np.frombuffer(self.hashes, dtype=np.uint64)[order],
+            'id_bytes': np.frombuffer(id_bytes, dtype=np.uint8),
+            'id_ends': np.cumsum((ends - starts)[order]),
+        }
+
+def build_fingerprint(ids, kinds, hashes):
+    """Build a fingerprint from sequences of ``_id``, kind and hash."""
+    builder = FingerprintBuilder()
+    for doc_id, kind, content_hash in zip(ids, kinds, hashes):
+        builder.add(str(doc_id), int(kind), int(content_hash))
+    return builder.build()
+
+def fingerprint_ids(fingerprint, rows=None):
+    """Yield the ``_id`` strings of ``rows`` of a fingerprint, all rows by default."""
+    id_bytes, ends = fingerprint['id_bytes'], fingerprint['id_ends']
+    for row in range(len(ends)) if rows is None else rows:
+        start = int(ends[row - 1]) if row else 0
+        yield id_bytes[start:int(ends[row])].tobytes().decode()
+
+def fingerprint_dump(path, layout=SINGLE_LAYOUT, desc="Fingerprinting", edge_projection=DEFAULT_EDGE_PROJECTION):
+    """Compute the fingerprint of a dump: every document ``_id`` with its content hash (see ``document_hash``)."""
+    builder = FingerprintBuilder()
+    for data in iter_parsed(path, desc=desc):
+        doc_id = document_id(data, layout)
+        if doc_id is not None:
+            builder.add(doc_id, NODE if data['type'] == 'node' else EDGE, document_hash(data, edge_projection, layout))
+    return builder.build()
+
+def save_fingerprint(fingerprint, path):
+    """Write a fingerprint to ``path`` (an ``.npz`` file)."""
+    np.savez(path, **fingerprint)
+
+def load_fingerprint(path):
+    with np.load(path) as data:
+        if 'ids' in data:  # Written before fingerprints were keyed by id hashes
+            return build_fingerprint(data['ids'], data['kinds'], data['hashes'])
+        return {key: data[key] for key in ('keys', 'kinds', 'hashes', 'id_bytes', 'id_ends')}
+
+def load_or_compute_fingerprint(path, layout=SINGLE_LAYOUT, edge_projection=DEFAULT_EDGE_PROJECTION):
+    """Load a saved fingerprint, or compute one if ``path`` is a dump."""
+    if str(path).endswith('.npz'):
+        return load_fingerprint(path)
+    return fingerprint_dump(path, layout, edge_projection=edge_projection)
+
+def remove_documents(db, doc_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Remove documents by ``_id``, one AQL query per collection and batch."""
+    by_collection = {}
+    for doc_id in doc_ids:
+        collection, key = str(doc_id).split('/', 1)
+        by_collection.setdefault(collection, []).append(key)
+    for collection, keys in by_collection.items():
+        for i in range(0, len(keys), batch_size):
+            db.AQLQuery(REMOVE_QUERY, bindVars={'keys': keys[i:i + batch_size], '@collection': collection})
+
+def delta_load(new_path, old_fingerprint, db=None, batch_size=DEFAULT_BATCH_SIZE,
+               edge_projection=DEFAULT_EDGE_PROJECTION, layout=SINGLE_LAYOUT):
+    """Apply the difference between two SPOKE releases to ``db``.
+
+    Streams the new dump once, hashing every document and looking the hash
+    of its ``_id`` up in ``old_fingerprint``. Added and changed records are
+    bulk imported, replacing the old documents, and documents missing from
+    the new dump are removed, edges before nodes. ``old_fingerprint`` must have been
+    computed with the same ``edge_projection``. With ``db=None`` nothing
+    is written and only the summary is computed.
+
+    Returns the summary and the fingerprint of the new release, to be used
+    as the baseline for the next one. The summary has added, changed,
+    removed and unchanged counts for ``nodes`` and ``edges``, the load
+    ``report`` (None for a dry run) and the elapsed ``seconds``.
+    """
+    start_time = time.perf_counter()
+    old_keys, old_hashes = old_fingerprint['keys'], old_fingerprint['hashes']
+    seen = np.zeros(len(old_keys), dtype=bool)
+    summary = {kind: {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0} for kind in ('nodes', 'edges')}
+    new_fingerprint = FingerprintBuilder()
+
+    def changed_records():
+        for data in iter_parsed(new_path, desc="Diffing"):
+            doc_id = document_id(data, layout)
+            if doc_id is None:
+                continue
+            kind = NODE if data['type'] == 'node' else EDGE
+            counts = summary['nodes' if kind == NODE else 'edges']
+            content_hash = document_hash(data, edge_projection, layout)
+            new_fingerprint.add(doc_id, kind, content_hash)
+
+            key = id_key(doc_id)
+            i = int(np.searchsorted(old_keys, np.uint64(key)))
+            if i < len(old_keys) and old_keys[i] == key:
+                seen[i] = True
+                if old_hashes[i] == content_hash:
+                    counts['unchanged'] += 1
+                    continue
+                counts['changed'] += 1
+            else:
+                counts['added'] += 1
+            yield data
+
+    if db is None:
+        for _ in changed_records():
+            pass
+        summary['report'] = None
+    else:
+        summary['report'] = bulk_load_lines(changed_records(), db, batch_size, on_duplicate="replace",
+                                            edge_projection=edge_projection, layout=layout)
+
+    removed = ~seen
+    removed_edges = np.flatnonzero(removed & (old_fingerprint['kinds'] == EDGE))
+    removed_nodes = np.flatnonzero(removed & (old_fingerprint['kinds'] == NODE))
+    summary['edges']['removed'] = len(removed_edges)
+    summary['nodes']['removed'] = len(removed_nodes)
+    if db is not None:
+        for rows, desc in [(removed_edges, "Removing Edges"), (removed_nodes, "Removing Nodes")]:
+            remove_documents(db, tqdm(fingerprint_ids(old_fingerprint, rows), total=len(rows), desc=desc),
+                             batch_size)
+
+    summary['seconds'] = time.perf_counter() - start_time
+    return summary, new_fingerprint.build()
+
+def format_delta_summary(summary):
+    """Render a delta summary as a short text report."""
+    lines = []
+    for kind in ('nodes', 'edges'):
+        counts = summary[kind]
+        lines.append(f"{kind.capitalize()}: {counts['added']} added, {counts['changed']} changed, "
+                     f"{counts['removed']} removed, {counts['unchanged']} unchanged")
+    report = summary.get('report')
+    if report:
+        lines.append(f"Documents written: {report['nodes'] + report['edges']}, failed: {report['errors']}")
+    lines.append(f"Elapsed: {summary['seconds']:.1f}s")
+    return "\n".join(lines)
+
+def main(db_name, old_path, new_path, username, password, fingerprint_out=None, dry_run=False,
+         batch_size=DEFAULT_BATCH_SIZE, edge_projection=DEFAULT_EDGE_PROJECTION, layout=SINGLE_LAYOUT):
+    """Upgrade ``db_name`` from the release in ``old_path`` to ``new_path``.
+
+    ``old_path`` is the previous dump or its saved fingerprint. The new
+    release's fingerprint is written to ``fingerprint_out`` (by default
+    next to the new dump) for the next upgrade.
+    """
+    old_fingerprint = load_or_compute_fingerprint(old_path, layout, edge_projection)
+
+    db = None
+    if not dry_run:
+        print("Connecting...")
+        conn = connect_to_arangodb(username, password)
+        if not conn:
+            return None
+        db = create_or_get_database(conn, db_name)
+        ensure_collections(db)
+
+    summary, new_fingerprint = delta_load(new_path, old_fingerprint, db, batch_size=batch_size,
+                                          edge_projection=edge_projection, layout=layout)
+    save_fingerprint(new_fingerprint, fingerprint_out or str(new_path) + FINGERPRINT_SUFFIX)
+    print(format_delta_summary(summary))
+    return summary
+
+if __name__ == "__main__":
+    # Example usage
+    db_name = "spoke23_human"
+    old_path = '/path/to/your/spoke_2023_human.json' + FINGERPRINT_SUFFIX
+    new_path = '/path/to/your/spoke_2024_human.json'
+    username = "root"
+    password = "your_password_here"
+    main(db_name, old_path, new_path, username, password)
@@ -0,0 +1,114 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+from typing import Any, Dict, List, NamedTuple
+from tqdm import tqdm
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+PROGRESS_EVERY = 1000  # Lines between progress bar updates
+SKIP_CHUNK_SIZE = 1 << 20
+
+class SpokeNode(NamedTuple):
+    """A node record from the SPOKE dump."""
+    id: str
+    labels: List[str]
+    properties: Dict[str, Any]
+    data: Dict[str, Any]
+
+class SpokeEdge(NamedTuple):
+    """A relationship record from the SPOKE dump."""
+    id: str
+    label: str
+    start_id: str
+    end_id: str
+    properties: Dict[str, Any]
+    data: Dict[str, Any]
+
+def is_compressed(path):
+    """Return True if ``path`` names a compressed dump."""
+    return str(path).endswith(COMPRESSED_SUFFIXES)
+
+def decompress_stream(path, raw):
+    """Wrap the binary file ``raw`` in a decompressor chosen by the suffix of ``path``."""
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.GzipFile(fileobj=raw)
+    if path.endswith('.bz2'):
+        return bz2.BZ2File(raw)
+    if path.endswith('.xz'):
+        return lzma.LZMAFile(raw)
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError("Reading .zst dumps requires the zstandard package")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    return raw
+
+def skip_bytes(stream, offset):
+    """Advance ``stream`` to decompressed byte ``offset``."""
+    if stream.seekable():
+        stream.seek(offset)
+        return
+    remaining = offset
+    while remaining > 0:
+        chunk = stream.read(min(remaining, SKIP_CHUNK_SIZE))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+
+def iter_dump_lines(path, offset=0, desc=None):
+    """Yield the raw byte lines of a plain or compressed dump in a single pass.
+
+    Reading starts at decompressed byte ``offset``. With ``desc`` set, a
+    progress bar tracks the bytes of ``path`` consumed so far, so no extra
+    pass is needed to count lines.
+    """
+    with open(path, 'rb') as raw:
+        stream = decompress_stream(path, raw)
+        if offset:
+            skip_bytes(stream, offset)
+        with tqdm(total=os.fstat(raw.fileno()).st_size, initial=raw.tell(), unit='B',
+                  unit_scale=True, desc=desc, disable=desc is None) as progress:
+            for count, line in enumerate(stream, 1):
+                if count % PROGRESS_EVERY == 0:
+                    progress.update(raw.tell() - progress.n)
+                yield line
+            progress.update(raw.tell() - progress.n)
+
+def parse_record(data):
+    """Turn a parsed JSON line into a ``SpokeNode`` or ``SpokeEdge`` (or None)."""
+    if data.get('type') == 'node':
+        return SpokeNode(str(data['id']), data.get('labels', []), data.get('properties', {}), data)
+    if data.get('type') == 'relationship':
+        return SpokeEdge(str(data['id']), data.get('label'), str(data['start']['id']),
+                         str(data['end']['id']), data.get('properties', {}), data)
+    return None
+
+def iter_spoke_records(path, desc=None):
+    """Yield the nodes and relationships of a SPOKE dump as typed records.
+
+    Invalid JSON lines and records of any other type are skipped. ``path``
+    may also be a columnar cache (see ``spoke_columnar``), which yields
+    nodes first and endpoints with ids and labels only.
+    """
+    # Imported here because spoke_columnar builds on this module
+    from spoke_columnar import ColumnarGraph, is_columnar
+    if is_columnar(path):
+        yield from ColumnarGraph(path).iter_records()
+        return
+
+    for line in iter_dump_lines(path, desc=desc):
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # Skip invalid JSON lines
+        record = parse_record(data)
+        if record is not None:
+            yield record
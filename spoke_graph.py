@@ -0,0 +1,302 @@
+import json
+import os
+import re
+import numpy as np
+from spoke_columnar import ColumnarGraph, _intern, is_columnar
+from spoke_dump import SpokeNode, iter_spoke_records
+
+OUT, IN = 'out', 'in'
+MAX_TEMPLATE_RESULTS = 500
+
+# Question templates answered by the in-process graph. Each maps a regex
+# with an ``entity`` group to the type of the named start node and the
+# (edge label, direction, node type) steps to follow from it.
+TEMPLATES = [
+    {
+        'name': 'disease_genes_pathways',
+        'pattern': r'which genes are (?:most (?:strongly )?)?associated with (?:the development of )?(?P<entity>.+?),? '
+                   r'and (?:what|which) pathways do they',
+        'start': 'Disease',
+        'steps': [('ASSOCIATES_DaG', OUT, 'Gene'), ('PARTICIPATES_GpPW', OUT, 'Pathway')],
+    },
+    {
+        'name': 'disease_genes',
+        'pattern': r'(?:which|what) genes are (?:most (?:strongly )?)?associated with (?:the development of )?'
+                   r'(?P<entity>[^?,]+)',
+        'start': 'Disease',
+        'steps': [('ASSOCIATES_DaG', OUT, 'Gene')],
+    },
+    {
+        'name': 'gene_diseases',
+        'pattern': r'(?:which|what) diseases are associated with (?:the )?(?:gene )?(?P<entity>[^?,\s]+)',
+        'start': 'Gene',
+        'steps': [('ASSOCIATES_DaG', IN, 'Disease')],
+    },
+    {
+        'name': 'gene_pathways',
+        'pattern': r'(?:which|what) pathways (?:does|do) (?:the )?(?:gene )?(?P<entity>[^?,\s]+) participate in',
+        'start': 'Gene',
+        'steps': [('PARTICIPATES_GpPW', OUT, 'Pathway')],
+    },
+    {
+        'name': 'compound_treats',
+        'pattern': r'(?:which|what) diseases (?:does|do|can) (?:the )?(?:drug |compound )?(?P<entity>[^?,]+?) treat',
+        'start': 'Compound',
+        'steps': [('TREATS_CtD', OUT, 'Disease')],
+    },
+]
+
+def name_words(name):
+    """Return the lower-cased words of a node name, for the word index of ``SpokeGraph.find``."""
+    return re.findall(r'[a-z0-9]+', str(name).lower()) if name else []
+
+def build_csr(keys, labels, targets, size):
+    """Sort edges by (key, label) and return CSR offsets, labels and targets."""
+    order = np.lexsort((labels, keys))
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, labels[order], targets[order]
+
+class SpokeGraph:
+    """Compact in-memory adjacency index of the SPOKE graph.
+
+    Nodes are interned to integer rows. Outbound and inbound edges are kept
+    in CSR arrays sorted by (node, label id), so the edges of one label are
+    a contiguous slice found by binary search in the node's range.
+    """
+
+    def __init__(self, node_ids, node_type, types, names, identifiers, labels, src, dst, label):
+        self.node_ids = [str(node_id) for node_id in node_ids]
+        self.node_type = np.asarray(node_type, dtype=np.int32)
+        self.types = list(types)
+        self.names = names
+        self.identifiers = identifiers
+        self.labels = list(labels)
+        self.label_index = {name: i for i, name in enumerate(self.labels)}
+        self.type_index = {name: i for i, name in enumerate(self.types)}
+        size = len(node_ids)
+        src, dst, label = (np.asarray(a) for a in (src, dst, label))
+        self.out_offsets, self.out_labels, self.out_targets = build_csr(src, label, dst, size)
+        self.in_offsets, self.in_labels, self.in_targets = build_csr(dst, label, src, size)
+        self._rows = None
+        self._names = None
+        self._words = None
+
+    @classmethod
+    def from_columnar(cls, path):
+        """Build the index from a columnar cache, reading only node names and identifiers."""
+        graph = ColumnarGraph(path)
+        names, identifiers = [], []
+        for row in range(graph.num_nodes):
+            data = graph.node_data(row) or {}
+            properties = data.get('properties', {})
+            names.append(properties.get('name'))
+            identifiers.append(properties.get('identifier'))
+        node_ids = [graph.node_id(row) for row in range(graph.num_nodes)]
+        return cls(node_ids, graph.node_type, graph.types, names, identifiers, graph.labels,
+                   graph.edge_src, graph.edge_dst, graph.edge_label)
+
+    @classmethod
+    def from_dump(cls, path):
+        """Build the index from a SPOKE dump (or columnar cache) in one pass."""
+        if is_columnar(path):
+            return cls.from_columnar(path)
+        node_ids, rows, node_type, names, identifiers = [], {}, [], [], []
+        types, type_index, labels, label_index = [], {}, [], {}
+        src, dst, label = [], [], []
+
+        def row_of(node_id):
+            if node_id not in rows:
+                rows[node_id] = len(node_ids)
+                node_ids.append(node_id)
+                node_type.append(-1)
+                names.append(None)
+                identifiers.append(None)
+            return rows[node_id]
+
+        for record in iter_spoke_records(path, desc="Indexing"):
+            if isinstance(record, SpokeNode):
+                row = row_of(record.id)
+                node_type[row] = _intern(types, type_index, record.labels[0] if record.labels else '')
+                names[row] = record.properties.get('name')
+                identifiers[row] = record.properties.get('identifier')
+            else:
+                src.append(row_of(record.start_id))
+                dst.append(row_of(record.end_id))
+                label.append(_intern(labels, label_index, record.label or ''))
+        return cls(node_ids, node_type, types, names, identifiers, labels,
+                   np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64), np.array(label, dtype=np.int32))
+
+    def save(self, path):
+        """Save the index to the directory ``path`` for fast startup with ``load``."""
+        os.makedirs(path, exist_ok=True)
+        src = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.out_offsets))
+        np.save(os.path.join(path, 'src.npy'), src)
+        np.save(os.path.join(path, 'dst.npy'), self.out_targets)
+        np.save(os.path.join(path, 'label.npy'), self.out_labels)
+        np.save(os.path.join(path, 'node_type.npy'), self.node_type)
+        with open(os.path.join(path, 'nodes.json'), 'w') as file:
+            json.dump({'ids': list(self.node_ids), 'names': self.names, 'identifiers': self.identifiers,
+                       'types': self.types, 'labels': self.labels}, file)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index written by ``save``."""
+        with open(os.path.join(path, 'nodes.json')) as file:
+            nodes = json.load(file)
+        load = lambda name: np.load(os.path.join(path, f'{name}.npy'))
+        return cls(nodes['ids'], load('node_type'), nodes['types'], nodes['names'], nodes['identifiers'],
+                   nodes['labels'], load('src'), load('dst'), load('label'))
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.out_targets)
+
+    def row(self, node_id):
+        """Return the row of a SPOKE node id (ids are kept as strings)."""
+        if self._rows is None:
+            self._rows = {node_id: row for row, node_id in enumerate(self.node_ids)}
+        return self._rows[str(node_id)]
+
+    def find(self, name, node_type=None):
+        """Return the rows whose name or identifier matches ``name``.
+
+        Exact (case-insensitive) matches win; otherwise nodes whose name
+        contains every word of ``name`` are returned, using an inverted
+        index from name words to rows built on first use.
+        """
+        if self._names is None:
+            self._names, self._words = {}, {}
+            for row, values in enumerate(zip(self.names, self.identifiers)):
+                for value in values:
+                    if value:
+                        self._names.setdefault(str(value).lower(), []).append(row)
+                for word in set(name_words(self.names[row])):
+                    self._words.setdefault(word, []).append(row)
+        type_id = self.type_index.get(node_type) if node_type else None
+        if node_type and type_id is None:
+            return np.array([], dtype=np.int64)
+        keep = lambda rows: [r for r in rows if type_id is None or self.node_type[r] == type_id]
+
+        rows = keep(self._names.get(name.strip().lower(), []))
+        if rows:
+            return np.array(sorted(set(rows)), dtype=np.int64)
+        postings = sorted((self._words.get(word, []) for word in set(name_words(name))), key=len)
+        if not postings or not postings[0]:
+            return np.array([], dtype=np.int64)
+        rows = np.asarray(postings[0], dtype=np.int64)  # Posting lists are in row order
+        for posting in postings[1:]:
+            rows = np.intersect1d(rows, posting, assume_unique=True)
+        if type_id is not None:
+            rows = rows[self.node_type[rows] == type_id]
+        return rows
+
+    def neighbors(self, rows, label=None, direction=OUT, node_type=None):
+        """Return the sorted unique neighbours of ``rows`` along ``label`` edges.
+
+        ``rows`` is a row or an array of rows, ``direction`` is ``OUT`` or
+        ``IN``, and ``node_type`` keeps only neighbours of that type.
+        """
+        offsets, labels, targets = ((self.out_offsets, self.out_labels, self.out_targets) if direction == OUT
+                                    else (self.in_offsets, self.in_labels, self.in_targets))
+        label_id = None
+        if label is not None:
+            label_id = self.label_index.get(label)
+            if label_id is None:
+                return np.array([], dtype=np.int64)
+        rows = np.atleast_1d(rows)
+        if len(rows) == 1:
+            # One node: the label's edges are a contiguous slice of its range
+            lo, hi = offsets[rows[0]], offsets[rows[0] + 1]
+            if label_id is not None:
+                segment = labels[lo:hi]
+                lo, hi = lo + np.searchsorted(segment, label_id, 'left'), lo + np.searchsorted(segment, label_id, 'right')
+            result = np.unique(targets[lo:hi])
+        else:
+            starts, counts = offsets[rows], offsets[rows + 1] - offsets[rows]
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            if label_id is not None:
+                positions = positions[labels[positions] == label_id]
+            result = np.unique(targets[positions])
+        if node_type is not None:
+            result = result[self.node_type[result] == self.type_index.get(node_type, -2)]
+        return result
+
+    def k_hop(self, rows, k, label=None, direction=OUT, node_type=None):
+        """Return the nodes reachable from ``rows`` in 1 to ``k`` hops (excluding ``rows``)."""
+        frontier = np.unique(np.atleast_1d(rows))
+        visited = frontier
+        for _ in range(k):
+            frontier = np.setdiff1d(self.neighbors(frontier, label, direction), visited, assume_unique=True)
+            if not len(frontier):
+                break
+            visited = np.union1d(visited, frontier)
+        result = np.setdiff1d(visited, np.atleast_1d(rows))
+        if node_type is not None:
+            result = result[self.node_type[result] == self.type_index.get(node_type, -2)]
+        return result
+
+    def intersect(self, *row_sets):
+        """Return the rows common to every set, e.g. genes shared by two diseases."""
+        result = np.asarray(row_sets[0])
+        for rows in row_sets[1:]:
+            result = np.intersect1d(result, rows)
+        return result
+
+    def describe(self, row):
+        """Return the id, type, identifier and name of a node row."""
+        type_id = int(self.node_type[row])
+        return {
+            'id': self.node_ids[row],
+            'type': self.types[type_id] if type_id >= 0 else None,
+            'identifier': self.identifiers[row],
+            'name': self.names[row],
+        }
+
+    def follow(self, start_rows, steps, limit=MAX_TEMPLATE_RESULTS):
+        """Enumerate up to ``limit`` paths from ``start_rows`` along (label, direction, type) steps."""
+        paths = [[int(row)] for row in start_rows]
+        for label, direction, node_type in steps:
+            paths = [path + [int(row)] for path in paths
+                     for row in self.neighbors(path[-1], label, direction, node_type)][:limit]
+        return paths
+
+def match_template(question):
+    """Return (template, entity name) for the first template matching ``question``, or None."""
+    for template in TEMPLATES:
+        match = re.search(template['pattern'], question, re.IGNORECASE)
+        if match:
+            return template, match.group('entity').strip()
+    return None
+
+def answer_template(graph, question, limit=MAX_TEMPLATE_RESULTS):
+    """Answer a template-matched question from the in-process graph.
+
+    Returns ``{'template': name, 'result': [...]}`` where every result row
+    maps each node type on the path (lower-cased) to its description, or
+    None when no template matches or nothing is found.
+    """
+    matched = match_template(question)
+    if matched is None:
+        return None
+    template, entity = matched
+    start_rows = graph.find(entity, template['start'])
+    paths = graph.follow(start_rows, template['steps'], limit)
+    if not paths:
+        return None
+    types = [template['start']] + [node_type for _, _, node_type in template['steps']]
+    result = [{node_type.lower(): graph.describe(row) for node_type, row in zip(types, path)} for path in paths]
+    return {'template': template['name'], 'result': result}
+
+if __name__ == "__main__":
+    # Example usage
+    dump_path = '/path/to/your/spoke_2023_human.json'
+    out_dir = '/path/to/your/spoke_2023_human.graph'
+    graph = SpokeGraph.from_dump(dump_path)
+    graph.save(out_dir)
+    print(f"Indexed {graph.num_nodes} nodes and {graph.num_edges} edges to {out_dir}")
+    print(answer_template(graph, "Which genes are associated with type 2 diabetes mellitus?"))
@@ -0,0 +1,84 @@
+import unittest
+from aql_guard import QueryLimits, QueryRejected, add_result_limit, check_query, guard_graph, plan_violations
+from benchmark_pipeline import FakeGraphDB, FakeLLM
+from qa_pipeline import execute_query_with_retries, run_aql
+
+NESTED_JOIN = "FOR d IN Nodes FOR g IN Nodes FILTER d.x == g.x RETURN g"
+NESTED_PLAN = {
+    'estimatedCost': 1e13,
+    'nodes': [{'type': 'EnumerateCollectionNode', 'collection': 'Nodes'},
+              {'type': 'EnumerateCollectionNode', 'collection': 'Nodes'}],
+}
+
+def plan_for(query):
+    return NESTED_PLAN if query.startswith(NESTED_JOIN[:30]) else {'nodes': [], 'estimatedCost': 10}
+
+class FakeArangoGraph:
+    """Stand-in for langchain's ArangoGraph, whose ``query`` the QA chain calls."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def query(self, query, top_k=None, **kwargs):
+        return list(self.db.aql.execute(query, **kwargs))[:top_k]
+
+class GraphChain:
+    """QA chain that runs queued AQL through ``graph.query``, like ArangoGraphQAChain."""
+    input_key = 'query'
+
+    def __init__(self, graph, queries):
+        self.graph = graph
+        self.queries = list(queries)
+        self.prompts = []
+
+    def invoke(self, inputs):
+        self.prompts.append(inputs[self.input_key])
+        aql_query = self.queries.pop(0)
+        return {'aql_query': aql_query, 'aql_result': self.graph.query(aql_query, 10)}
+
+class TestAQLGuard(unittest.TestCase):
+
+    def test_add_result_limit(self):
+        self.assertEqual(add_result_limit("FOR n IN Nodes RETURN n", 100), "FOR n IN Nodes LIMIT 100\nRETURN n")
+        nested = "FOR n IN Nodes LET e = (FOR x IN Edges RETURN x) RETURN {n, e}"
+        self.assertEqual(add_result_limit(nested, 5),
+                         "FOR n IN Nodes LET e = (FOR x IN Edges RETURN x) LIMIT 5\nRETURN {n, e}")
+        self.assertEqual(add_result_limit("FOR n IN Nodes LIMIT 3 RETURN n", 5), "FOR n IN Nodes LIMIT 3 RETURN n")
+        self.assertEqual(add_result_limit("FOR n IN Nodes FILTER n.name == 'x RETURN' RETURN n", 5),
+                         "FOR n IN Nodes FILTER n.name == 'x RETURN' LIMIT 5\nRETURN n")
+        self.assertEqual(add_result_limit("RETURN LENGTH(Nodes)", 5), "RETURN LENGTH(Nodes)")
+
+    def test_plan_violations(self):
+        self.assertEqual(plan_violations({'nodes': [], 'estimatedCost': 10}), [])
+        reasons = plan_violations(NESTED_PLAN)
+        self.assertEqual(len(reasons), 2)
+        self.assertIn("2 full collection scans (Nodes, Nodes)", reasons[1])
+        self.assertEqual(plan_violations(NESTED_PLAN, QueryLimits(max_cost=None, max_full_scans=None)), [])
+
+    def test_check_query(self):
+        db = FakeGraphDB(plan=plan_for)
+        query, options = check_query(db, "FOR n IN Nodes RETURN n", QueryLimits(result_limit=50, max_runtime=5))
+        self.assertEqual(query, "FOR n IN Nodes LIMIT 50\nRETURN n")
+        self.assertEqual(options, {'max_runtime': 5, 'memory_limit': 1 << 30})
+        with self.assertRaises(QueryRejected) as raised:
+            check_query(db, NESTED_JOIN)
+        self.assertIn("LIMIT 1000", raised.exception.query)
+
+        def broken(query):
+            raise ValueError("syntax error")
+        with self.assertRaisesRegex(QueryRejected, "EXPLAIN failed: syntax error"):
+            check_query(FakeGraphDB(plan=broken), "FOR")
+
+    def test_guarded_execution(self):
+        db = FakeGraphDB({"FOR n IN Nodes LIMIT 1000\nRETURN n": [{'name': 'TP53'}]}, plan=plan_for)
+        self.assertEqual(run_aql(db, "FOR n IN Nodes RETURN n", QueryLimits()), [{'name': 'TP53'}])
+        self.assertEqual(db.aql.options[-1], {'max_runtime': 60.0, 'memory_limit': 1 << 30})
+
+        chain = GraphChain(guard_graph(FakeArangoGraph(db), db), [NESTED_JOIN, "FOR n IN Nodes RETURN n"])
+        attempts, aql_query, aql_result, _ = execute_query_with_retries('question', chain, FakeLLM(), 3)
+        self.assertEqual((attempts, aql_result), (2, [{'name': 'TP53'}]))
+        self.assertTrue(chain.prompts[1].startswith("The prior AQL query was rejected: estimated cost"))
+        self.assertNotIn(NESTED_JOIN, db.aql.executed)
+
+if __name__ == '__main__':
+    unittest.main()
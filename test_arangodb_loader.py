@@ -1,6 +1,16 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import gzip
+import json
+import os
+import tempfile
 from arangodb_loader import ensure_collections, load_data_from_json, connect_to_arangodb, create_or_get_database, main
+from arangodb_loader import node_document, edge_document, bulk_load_data_from_json, edge_projection_savings
+from arangodb_loader import LABEL_LAYOUT, layout_indexes, register_named_graph
+from arangodb_loader import QUERY_INDEXES, check_indexes, ensure_indexes, existing_index_keys, index_main, missing_indexes
+from arangodb_loader import read_checkpoint, split_byte_ranges, iter_byte_range, load_byte_range, parallel_load_data_from_json
+from benchmark_loader import FakeDatabase, write_synthetic_spoke, time_load
+from pyArango.theExceptions import CreationError
 
 class TestArangoDBLoader(unittest.TestCase):
 
@@ -33,19 +43,17 @@ class TestArangoDBLoader(unittest.TestCase):
         mock_db.createCollection.assert_any_call(name="Nodes")
         mock_db.createCollection.assert_any_call(name="Edges", className="Edges", type=3)
 
-    @patch('arangodb_loader.open')
-    @patch('arangodb_loader.json.loads')
-    def test_load_data_from_json(self, mock_json_loads, mock_open):
+    def test_load_data_from_json(self):
         mock_db = MagicMock()
-        mock_file = MagicMock()
-        mock_open.return_value.__enter__.return_value = mock_file
-        mock_file.__iter__.return_value = ['line1', 'line2']
-        mock_json_loads.side_effect = [
-            {'type': 'node', 'id': '1'},
-            {'type': 'relationship', 'start': {'id': '1'}, 'end': {'id': '2'}}
-        ]
+        collections = {'Nodes': MagicMock(), 'Edges': MagicMock()}
+        mock_db.__getitem__.side_effect = collections.__getitem__
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'test.json')
+            with open(file_path, 'w') as file:
+                file.write('{"type": "node", "id": "1"}\n')
+                file.write('{"type": "relationship", "start": {"id": "1"}, "end": {"id": "2"}}\n')
 
-        nodes_added, edges_added = load_data_from_json('test.json', mock_db)
+            nodes_added, edges_added = load_data_from_json(file_path, mock_db)
 
         self.assertEqual(nodes_added, 1)
         self.assertEqual(edges_added, 1)
@@ -56,6 +64,88 @@ class TestArangoDBLoader(unittest.TestCase):
         total_create_document_calls = mock_db['Nodes'].createDocument.call_count + mock_db['Edges'].createDocument.call_count
         self.assertEqual(total_create_document_calls, 2)
 
+    def test_bulk_load_compressed_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 10, edges_per_node=2)
+            with open(file_path, 'rb') as file, gzip.open(file_path + '.gz', 'wb') as compressed:
+                compressed.write(file.read())
+            db = FakeDatabase()
+            nodes_added, edges_added = bulk_load_data_from_json(file_path + '.gz', db, batch_size=7)
+
+        self.assertEqual((nodes_added, edges_added), (10, 20))
+
+    def test_node_and_edge_documents(self):
+        node = {'type': 'node', 'id': 7, 'labels': ['Gene']}
+        self.assertEqual(node_document(node), {'type': 'node', 'id': 7, 'labels': ['Gene'], '_key': '7'})
+        edge = {'type': 'relationship', 'id': 3, 'label': 'ASSOCIATES_DaG', 'start': {'id': 1}, 'end': {'id': 2}}
+        self.assertEqual(edge_document(edge), {
+            '_from': 'Nodes/1', '_to': 'Nodes/2', '_key': '3', 'label': 'ASSOCIATES_DaG', 'start': {'id': 1}, 'end': {'id': 2},
+        })
+
+    def test_slim_edge_document(self):
+        edge = {
+            'type': 'relationship', 'id': 3, 'label': 'ASSOCIATES_DaG', 'properties': {'source': 'DisGeNET'},
+            'start': {'id': 1, 'labels': ['Disease'], 'properties': {'name': 'type 2 diabetes', 'mondo': 'x'}},
+            'end': {'id': 2, 'labels': ['Gene'], 'properties': {'name': 'TCF7L2'}},
+        }
+        self.assertEqual(edge_document(edge, ()), {
+            '_from': 'Nodes/1', '_to': 'Nodes/2', '_key': '3', 'label': 'ASSOCIATES_DaG',
+            'properties': {'source': 'DisGeNET'}, 'start': {'id': 1}, 'end': {'id': 2},
+        })
+        slim = edge_document(edge, ('labels', 'properties.name', 'properties.missing'))
+        self.assertEqual(slim['start'], {'id': 1, 'labels': ['Disease'], 'properties': {'name': 'type 2 diabetes'}})
+        self.assertEqual(slim['end'], {'id': 2, 'labels': ['Gene'], 'properties': {'name': 'TCF7L2'}})
+
+    def test_edge_projection_savings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 10, edges_per_node=2)
+            savings = edge_projection_savings(file_path, (), sample_size=5)
+
+        self.assertEqual(savings['edges_sampled'], 5)
+        self.assertLess(savings['slim_bytes_per_edge'], savings['full_bytes_per_edge'])
+        self.assertGreater(savings['bytes_saved_per_million'], 0)
+
+    def test_bulk_load_data_from_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 10, edges_per_node=2)
+            db = FakeDatabase()
+            nodes_added, edges_added = bulk_load_data_from_json(file_path, db, batch_size=4)
+
+        self.assertEqual((nodes_added, edges_added), (10, 20))
+        self.assertEqual(db['Nodes'].requests, 3)
+        self.assertEqual(db['Edges'].requests, 5)
+        self.assertEqual(db['Nodes'].docs['3']['_key'], '3')
+
+    def test_bulk_load_reports_duplicates_per_batch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 3, edges_per_node=0)
+            with open(file_path) as file:
+                lines = file.read()
+            with open(file_path, 'a') as file:
+                file.write(lines)
+            db = FakeDatabase()
+            with patch('arangodb_loader.tqdm.write') as mock_write:
+                nodes_added, _ = bulk_load_data_from_json(file_path, db, batch_size=10)
+
+        self.assertEqual(nodes_added, 3)
+        mock_write.assert_called_once_with("Nodes batch 1: 3 created, 3 duplicates, 0 errors")
+
+    def test_bulk_load_is_faster_than_per_document(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 100)
+            single = time_load(file_path, latency=0.002)
+            bulk = time_load(file_path, latency=0.002, batch_size=500)
+
+        self.assertEqual((single['nodes'], single['edges']), (bulk['nodes'], bulk['edges']))
+        self.assertEqual(single['requests'], 400)
+        self.assertEqual(bulk['requests'], 2)
+        self.assertLess(bulk['seconds'] * 10, single['seconds'])
+
     @patch('arangodb_loader.connect_to_arangodb')
     @patch('arangodb_loader.create_or_get_database')
     @patch('arangodb_loader.ensure_collections')
@@ -71,9 +161,310 @@ class TestArangoDBLoader(unittest.TestCase):
         mock_connect.assert_called_once_with('username', 'password')
         mock_create_or_get_db.assert_called_once()
         mock_ensure_collections.assert_called_once()
-        mock_load_data.assert_called_once_with('test.json', mock_create_or_get_db.return_value)
+        mock_load_data.assert_called_once_with('test.json', mock_create_or_get_db.return_value, batch_size=None,
+                                               checkpoint=None, resume=False, edge_projection=(),
+                                               layout='single', on_record=None)
         mock_print.assert_any_call("Total nodes added: 10")
         mock_print.assert_any_call("Total edges added: 20")
 
+    def test_missing_and_ensure_indexes(self):
+        db = FakeDatabase()
+        db['Edges'].ensureIndex('persistent', ['label'], name='idx_edges_label')
+
+        missing = missing_indexes(db)
+        self.assertEqual(len(missing), len(QUERY_INDEXES) - 1)
+        self.assertNotIn(("Edges", ["label"], "idx_edges_label"), missing)
+
+        created = ensure_indexes(db)
+        self.assertEqual(created, missing)
+        self.assertEqual(missing_indexes(db), [])
+        self.assertIn(["labels[*]"], [index['fields'] for index in db['Nodes'].indexes])
+        self.assertIn(["label", "_from"], [index['fields'] for index in db['Edges'].indexes])
+        self.assertEqual(ensure_indexes(db), [])
+
+    @patch('arangodb_loader.connect_to_arangodb')
+    @patch('arangodb_loader.create_or_get_database')
+    def test_index_main_reads_edge_collection_indexes(self, mock_create_or_get_db, mock_connect):
+        db = FakeDatabase()
+        mock_create_or_get_db.return_value = db
+        self.assertIn(('Edges', ('_from', '_to')), existing_index_keys(db, 'Edges'))
+        with patch('builtins.print'):
+            missing = index_main('spoke', 'username', 'password')
+        self.assertEqual(missing, QUERY_INDEXES)
+        self.assertEqual(index_main('spoke', 'username', 'password', check_only=False), QUERY_INDEXES)
+
+    def test_check_indexes(self):
+        db = FakeDatabase()
+        with patch('builtins.print') as mock_print:
+            missing = check_indexes(db)
+        self.assertEqual(missing, QUERY_INDEXES)
+        mock_print.assert_any_call("Missing index idx_edges_label_from on Edges: label, _from")
+
+    def test_split_byte_ranges(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 25)
+            with open(file_path, 'rb') as file:
+                lines = file.readlines()
+            ranges = split_byte_ranges(file_path, 7)
+            chunks = [list(iter_byte_range(file_path, start, end)) for start, end in ranges]
+
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], sum(len(line) for line in lines))
+        self.assertEqual([line for chunk in chunks for line in chunk], lines)
+
+    def test_split_byte_ranges_more_parts_than_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 1, edges_per_node=0)
+            ranges = split_byte_ranges(file_path, 8)
+        self.assertEqual(len(ranges), 1)
+
+    def test_load_byte_range_filters_record_types(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 5, edges_per_node=1)
+            db = FakeDatabase()
+            (start, end), = split_byte_ranges(file_path, 1)
+            report = load_byte_range(file_path, start, end, db, ('node',), batch_size=2)
+
+        self.assertEqual(report, {'nodes': 5, 'edges': 0, 'ignored': 0, 'errors': 0, 'edge_definitions': {}})
+        self.assertEqual(db['Edges'].requests, 0)
+
+    @patch('arangodb_loader.connect_to_arangodb')
+    def test_parallel_load_data_from_json(self, mock_connect):
+        db = FakeDatabase()
+        mock_connect.return_value = {'test_db': db}
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 20)
+            with patch('arangodb_loader.multiprocessing.Pool', DummyPool):
+                report = parallel_load_data_from_json(file_path, 'test_db', 'username', 'password',
+                                                      workers=3, batch_size=4)
+
+        self.assertEqual(report, {'nodes': 20, 'edges': 60, 'ignored': 0, 'errors': 0,
+                                  'edge_definitions': {'Edges': {'from': {'Nodes'}, 'to': {'Nodes'}}}})
+        mock_connect.assert_called_once_with('username', 'password')
+
+    @patch('arangodb_loader.connect_to_arangodb')
+    @patch('arangodb_loader.create_or_get_database')
+    @patch('arangodb_loader.ensure_collections')
+    @patch('arangodb_loader.parallel_load_data_from_json')
+    def test_main_parallel(self, mock_parallel_load, mock_ensure_collections, mock_create_or_get_db, mock_connect):
+        mock_parallel_load.return_value = {'nodes': 10, 'edges': 20, 'ignored': 1, 'errors': 0}
+
+        with patch('builtins.print') as mock_print:
+            main('test_db', 'test.json', 'username', 'password', workers=4, batch_size=100)
+
+        mock_parallel_load.assert_called_once_with('test.json', 'test_db', 'username', 'password',
+                                                   workers=4, batch_size=100, checkpoint=None, resume=False,
+                                                   edge_projection=(), layout='single')
+        mock_print.assert_any_call("Total nodes added: 10")
+        mock_print.assert_any_call("Duplicates skipped: 1")
+
+    def test_bulk_load_checkpoint_and_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            checkpoint = os.path.join(tmp, 'spoke.checkpoint')
+            write_synthetic_spoke(file_path, 10, edges_per_node=1)
+            db = FakeDatabase()
+            bulk_load_data_from_json(file_path, db, stop_at=6, batch_size=3, checkpoint=checkpoint)
+            offsets = read_checkpoint(checkpoint)['offsets']
+            with open(file_path, 'rb') as file:
+                first_six = sum(len(file.readline()) for _ in range(6))
+            self.assertEqual(list(offsets.values()), [first_six])
+
+            nodes_added, edges_added = bulk_load_data_from_json(file_path, db, batch_size=3,
+                                                                checkpoint=checkpoint, resume=True)
+
+        self.assertEqual((nodes_added, edges_added), (4, 10))
+        self.assertEqual(len(db['Nodes'].docs), 10)
+        self.assertEqual(len(db['Edges'].docs), 10)
+
+    def test_fresh_run_restarts_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            checkpoint = os.path.join(tmp, 'spoke.checkpoint')
+            write_synthetic_spoke(file_path, 10, edges_per_node=1)
+            bulk_load_data_from_json(file_path, FakeDatabase(), batch_size=3, checkpoint=checkpoint)
+
+            # A fresh run into a new database, stopped early, then resumed
+            db = FakeDatabase()
+            bulk_load_data_from_json(file_path, db, stop_at=6, batch_size=3, checkpoint=checkpoint)
+            nodes_added, edges_added = bulk_load_data_from_json(file_path, db, batch_size=3,
+                                                                checkpoint=checkpoint, resume=True)
+
+        self.assertEqual((nodes_added, edges_added), (4, 10))
+        self.assertEqual((len(db['Nodes'].docs), len(db['Edges'].docs)), (10, 10))
+
+    @patch('arangodb_loader.connect_to_arangodb')
+    def test_parallel_fresh_run_restarts_checkpoint(self, mock_connect):
+        mock_connect.return_value = {'test_db': FakeDatabase()}
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            checkpoint = os.path.join(tmp, 'spoke.checkpoint')
+            write_synthetic_spoke(file_path, 20)
+            with patch('arangodb_loader.multiprocessing.Pool', DummyPool):
+                for workers in (2, 3):
+                    parallel_load_data_from_json(file_path, 'test_db', 'username', 'password',
+                                                 workers=workers, batch_size=4, checkpoint=checkpoint)
+            with open(checkpoint) as file:
+                entries = [json.loads(line) for line in file]
+
+        # Only the second run's ranges and offsets are recorded
+        ranges = [entry['ranges'] for entry in entries if 'ranges' in entry]
+        self.assertEqual(len(ranges), 1)
+        starts = {tuple(r)[0] for r in ranges[0]}
+        self.assertTrue(all(entry['start'] in starts for entry in entries if 'start' in entry))
+
+    def test_resume_retries_rejected_batch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            checkpoint = os.path.join(tmp, 'spoke.checkpoint')
+            write_synthetic_spoke(file_path, 10, edges_per_node=1)
+            db = FakeDatabase()
+            import_bulk = db['Nodes'].importBulk
+            calls = []
+
+            def fail_first_batch(docs, **params):
+                calls.append(docs)
+                if len(calls) == 1:
+                    raise CreationError("Service Unavailable", {'code': 503})
+                return import_bulk(docs, **params)
+
+            db['Nodes'].importBulk = fail_first_batch
+            with patch('arangodb_loader.tqdm.write'):
+                bulk_load_data_from_json(file_path, db, batch_size=5, checkpoint=checkpoint)
+            self.assertEqual(len(db['Nodes'].docs), 5)
+            self.assertEqual(read_checkpoint(checkpoint)['offsets'], {})
+
+            with patch('arangodb_loader.tqdm.write'):
+                nodes_added, _ = bulk_load_data_from_json(file_path, db, batch_size=5, checkpoint=checkpoint,
+                                                          resume=True)
+            offsets = read_checkpoint(checkpoint)['offsets']
+            size = os.path.getsize(file_path)
+
+        self.assertEqual(nodes_added, 5)
+        self.assertEqual(len(db['Nodes'].docs), 10)
+        self.assertEqual(list(offsets.values()), [size])
+
+    def test_rerun_skips_existing_edges(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            write_synthetic_spoke(file_path, 4, edges_per_node=2)
+            db = FakeDatabase()
+            bulk_load_data_from_json(file_path, db, batch_size=100)
+            with patch('arangodb_loader.tqdm.write'):
+                nodes_added, edges_added = bulk_load_data_from_json(file_path, db, batch_size=100)
+
+        self.assertEqual((nodes_added, edges_added), (0, 0))
+        self.assertEqual(len(db['Edges'].docs), 8)
+
+    @patch('arangodb_loader.connect_to_arangodb')
+    def test_parallel_load_resume(self, mock_connect):
+        db = FakeDatabase()
+        mock_connect.return_value = {'test_db': db}
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            checkpoint = os.path.join(tmp, 'spoke.checkpoint')
+            write_synthetic_spoke(file_path, 20)
+            with patch('arangodb_loader.multiprocessing.Pool', DummyPool):
+                parallel_load_data_from_json(file_path, 'test_db', 'username', 'password',
+                                             workers=2, batch_size=4, checkpoint=checkpoint)
+                requests = db['Nodes'].requests + db['Edges'].requests
+                report = parallel_load_data_from_json(file_path, 'test_db', 'username', 'password',
+                                                      workers=2, batch_size=4, checkpoint=checkpoint, resume=True)
+
+        self.assertEqual(report, {'nodes': 0, 'edges': 0, 'ignored': 0, 'errors': 0, 'edge_definitions': {}})
+        self.assertEqual(db['Nodes'].requests + db['Edges'].requests, requests)
+        self.assertEqual(len(db['Edges'].docs), 60)
+
+    @patch('arangodb_loader.register_named_graph')
+    def test_bulk_load_per_label_layout(self, mock_register):
+        records = [
+            {'type': 'node', 'id': 1, 'labels': ['Disease'], 'properties': {'name': 'type 2 diabetes'}},
+            {'type': 'node', 'id': 2, 'labels': ['Gene'], 'properties': {'name': 'TCF7L2'}},
+            {'type': 'node', 'id': 3, 'labels': ['Pathway'], 'properties': {'name': 'Wnt signaling'}},
+            {'type': 'relationship', 'id': 10, 'label': 'ASSOCIATES_DaG', 'properties': {},
+             'start': {'id': 1, 'labels': ['Disease']}, 'end': {'id': 2, 'labels': ['Gene']}},
+            {'type': 'relationship', 'id': 11, 'label': 'PARTICIPATES_GpPW', 'properties': {},
+             'start': {'id': 2, 'labels': ['Gene']}, 'end': {'id': 3, 'labels': ['Pathway']}},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'spoke.json')
+            with open(file_path, 'w') as file:
+                file.writelines(json.dumps(record) + '\n' for record in records)
+            db = FakeDatabase()
+            nodes_added, edges_added = bulk_load_data_from_json(file_path, db, layout=LABEL_LAYOUT,
+                                                                edge_projection=())
+
+        self.assertEqual((nodes_added, edges_added), (3, 2))
+        self.assertEqual(set(db['Gene'].docs), {'2'})
+        self.assertEqual(db['ASSOCIATES_DaG'].docs['10']['_from'], 'Disease/1')
+        self.assertEqual(db['PARTICIPATES_GpPW'].docs['11']['_to'], 'Pathway/3')
+        self.assertEqual(db['Nodes'].docs, {})
+        mock_register.assert_called_once_with(db, {
+            'ASSOCIATES_DaG': {'from': {'Disease'}, 'to': {'Gene'}},
+            'PARTICIPATES_GpPW': {'from': {'Gene'}, 'to': {'Pathway'}},
+        })
+
+    def test_register_named_graph(self):
+        mock_db = MagicMock()
+        mock_db.getURL.return_value = 'http://localhost:8529/_db/spoke'
+        session = mock_db.connection.session
+        session.get.return_value.status_code = 404
+        session.post.return_value.status_code = 202
+
+        definitions = register_named_graph(mock_db, {'ASSOCIATES_DaG': {'from': {'Disease'}, 'to': {'Gene'}}})
+
+        self.assertEqual(definitions, [{'collection': 'ASSOCIATES_DaG', 'from': ['Disease'], 'to': ['Gene']}])
+        url, = session.post.call_args.args
+        self.assertEqual(url, 'http://localhost:8529/_db/spoke/gharial')
+        self.assertEqual(json.loads(session.post.call_args.kwargs['data']),
+                         {'name': 'spoke', 'edgeDefinitions': definitions})
+
+    def test_register_named_graph_extends_existing(self):
+        mock_db = MagicMock()
+        mock_db.getURL.return_value = 'http://localhost:8529/_db/spoke'
+        session = mock_db.connection.session
+        session.get.return_value.status_code = 200
+        session.get.return_value.json.return_value = {'graph': {'edgeDefinitions': [
+            {'collection': 'ASSOCIATES_DaG', 'from': ['Disease'], 'to': ['Gene']},
+        ]}}
+
+        register_named_graph(mock_db, {
+            'ASSOCIATES_DaG': {'from': {'Disease'}, 'to': {'Gene'}},
+            'TREATS_CtD': {'from': {'Compound'}, 'to': {'Disease'}},
+        })
+
+        session.post.assert_called_once()
+        self.assertEqual(session.post.call_args.args, ('http://localhost:8529/_db/spoke/gharial/spoke/edge',))
+        session.put.assert_not_called()
+
+    def test_layout_indexes(self):
+        indexes = layout_indexes([{'collection': 'ASSOCIATES_DaG', 'from': ['Disease'], 'to': ['Gene']}])
+        self.assertEqual(indexes, [
+            ('Disease', ['properties.name'], 'idx_disease_name'),
+            ('Disease', ['properties.identifier'], 'idx_disease_identifier'),
+            ('Gene', ['properties.name'], 'idx_gene_name'),
+            ('Gene', ['properties.identifier'], 'idx_gene_identifier'),
+        ])
+
+class DummyPool:
+    """In-process replacement for multiprocessing.Pool."""
+
+    def __init__(self, processes, initializer=None, initargs=()):
+        if initializer:
+            initializer(*initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def imap_unordered(self, func, iterable):
+        return map(func, iterable)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from batch_runner import RateLimiter, answer_with_backoff, completed_ids, read_questions, run_batch
+
+class RateLimitError(Exception):
+    status_code = 429
+
+def fake_answer(question):
+    return {'attempts': 1, 'aql_query': f'QUERY {question}', 'aql_result': [1, 2], 'scientific_story': 'story'}
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'answers.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as file:
+            file.write(text)
+        return path
+
+    def test_read_questions(self):
+        jsonl = self.write('q.jsonl', '{"id": 7, "question": "Which genes?"}\n"What treats asthma?"\n\n')
+        csv_path = self.write('q.csv', 'question,notes\nWhich genes?,x\n')
+        self.assertEqual(read_questions(jsonl), [{'id': '7', 'question': 'Which genes?'},
+                                                 {'id': 'What treats asthma?', 'question': 'What treats asthma?'}])
+        self.assertEqual(read_questions(csv_path), [{'id': 'Which genes?', 'question': 'Which genes?'}])
+
+    def test_bounded_concurrency_and_resume(self):
+        lock = threading.Lock()
+        running = [0, 0]  # Current and highest number of concurrent answers
+
+        def answer(question):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            if question == 'q3':
+                raise ValueError('no result')
+            return fake_answer(question)
+
+        questions = [{'id': f'q{i}', 'question': f'q{i}'} for i in range(8)]
+        summary = run_batch(questions, answer, self.output, workers=3)
+        self.assertEqual(summary, {'answered': 7, 'failed': 1, 'skipped': 0})
+        self.assertEqual(running[1], 3)
+        with open(self.output) as file:
+            records = {record['id']: record for record in map(json.loads, file)}
+        self.assertEqual((records['q0']['aql_query'], records['q0']['result_size']), ('QUERY q0', 2))
+        self.assertEqual(records['q3']['error'], 'ValueError: no result')
+        self.assertEqual(len(completed_ids(self.output)), 7)
+
+        # A second run only retries the failed question
+        summary = run_batch(questions, fake_answer, self.output, workers=3)
+        self.assertEqual(summary, {'answered': 1, 'failed': 0, 'skipped': 7})
+
+    def test_backoff_on_rate_limit(self):
+        calls = []
+
+        def answer(question):
+            calls.append(question)
+            if len(calls) < 3:
+                raise RateLimitError('Error code: 429')
+            return fake_answer(question)
+
+        response, retries = answer_with_backoff(answer, 'q', RateLimiter(), backoff=0)
+        self.assertEqual((response['attempts'], retries, len(calls)), (1, 2, 3))
+
+        def always_limited(question):
+            raise RateLimitError('Error code: 429')
+
+        with self.assertRaises(RateLimitError):
+            answer_with_backoff(always_limited, 'q', RateLimiter(), max_retries=1, backoff=0)
+        with self.assertRaises(KeyError):
+            answer_with_backoff(lambda question: {}['missing'], 'q', RateLimiter(), backoff=0)
+
+    def test_rate_limiter(self):
+        now = [0.0]
+        slept = []
+        limiter = RateLimiter(rate=2, clock=lambda: now[0], sleep=slept.append)
+        for _ in range(3):
+            limiter.wait()
+        limiter.pause(5)
+        limiter.wait()
+        self.assertEqual(slept, [0.5, 1.0, 5.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from arangodb_loader import LABEL_LAYOUT, main
+from benchmark_loader import FakeDatabase
+from entity_index import TRIGRAM_ANALYZER, EntityIndex, ensure_search_view, entity_prompt, mention_runs, normalize
+
+def node(node_id, label, name, identifier=None, synonyms=()):
+    properties = {'name': name, 'identifier': identifier or node_id}
+    if synonyms:
+        properties['synonyms'] = list(synonyms)
+    return {'type': 'node', 'id': node_id, 'labels': [label], 'properties': properties}
+
+RECORDS = [
+    node('d1', 'Disease', 'type 2 diabetes mellitus', 'DOID:9352', ['T2DM', 'adult-onset diabetes']),
+    node('d2', 'Disease', 'obesity', 'DOID:9970'),
+    node('g1', 'Gene', 'TCF7L2', '6934'),
+    node('g2', 'Gene', 'PPARG', '5468'),
+    node('c1', 'Compound', 'Metformin', 'DB00331', ['Glucophage']),
+    node('c2', 'Compound', 'obesity', 'C-obesity'),  # Shares a name with d2
+    node('d3', 'Disease', 'diabetes mellitus', 'DOID:9351', ['diabetes']),
+    node('g3', 'Gene', 'NAT2', '10'),  # Entrez id 10
+    {'type': 'relationship', 'id': 'e1', 'label': 'ASSOCIATES_DaG', 'properties': {},
+     'start': {'id': 'd1'}, 'end': {'id': 'g1'}},
+]
+
+class TestEntityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dump = os.path.join(self.tmp.name, 'spoke.json')
+        with open(self.dump, 'w') as file:
+            for record in RECORDS:
+                file.write(json.dumps(record) + '\n')
+        self.index = EntityIndex.from_dump(self.dump)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ids(self, candidates):
+        return [candidate['_id'] for candidate in candidates]
+
+    def test_normalize_and_mention_runs(self):
+        self.assertEqual(normalize('  Type-2 Diabétes, MELLITUS '), 'type 2 diabetes mellitus')
+        self.assertEqual(mention_runs('Which genes are associated with type 2 diabetes and TCF7L2?'),
+                         [['type', '2', 'diabetes'], ['tcf7l2']])
+
+    def test_exact_and_fuzzy_lookup(self):
+        index = self.index
+        self.assertEqual(len(index.node_ids), 8)
+        self.assertEqual(index.lookup('Type 2 Diabetes Mellitus'),
+                         [{'_id': 'Nodes/d1', 'type': 'Disease', 'name': 'type 2 diabetes mellitus', 'score': 1.0}])
+        self.assertEqual(self.ids(index.lookup('glucophage')), ['Nodes/c1'])
+        self.assertEqual(self.ids(index.lookup('DOID:9352')), ['Nodes/d1'])
+
+        fuzzy = index.lookup('type 2 diabetes mellitis')
+        self.assertEqual(self.ids(fuzzy), ['Nodes/d1'])
+        self.assertTrue(0.75 <= fuzzy[0]['score'] < 1)
+        self.assertEqual(index.lookup('asthma'), [])
+
+    def test_lookup_by_type(self):
+        index = self.index
+        self.assertEqual(sorted(self.ids(index.lookup('obesity'))), ['Nodes/c2', 'Nodes/d2'])
+        self.assertEqual(self.ids(index.lookup('obesity', node_type='Disease')), ['Nodes/d2'])
+        self.assertEqual(index.lookup('obesity', node_type='Pathway'), [])
+        self.assertEqual(index.lookup('metformin', node_type='Gene'), [])
+
+    def test_resolve_question(self):
+        resolved = self.index.resolve('Does metformin treat type 2 diabetes mellitus or obesity via PPARG?')
+        self.assertEqual([entity['mention'] for entity in resolved],
+                         ['metformin', 'type 2 diabetes mellitus', 'obesity', 'pparg'])
+        self.assertEqual(self.ids(resolved[-1]['candidates']), ['Nodes/g2'])
+
+        # A run without an exact name is matched fuzzily as a whole
+        resolved = self.index.resolve('Which genes are associated with type 2 diabetes melitus?')
+        self.assertEqual([entity['mention'] for entity in resolved], ['type 2 diabetes melitus'])
+        self.assertEqual(self.ids(resolved[0]['candidates'])[0], 'Nodes/d1')
+        self.assertEqual(self.index.resolve('Which genes are associated with it?'), [])
+
+    def test_resolve_prefers_whole_runs_and_skips_numbers(self):
+        resolved = self.index.resolve('Which genes are associated with type 2 diabetes?')
+        self.assertEqual([(entity['mention'], self.ids(entity['candidates'])) for entity in resolved],
+                         [('type 2 diabetes', ['Nodes/d1'])])
+        self.assertEqual(self.ids(self.index.resolve('What is associated with diabetes?')[0]['candidates']),
+                         ['Nodes/d3'])
+
+        resolved = self.index.resolve('What are the top 10 genes associated with obesity?')
+        self.assertEqual([entity['mention'] for entity in resolved], ['obesity'])
+        # A bare number still matches when it is the whole mention
+        self.assertEqual(self.ids(self.index.resolve('Which diseases involve gene 10?')[0]['candidates']),
+                         ['Nodes/g3'])
+
+    def test_save_load_and_layout(self):
+        path = os.path.join(self.tmp.name, 'entities')
+        self.index.save(path)
+        loaded = EntityIndex.load(path)
+        self.assertEqual(loaded.lookup('T2DM'), self.index.lookup('T2DM'))
+        self.assertEqual(loaded.lookup('metformn'), self.index.lookup('metformn'))
+
+        per_label = EntityIndex.from_dump(self.dump, LABEL_LAYOUT)
+        self.assertEqual(self.ids(per_label.lookup('TCF7L2')), ['Gene/g1'])
+
+    def test_entity_prompt(self):
+        prompt = entity_prompt(self.index.resolve('What treats T2DM?'))
+        self.assertIn('<Resolved Entities>', prompt)
+        self.assertIn('"t2dm": Nodes/d1 (Disease: type 2 diabetes mellitus)', prompt)
+        self.assertEqual(entity_prompt([]), '')
+        self.assertEqual(entity_prompt([{'mention': 'x', 'candidates': []}]), '')
+
+    @patch('arangodb_loader.connect_to_arangodb')
+    @patch('arangodb_loader.create_or_get_database')
+    def test_loader_builds_index_in_the_load_pass(self, mock_create_or_get_db, mock_connect):
+        mock_create_or_get_db.return_value = FakeDatabase()
+        path = os.path.join(self.tmp.name, 'entities')
+        with patch('entity_index.iter_spoke_records', side_effect=AssertionError("second pass")), \
+                patch('builtins.print'):
+            main('spoke', self.dump, 'username', 'password', batch_size=4, build_indexes=False, entity_index=path)
+
+        loaded = EntityIndex.load(path)
+        self.assertEqual(loaded.node_ids, self.index.node_ids)
+        self.assertEqual(loaded.lookup('glucophage'), self.index.lookup('glucophage'))
+
+    def test_ensure_search_view(self):
+        db = MagicMock()
+        db.getURL.return_value = 'http://localhost:8529/_db/spoke/_api'
+        session = db.connection.session
+        session.get.return_value.json.return_value = {'result': []}
+        session.post.return_value.status_code = 201
+
+        ensure_search_view(db, ['Disease', 'Gene'])
+        (analyzer_url,), analyzer = session.post.call_args_list[0]
+        (view_url,), view = session.post.call_args_list[1]
+        self.assertEqual(analyzer_url, 'http://localhost:8529/_db/spoke/_api/analyzer')
+        self.assertEqual(json.loads(analyzer['data'])['name'], TRIGRAM_ANALYZER)
+        self.assertEqual(view_url, 'http://localhost:8529/_db/spoke/_api/view')
+        self.assertEqual(sorted(json.loads(view['data'])['links']), ['Disease', 'Gene'])
+
+        # An existing analyzer is kept and an existing view gets the new links
+        session.reset_mock()
+        session.get.return_value.json.return_value = {'result': [{'name': f'spoke::{TRIGRAM_ANALYZER}'},
+                                                                 {'name': 'NodeSearch'}]}
+        session.patch.return_value.status_code = 200
+        ensure_search_view(db, ['Compound'])
+        session.post.assert_not_called()
+        (url,), _ = session.patch.call_args
+        self.assertEqual(url, 'http://localhost:8529/_db/spoke/_api/view/NodeSearch/properties')
+
+if __name__ == '__main__':
+    unittest.main()
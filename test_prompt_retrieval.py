@@ -0,0 +1,52 @@
+import os
+import re
+import tempfile
+import unittest
+from prompt_retrieval import BM25, build_prompt_index, parse_few_shot, split_edge_label
+from prompts_openai import available_edge_labels, base_prompt, few_shot
+
+def section(prompt, name):
+    return re.search(f'<{name}>(.*?)</{name}>', prompt, re.S).group(1)
+
+class TestPromptRetrieval(unittest.TestCase):
+
+    def test_split_edge_label(self):
+        self.assertEqual(split_edge_label('ASSOCIATES_DaG'), ('associates', 'Disease', 'Gene'))
+        self.assertEqual(split_edge_label('REDUCES_SEN_mGrsC'), ('reduces sen', 'Gene', 'Compound'))
+        self.assertEqual(split_edge_label('INTERACTS_PDiPD'), ('interacts', 'ProteinDomain', 'ProteinDomain'))
+        for label in available_edge_labels.split():
+            self.assertNotIn(None, split_edge_label(label)[1:], label)
+
+    def test_bm25(self):
+        index = BM25(["gene disease association", "compound treats disease", "protein binds compound"])
+        self.assertEqual(index.top("Which drugs treat diseases?", 1), [1])
+        self.assertEqual(index.top("unrelated words", 3), [])
+
+    def test_prompt_contains_only_relevant_labels(self):
+        index = build_prompt_index()
+        self.assertEqual(len(parse_few_shot(few_shot)), 2)
+        prompt = index.prompt("What diseases does the compound metformin treat?", edge_k=3)
+        labels = section(prompt, 'Available Edge Labels').splitlines()
+        self.assertEqual(len(labels), 3)
+        self.assertIn("TREATS_CtD: Compound -> Disease", labels)
+        self.assertIn("Compound", section(prompt, 'Relevant Node Types'))
+        self.assertEqual(prompt.count('<Example Question'), 1)
+        self.assertLess(len(prompt), len(base_prompt))
+
+    def test_example_library(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'examples.jsonl')
+            index = build_prompt_index(examples_path=path)
+            index.add_example("Which side effects does aspirin cause?", "FOR c IN Nodes RETURN c")
+            prompt = build_prompt_index(examples_path=path).prompt("What side effects can ibuprofen cause?")
+            self.assertIn("Which side effects does aspirin cause?", section(prompt, 'Example Few-Shot'))
+
+    def test_per_label_layout(self):
+        edge_definitions = [{'collection': 'ASSOCIATES_DaG', 'from': ['Disease'], 'to': ['Gene']},
+                            {'collection': 'PARTICIPATES_GpPW', 'from': ['Gene'], 'to': ['Pathway']}]
+        prompt = build_prompt_index(edge_definitions).prompt("Which pathways does BRCA1 participate in?", edge_k=1)
+        self.assertEqual(section(prompt, 'Available Edge Labels'), "PARTICIPATES_GpPW: Gene -> Pathway")
+        self.assertIn("OUTBOUND", section(prompt, 'Example Few-Shot'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from prompts_openai import base_prompt, build_base_prompt, build_available_edge_labels, build_graph_info, graph_info
+
+EDGE_DEFINITIONS = [
+    {'collection': 'ASSOCIATES_DaG', 'from': ['Disease'], 'to': ['Gene']},
+    {'collection': 'PARTICIPATES_GpPW', 'from': ['Gene'], 'to': ['Pathway']},
+]
+
+class TestPromptsOpenAI(unittest.TestCase):
+
+    def test_single_layout_prompt(self):
+        self.assertEqual(build_graph_info(), graph_info)
+        self.assertEqual(build_base_prompt(), base_prompt)
+
+    def test_per_label_layout_prompt(self):
+        info = build_graph_info(EDGE_DEFINITIONS)
+        self.assertIn("Disease, Gene, Pathway", info)
+        self.assertIn("named graph `spoke`", info)
+        self.assertEqual(build_available_edge_labels(EDGE_DEFINITIONS),
+                         "ASSOCIATES_DaG: Disease -> Gene\nPARTICIPATES_GpPW: Gene -> Pathway")
+        prompt = build_base_prompt(EDGE_DEFINITIONS)
+        self.assertIn("OUTBOUND disease ASSOCIATES_DaG", prompt)
+        self.assertNotIn("FOR edge IN Edges", prompt)
+
+if __name__ == '__main__':
+    unittest.main()
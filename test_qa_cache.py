@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from aql_guard import QueryLimits
+from benchmark_pipeline import FakeGraphDB
+from qa_cache import LRUCache, QACache, cache_answer, cached_attempts, database_revision, normalize_question
+from qa_pipeline import run_aql
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestQACache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lru_and_ttl(self):
+        cache = LRUCache(max_entries=2, ttl=60, clock=self.clock)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)  # Evicts 'b', the least recently used
+        self.assertIsNone(cache.get('b'))
+        self.clock.now += 61
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 2, 'evictions': 1, 'expired': 1, 'stale': 0})
+
+    def test_normalize_question(self):
+        self.assertEqual(normalize_question("  What genes   cause Obesity? "), "what genes cause obesity")
+
+    def test_revision_invalidation(self):
+        db = FakeGraphDB()
+        cache = QACache(revision=lambda: database_revision(db), revision_interval=10, clock=self.clock)
+        cache.put_aql("Which genes?", 'FOR n IN Nodes RETURN n', 'story')
+        self.assertEqual(cache.get_aql("which genes"), {'aql_query': 'FOR n IN Nodes RETURN n', 'scientific_story': 'story'})
+
+        db.collection('Edges').revision_number += 1
+        self.assertIsNotNone(cache.get_aql("which genes"))  # Revision not re-checked yet
+        self.clock.now += 10
+        self.assertIsNone(cache.get_aql("which genes"))
+        self.assertEqual(cache.stats()['question']['stale'], 1)
+
+    def test_disk_store_survives_restart(self):
+        path = os.path.join(self.tmp.name, 'cache.sqlite')
+        cache = QACache(path, clock=self.clock)
+        cache.put_result('FOR n IN Nodes RETURN n', [{'name': "Alzheimer's disease"}])
+        cache.store.close()
+
+        cache = QACache(path, clock=self.clock)
+        self.assertEqual(cache.get_result('FOR n IN Nodes RETURN n'), [{'name': "Alzheimer's disease"}])
+        self.assertEqual(cache.stats()['result']['disk_hits'], 1)
+        self.clock.now += 25 * 60 * 60
+        cache.levels['result'].clear()
+        self.assertIsNone(cache.get_result('FOR n IN Nodes RETURN n'))
+        cache.store.close()
+
+    def test_cached_attempts(self):
+        cache = QACache(clock=self.clock)
+        attempts = lambda: iter([(1, None), (1, {'aql_query': 'Q', 'aql_result': [1]})])
+        self.assertEqual(list(cached_attempts(cache, "Which genes?", attempts)), list(attempts()))
+
+        cache.put_result('Q', [1])
+        cache.put_aql("Which genes?", 'Q', 'story')
+        self.assertEqual(list(cached_attempts(cache, "which genes", attempts)),
+                         [(0, {'aql_query': 'Q', 'aql_result': [1], 'scientific_story': 'story'})])
+
+        # With the result gone, the cached AQL is re-run, skipping generation
+        aql_query = 'FOR n IN Nodes RETURN n'
+        db = FakeGraphDB({aql_query: [{'gene': 'PPARG'}]})
+        cache_answer(cache, "Which genes?", 2, aql_query, [{'gene': 'PPARG'}], 'story')
+        cache.levels['result'].clear()
+        self.assertEqual(list(cached_attempts(cache, "Which genes?", attempts, lambda query: run_aql(db, query))),
+                         [(0, None), (0, {'aql_query': aql_query, 'aql_result': [{'gene': 'PPARG'}]})])
+        self.assertEqual(db.aql.executed, [aql_query])
+
+        # Empty answers are not cached
+        cache_answer(cache, "Other?", 3, 'Q', [], None)
+        self.assertIsNone(cache.get_aql("Other?"))
+
+    def test_cached_aql_failure_falls_back_to_generation(self):
+        cache = QACache(clock=self.clock)
+        cache.put_aql("Which genes?", 'FOR n IN Nodes RETURN n', 'story')
+        attempts = lambda: iter([(1, {'aql_query': 'Q', 'aql_result': [1]})])
+        db = FakeGraphDB(plan=lambda query: {'nodes': [], 'estimatedCost': 1e9})  # Rejected by the guardrails
+        with patch('builtins.print') as mock_print:
+            events = list(cached_attempts(cache, "Which genes?", attempts,
+                                          lambda query: run_aql(db, query, QueryLimits())))
+        self.assertEqual(events, [(0, None), (1, {'aql_query': 'Q', 'aql_result': [1]})])
+        self.assertIn("Cached AQL failed", mock_print.call_args[0][0])
+        self.assertEqual(db.aql.executed, [])
+
+        def unavailable(query):
+            raise ConnectionError("ArangoDB is unavailable")
+
+        with patch('builtins.print'):
+            events = list(cached_attempts(cache, "Which genes?", attempts, unavailable))
+        self.assertEqual(events[-1], (1, {'aql_query': 'Q', 'aql_result': [1]}))
+
+if __name__ == '__main__':
+    unittest.main()
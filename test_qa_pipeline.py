@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from benchmark_pipeline import FakeLLM, FakeQAChain, answer_after
+from qa_pipeline import (CANDIDATE_HINTS, FAILURE_MESSAGE, execute_aql, execute_query_with_retries, iter_attempts,
+                         sequential_chain, speculative_query, stream_answer)
+
+class TestQAPipeline(unittest.TestCase):
+
+    def test_structured_result_is_not_reparsed(self):
+        result = [{'name': "Alzheimer's disease", 'note': 'line one\nline two'}]
+        response = execute_aql('question', FakeQAChain([result]))
+        self.assertEqual(response, {'aql_query': 'QUERY 1', 'aql_result': result})
+
+    def test_sequential_chain_interprets_results(self):
+        llm = FakeLLM()
+        response = sequential_chain('question', FakeQAChain([[{'gene': 'PPARG'}]]), llm, 'user question')
+        self.assertEqual(response['scientific_story'], 'story')
+        self.assertIn('user question', llm.prompts[0])
+
+        response = sequential_chain('question', FakeQAChain([None]), llm)
+        self.assertEqual(response['aql_result'], [])
+        self.assertNotIn('scientific_story', response)
+        self.assertEqual(len(llm.prompts), 1)
+
+    def test_retries_until_result(self):
+        chain = FakeQAChain([[], [], [{'gene': 'PPARG'}]])
+        attempts, aql_query, aql_result, story = execute_query_with_retries('question', chain, FakeLLM(), 5)
+        self.assertEqual((attempts, aql_query, aql_result, story), (3, 'QUERY 3', [{'gene': 'PPARG'}], 'story'))
+        self.assertEqual(chain.queries[2], f'{FAILURE_MESSAGE} {FAILURE_MESSAGE} question')
+
+        attempts, _, aql_result, story = execute_query_with_retries('question', FakeQAChain([[], []]), FakeLLM(), 2)
+        self.assertEqual((attempts, aql_result, story), (2, [], None))
+
+    def test_retry_time_budget(self):
+        chain = FakeQAChain([[], [], []], latency=0.05)
+        attempts, _, aql_result, _ = execute_query_with_retries('question', chain, FakeLLM(), 3, time_budget=0.01)
+        self.assertEqual((attempts, aql_result), (1, []))
+
+    def test_speculative_first_result_wins(self):
+        slow = FakeQAChain(lambda query: [{'gene': 'slow'}], latency=0.5)
+        fast = FakeQAChain(lambda query: [{'gene': 'fast'}], latency=0.01)
+        llm = FakeLLM()
+        start = time.perf_counter()
+        attempts, aql_query, aql_result, story = speculative_query('question', [slow, fast], llm, 4, 'user question')
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual((attempts, aql_result, story), (2, [{'gene': 'fast'}], 'story'))
+        self.assertEqual(fast.queries, [CANDIDATE_HINTS[1] + 'question'])
+        self.assertEqual(len(llm.prompts), 1)
+
+    def test_speculative_rounds_and_budgets(self):
+        chain = FakeQAChain(answer_after(3, [{'gene': 'PPARG'}]))
+        attempts, _, aql_result, _ = speculative_query('question', [chain] * 2, FakeLLM(), 10)
+        self.assertEqual((attempts, aql_result), (4, [{'gene': 'PPARG'}]))
+        self.assertTrue(chain.queries[-1].endswith(f'{FAILURE_MESSAGE} question'))
+
+        chain = FakeQAChain(lambda query: [])
+        attempts, _, aql_result, story = speculative_query('question', [chain] * 3, FakeLLM(), 5)
+        self.assertEqual((attempts, aql_result, story), (5, [], None))
+
+        chain = FakeQAChain(lambda query: [], latency=0.2)
+        start = time.perf_counter()
+        attempts, _, aql_result, _ = speculative_query('question', [chain] * 2, FakeLLM(), 10, time_budget=0.05)
+        self.assertLess(time.perf_counter() - start, 0.15)
+        self.assertEqual((attempts, aql_result), (2, []))
+
+    def test_speculative_candidate_errors(self):
+        def rate_limited(query):
+            raise RuntimeError('Error code: 429')
+
+        failing = FakeQAChain(rate_limited)
+        with self.assertRaisesRegex(RuntimeError, '429'):
+            speculative_query('question', [failing] * 2, FakeLLM(), 4)
+
+        # A failed candidate is skipped while another one in the round responds
+        working = FakeQAChain(lambda query: [{'gene': 'PPARG'}], latency=0.01)
+        attempts, _, aql_result, _ = speculative_query('question', [failing, working], FakeLLM(), 4)
+        self.assertEqual((attempts, aql_result), (2, [{'gene': 'PPARG'}]))
+
+    def test_speculative_reuses_executors(self):
+        threads = [set(), set()]
+        chains = [FakeQAChain(lambda query, i=i: threads[i].add(threading.current_thread().name) or [])
+                  for i in range(2)]
+        executors = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'candidate{i}') for i in range(2)]
+        for _ in range(3):
+            speculative_query('question', chains, FakeLLM(), 4, executors=executors)
+
+        # Every request ran each chain on that chain's own thread
+        self.assertEqual(threads, [{'candidate0_0'}, {'candidate1_0'}])
+        self.assertEqual(executors[0].submit(lambda: 'open').result(), 'open')
+        for executor in executors:
+            executor.shutdown()
+
+    def test_stream_answer(self):
+        llm = FakeLLM('PPARG regulates adipogenesis.')
+        chain = FakeQAChain([[], [{'gene': 'PPARG'}]])
+        completed = []
+        snapshots = list(stream_answer('question', iter_attempts('question', chain, 3), llm,
+                                       on_complete=lambda *answer: completed.append(answer)))
+
+        self.assertTrue(snapshots[0].startswith('*Generating and executing AQL (attempt 1)...*'))
+        self.assertTrue(snapshots[1].startswith('*Generating and executing AQL (attempt 2)...*'))
+        self.assertIn('Result Preview (1 rows)', snapshots[2])
+        self.assertIn('"gene": "PPARG"', snapshots[2])
+        self.assertTrue(snapshots[3].endswith('LLM Interpretation:\nPPARG '))
+        self.assertFalse(snapshots[-1].startswith('*'))
+        self.assertTrue(snapshots[-1].endswith('LLM Interpretation:\nPPARG regulates adipogenesis.'))
+        self.assertEqual(completed, [(2, 'QUERY 2', [{'gene': 'PPARG'}], 'PPARG regulates adipogenesis.')])
+
+    def test_stream_answer_without_result(self):
+        llm = FakeLLM()
+        snapshots = list(stream_answer('question', iter_attempts('question', FakeQAChain([[]]), 1), llm))
+        self.assertTrue(snapshots[-1].endswith('LLM Interpretation:\nNone'))
+        self.assertEqual(llm.prompts, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from benchmark_pipeline import FakeLLM
+from qa_pipeline import interpret_aql_result
+from result_compaction import compact_result, count_tokens, to_text
+
+def gene(i):
+    return {'_id': f'Nodes/{i}', '_key': str(i), 'labels': ['Gene'],
+            'properties': {'name': f'GENE{i}', 'identifier': i, 'description': 'x' * 200}}
+
+def association(disease, i):
+    return {'_id': f'Edges/{i}', '_from': disease['_id'], '_to': f'Nodes/{i}', 'label': 'ASSOCIATES_DaG',
+            'properties': {'sources': ['DISEASES']}, 'start': disease, 'end': gene(i)}
+
+DISEASE = {'_id': 'Nodes/d1', 'labels': ['Disease'], 'properties': {'name': 'type 2 diabetes mellitus'}}
+
+class TestResultCompaction(unittest.TestCase):
+
+    def test_small_results_are_untouched(self):
+        result = [{'name': 'PPARG'}]
+        compacted, report = compact_result(result, 100)
+        self.assertIs(compacted, result)
+        self.assertEqual(report['saved_tokens'], 0)
+
+    def test_projection_dedup_and_grouping(self):
+        result = [{'disease': DISEASE, 'gene': gene(i), 'edge': association(DISEASE, i)} for i in range(3)]
+        compacted, report = compact_result(result, 200)
+
+        self.assertEqual(compacted['entities'][0],
+                         {'id': 'Nodes/d1', 'type': 'Disease', 'name': 'type 2 diabetes mellitus'})
+        self.assertEqual(len(compacted['entities']), 4)
+        self.assertEqual(compacted['rows'][0], {'disease': 'Nodes/d1', 'gene': 'Nodes/0',
+                                                'edge': ['ASSOCIATES_DaG', 'Nodes/d1', 'Nodes/0']})
+        self.assertEqual(len(compacted['relationships']['ASSOCIATES_DaG']), 3)
+        self.assertNotIn('omitted', compacted)
+        self.assertEqual(report['saved_tokens'], report['original_tokens'] - report['compacted_tokens'])
+        self.assertGreater(report['saved_tokens'], 0)
+
+    def test_budget_keeps_top_k_and_counts_the_rest(self):
+        result = [{'gene': gene(i % 50), 'pathway': {'_id': f'Nodes/p{i % 3}', 'labels': ['Pathway']}}
+                  for i in range(1000)]
+        for budget in (500, 2000):
+            compacted, report = compact_result(result, budget)
+            self.assertLessEqual(report['compacted_tokens'], budget)
+            self.assertEqual(report['compacted_tokens'], count_tokens(to_text(compacted)))
+            self.assertEqual(len(compacted['rows']) + compacted['omitted']['rows'], 1000)
+            # The pathways are referenced most often, so they are kept first
+            self.assertEqual({e['id'] for e in compacted['entities'][:3]}, {'Nodes/p0', 'Nodes/p1', 'Nodes/p2'})
+
+    def test_interpretation_prompt_is_bounded(self):
+        llm = FakeLLM()
+        result = [{'gene': gene(i)} for i in range(2000)]
+        interpret_aql_result(result, llm, 'question', token_budget=1000)
+        interpret_aql_result(result, llm, 'question', token_budget=None)
+        self.assertLess(count_tokens(llm.prompts[0]), 2000)
+        self.assertGreater(count_tokens(llm.prompts[1]), 100000)
+
+if __name__ == '__main__':
+    unittest.main()
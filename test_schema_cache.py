@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmark_pipeline import FakeGraphDB
+from schema_cache import cached_schema, schema_key
+from serving import Lazy, health
+
+class TestSchemaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'graph_schema.json')
+        self.db = FakeGraphDB()
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self):
+        self.calls.append(1)
+        return {'Graph Schema': [], 'Collection Schema': [{'collection_name': 'Nodes'}]}
+
+    def test_reused_until_database_changes(self):
+        schema = cached_schema(self.db, self.generate, self.path)
+        self.assertEqual(cached_schema(self.db, self.generate, self.path), schema)
+        self.assertEqual(len(self.calls), 1)
+
+        self.db.collection('Nodes').revision_number += 1
+        cached_schema(self.db, self.generate, self.path)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_version_mismatch_and_corrupt_file(self):
+        key = dict(schema_key(self.db), version=0)
+        with open(self.path, 'w') as file:
+            json.dump({'key': key, 'schema': {}}, file)
+        cached_schema(self.db, self.generate, self.path)
+        with open(self.path, 'w') as file:
+            file.write('{not json')
+        cached_schema(self.db, self.generate, self.path)
+        self.assertEqual(len(self.calls), 2)
+        cached_schema(self.db, self.generate, self.path)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_lazy_retries_after_failure(self):
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError('database unavailable')
+            return 'db'
+
+        resource = Lazy(connect)
+        self.assertEqual(health({'db': resource}), {'db': {'ready': False, 'seconds': None, 'error': None}})
+        status = health({'db': resource}, warm=True)['db']
+        self.assertEqual(status['error'], 'ConnectionError: database unavailable')
+        self.assertEqual(resource.get(), 'db')
+        self.assertEqual(resource.get(), 'db')
+        self.assertEqual((len(attempts), resource.status()['ready'], resource.status()['error']), (2, True, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+import unittest
+from serving import AnswerServer, ClientPool, ServerBusy
+
+def slow_answer(text, delay=0.1):
+    for stage in ('started', 'done'):
+        time.sleep(delay / 2)
+        yield f'{text} {stage}'
+
+async def collect(server, text, delay=0.1):
+    return [item async for item in server.stream(slow_answer, text, delay)]
+
+async def collect_all(server, count, delay=0.1):
+    return await asyncio.gather(*(collect(server, str(i), delay) for i in range(count)), return_exceptions=True)
+
+class TestServing(unittest.TestCase):
+
+    def test_streams_generator_items(self):
+        server = AnswerServer(workers=2)
+        self.assertEqual(asyncio.run(collect(server, 'q', 0)), ['q started', 'q done'])
+        self.assertEqual(server.stats()['served'], 1)
+
+    def test_throughput_scales_with_workers(self):
+        timings = {}
+        for workers in (1, 4):
+            server = AnswerServer(workers=workers)
+            start = time.perf_counter()
+            results = asyncio.run(collect_all(server, 4))
+            timings[workers] = time.perf_counter() - start
+            self.assertEqual(results[3], ['3 started', '3 done'])
+        self.assertGreater(timings[1], 0.35)
+        self.assertLess(timings[4], 0.25)
+
+    def test_queue_depth(self):
+        server = AnswerServer(workers=1, queue_depth=1)
+        results = asyncio.run(collect_all(server, 3, 0.05))
+        self.assertEqual(sum(isinstance(result, ServerBusy) for result in results), 1)
+        self.assertEqual(server.stats(), {'served': 2, 'rejected': 1, 'failed': 0, 'workers': 1, 'active': 0,
+                                          'waiting': 0, 'queue_depth': 1})
+
+    def test_failures_release_the_worker(self):
+        def broken(text):
+            yield 'partial'
+            raise RuntimeError(text)
+
+        async def run():
+            server = AnswerServer(workers=1)
+            with self.assertRaises(RuntimeError):
+                async for _ in server.stream(broken, 'boom'):
+                    pass
+            return server, await collect(server, 'next', 0)
+
+        server, result = asyncio.run(run())
+        self.assertEqual(result, ['next started', 'next done'])
+        self.assertEqual((server.counts['failed'], server.counts['served']), (1, 1))
+
+    def test_client_pool_isolation(self):
+        created = []
+        pool = ClientPool(lambda: created.append(object()) or created[-1], 2)
+        leased = []
+        barrier = threading.Barrier(2)
+
+        def worker():
+            with pool.lease() as client:
+                leased.append(client)
+                barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(set(map(id, leased)), set(map(id, created)))
+
+if __name__ == '__main__':
+    unittest.main()
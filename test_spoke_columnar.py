@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from arangodb_loader import bulk_load_data_from_json
+from benchmark_loader import FakeDatabase, write_synthetic_spoke
+from spoke_columnar import ColumnarGraph, convert_to_columnar, is_columnar
+from spoke_dump import SpokeEdge, iter_spoke_records
+
+class TestSpokeColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dump = os.path.join(self.tmp.name, 'spoke.json')
+        self.cache = os.path.join(self.tmp.name, 'spoke.columnar')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_convert_round_trip(self):
+        write_synthetic_spoke(self.dump, 6, edges_per_node=2)
+        manifest = convert_to_columnar(self.dump, self.cache)
+        graph = ColumnarGraph(self.cache)
+
+        self.assertTrue(is_columnar(self.cache))
+        self.assertFalse(is_columnar(self.dump))
+        self.assertEqual((manifest['nodes'], manifest['edges']), (6, 12))
+        self.assertEqual(graph.types, ['Gene'])
+        self.assertEqual(graph.labels, ['INTERACTS_PiP'])
+        self.assertIsInstance(graph.edge_src, np.memmap)
+        with open(self.dump) as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(graph.node_data(graph.row('3')), records[3])
+        self.assertEqual(graph.edge_data(0, full_endpoints=True), records[6])
+        self.assertEqual(graph.edge_data(0)['start'], {'id': '0', 'labels': ['Gene']})
+
+    def test_integer_ids_and_late_nodes(self):
+        records = [
+            {'type': 'relationship', 'id': 5, 'label': 'ASSOCIATES_DaG', 'properties': {'score': 1},
+             'start': {'id': 1}, 'end': {'id': 2}},
+            {'type': 'node', 'id': 2, 'labels': ['Gene'], 'properties': {'name': 'TCF7L2'}},
+        ]
+        with open(self.dump, 'w') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+        convert_to_columnar(self.dump, self.cache)
+        graph = ColumnarGraph(self.cache)
+
+        self.assertEqual(graph.manifest['node_ids'], 'npy')
+        self.assertIsNone(graph.node_data(graph.row(1)))
+        self.assertEqual(list(graph.iter_dicts()), [records[1], {
+            'type': 'relationship', 'id': 5, 'label': 'ASSOCIATES_DaG', 'properties': {'score': 1},
+            'start': {'id': 1, 'labels': []}, 'end': {'id': 2, 'labels': ['Gene']},
+        }])
+        self.assertEqual(list(graph.iter_dicts(start=2))[0]['id'], 5)
+        edge = list(iter_spoke_records(self.cache))[-1]
+        self.assertEqual(edge, SpokeEdge('5', 'ASSOCIATES_DaG', '1', '2', {'score': 1}, edge.data))
+
+    def test_string_id_formats(self):
+        records = [
+            {'type': 'node', 'id': 'n1', 'labels': ['Gene'], 'properties': {'name': 'TCF7L2'}},
+            {'type': 'node', 'id': 'é2', 'labels': ['Gene'], 'properties': {'name': 'PPARG'}},
+            {'type': 'relationship', 'id': '7', 'label': 'INTERACTS_PiP', 'properties': {},
+             'start': {'id': 'n1'}, 'end': {'id': 'é2'}},
+            {'type': 'relationship', 'id': '07', 'label': 'INTERACTS_PiP', 'properties': {},
+             'start': {'id': 'é2'}, 'end': {'id': 'n1'}},
+        ]
+        with open(self.dump, 'w') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+        manifest = convert_to_columnar(self.dump, self.cache)
+        graph = ColumnarGraph(self.cache)
+
+        # "07" would not survive int64, so the edge ids go to the blob too
+        self.assertEqual((manifest['node_ids'], manifest['edge_ids']), ('blob', 'blob'))
+        self.assertEqual([graph.node_id(row) for row in range(2)], ['n1', 'é2'])
+        self.assertEqual([graph.edge_id(index) for index in range(2)], ['7', '07'])
+        self.assertEqual(graph.row('é2'), 1)
+
+        write_synthetic_spoke(self.dump, 3, edges_per_node=1)
+        manifest = convert_to_columnar(self.dump, self.cache)
+        graph = ColumnarGraph(self.cache)
+        self.assertEqual(manifest['node_ids'], 'npy_str')
+        self.assertEqual(graph.node_id(2), '2')
+        self.assertEqual(graph.row('2'), 2)
+
+    def test_load_from_columnar(self):
+        write_synthetic_spoke(self.dump, 10, edges_per_node=2)
+        convert_to_columnar(self.dump, self.cache)
+        from_dump, from_cache = FakeDatabase(), FakeDatabase()
+        bulk_load_data_from_json(self.dump, from_dump, batch_size=4)
+        with patch.object(ColumnarGraph, '__init__', autospec=True, side_effect=ColumnarGraph.__init__) as opened:
+            nodes_added, edges_added = bulk_load_data_from_json(self.cache, from_cache, batch_size=4)
+
+        self.assertEqual(opened.call_count, 1)
+
+        self.assertEqual((nodes_added, edges_added), (10, 20))
+        self.assertEqual(from_cache['Nodes'].docs, from_dump['Nodes'].docs)
+        self.assertEqual(from_cache['Edges'].docs, from_dump['Edges'].docs)
+
+    def test_resume_from_columnar(self):
+        write_synthetic_spoke(self.dump, 10, edges_per_node=2)
+        convert_to_columnar(self.dump, self.cache)
+        checkpoint = os.path.join(self.tmp.name, 'spoke.checkpoint')
+        db = FakeDatabase()
+        bulk_load_data_from_json(self.cache, db, stop_at=12, batch_size=4, checkpoint=checkpoint)
+        nodes_added, edges_added = bulk_load_data_from_json(self.cache, db, batch_size=4,
+                                                            checkpoint=checkpoint, resume=True)
+
+        self.assertEqual((nodes_added, edges_added), (0, 18))
+        self.assertEqual(len(db['Edges'].docs), 20)
+
+if __name__ == '__main__':
+    unittest.main()
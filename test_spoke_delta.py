@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from benchmark_loader import FakeDatabase, synthetic_node
+from arangodb_loader import bulk_load_data_from_json
+from spoke_delta import (EDGE, NODE, delta_load, fingerprint_dump, fingerprint_ids, format_delta_summary, id_key,
+                         load_fingerprint, load_or_compute_fingerprint, record_hash, save_fingerprint)
+
+def relationship(i, start, end, source='synthetic'):
+    return {'type': 'relationship', 'id': i, 'label': 'INTERACTS_PiP', 'properties': {'source': source},
+            'start': synthetic_node(start), 'end': synthetic_node(end)}
+
+class TestSpokeDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.old = self.write('old.json', [dict(synthetic_node(i), type='node') for i in range(4)] +
+                              [relationship(10, 0, 1), relationship(11, 1, 2), relationship(12, 2, 3)])
+        changed_node = dict(synthetic_node(2), type='node')
+        changed_node['properties'] = dict(changed_node['properties'], name='RENAMED')
+        self.new = self.write('new.json', [dict(synthetic_node(i), type='node') for i in (0, 1, 4)] +
+                              [changed_node, relationship(10, 0, 1), relationship(11, 1, 2, source='updated'),
+                               relationship(13, 1, 4)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, records):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as file:
+            file.writelines(json.dumps(record) + '\n' for record in records)
+        return path
+
+    def test_record_hash_ignores_key_order(self):
+        self.assertEqual(record_hash({'a': 1, 'b': {'c': 2, 'd': 3}}), record_hash({'b': {'d': 3, 'c': 2}, 'a': 1}))
+        self.assertNotEqual(record_hash({'a': 1}), record_hash({'a': 2}))
+
+    def test_fingerprint_round_trip(self):
+        fingerprint = fingerprint_dump(self.old)
+        ids = list(fingerprint_ids(fingerprint))
+        self.assertEqual(sorted(ids), ['Edges/10', 'Edges/11', 'Edges/12'] + [f'Nodes/{i}' for i in range(4)])
+        self.assertEqual(list(fingerprint['keys']), sorted(id_key(doc_id) for doc_id in ids))
+        self.assertEqual([doc_id.startswith('Edges/') for doc_id in ids], list(fingerprint['kinds'] == EDGE))
+        self.assertEqual(fingerprint['keys'].dtype, np.uint64)
+
+        path = os.path.join(self.tmp.name, 'old.fingerprint.npz')
+        save_fingerprint(fingerprint, path)
+        loaded = load_or_compute_fingerprint(path)
+        self.assertEqual(list(fingerprint_ids(loaded)), ids)
+        self.assertEqual(list(load_fingerprint(path)['hashes']), list(fingerprint['hashes']))
+
+        # Fingerprints saved with string ids are still read
+        np.savez(path, ids=np.array(ids), kinds=fingerprint['kinds'], hashes=fingerprint['hashes'])
+        self.assertEqual(list(fingerprint_ids(load_fingerprint(path))), ids)
+
+    def test_dry_run_summary(self):
+        summary, new_fingerprint = delta_load(self.new, fingerprint_dump(self.old))
+
+        self.assertEqual(summary['nodes'], {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 2})
+        self.assertEqual(summary['edges'], {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 1})
+        self.assertIsNone(summary['report'])
+        self.assertEqual(list(fingerprint_ids(new_fingerprint)), list(fingerprint_ids(fingerprint_dump(self.new))))
+        self.assertIn("Nodes: 1 added, 1 changed, 1 removed, 2 unchanged", format_delta_summary(summary))
+
+    def test_renamed_node_leaves_slim_edges_unchanged(self):
+        renamed = dict(synthetic_node(1), properties=dict(synthetic_node(1)['properties'], name='RENAMED'))
+        edges = [relationship(10, 0, 1), relationship(11, 1, 2), relationship(12, 2, 3)]
+        edges[0]['end'] = edges[1]['start'] = renamed  # Edges embed copies of their endpoints
+        new = self.write('renamed.json', [dict(synthetic_node(i), type='node') for i in (0, 2, 3)] +
+                         [dict(renamed, type='node')] + edges)
+
+        summary, _ = delta_load(new, fingerprint_dump(self.old))
+        self.assertEqual((summary['nodes']['changed'], summary['edges']['changed']), (1, 0))
+
+        # Edges that keep endpoint names do change
+        summary, _ = delta_load(new, fingerprint_dump(self.old, edge_projection=('properties.name',)),
+                                edge_projection=('properties.name',))
+        self.assertEqual(summary['edges']['changed'], 2)
+
+    def test_apply_delta_matches_full_reload(self):
+        db = FakeDatabase()
+        bulk_load_data_from_json(self.old, db, edge_projection=())
+        requests = db['Nodes'].requests + db['Edges'].requests
+
+        summary, _ = delta_load(self.new, fingerprint_dump(self.old), db)
+        reloaded = FakeDatabase()
+        bulk_load_data_from_json(self.new, reloaded, edge_projection=())
+
+        self.assertEqual(db['Nodes'].docs, reloaded['Nodes'].docs)
+        self.assertEqual(db['Edges'].docs, reloaded['Edges'].docs)
+        self.assertEqual(summary['report']['nodes'] + summary['report']['edges'], 4)
+        self.assertEqual(db['Nodes'].requests + db['Edges'].requests - requests, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from spoke_dump import SpokeNode, SpokeEdge, iter_dump_lines, iter_spoke_records, is_compressed
+
+NODE = {'type': 'node', 'id': 1, 'labels': ['Gene'], 'properties': {'name': 'BRCA1'}}
+EDGE = {'type': 'relationship', 'id': 9, 'label': 'ASSOCIATES_DaG', 'properties': {'source': 'DisGeNET'},
+        'start': {'id': 2}, 'end': {'id': 1}}
+
+class TestSpokeDump(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lines = [json.dumps(NODE) + '\n', 'not json\n', json.dumps(EDGE) + '\n']
+        self.payload = ''.join(self.lines).encode()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, opener=open):
+        path = os.path.join(self.tmp.name, name)
+        with opener(path, 'wb') as file:
+            file.write(self.payload)
+        return path
+
+    def test_iter_dump_lines_compressed(self):
+        for name, opener in [('spoke.json', open), ('spoke.json.gz', gzip.open),
+                             ('spoke.json.bz2', bz2.open), ('spoke.json.xz', lzma.open)]:
+            path = self.write(name, opener)
+            self.assertEqual(list(iter_dump_lines(path)), [line.encode() for line in self.lines])
+
+    def test_iter_dump_lines_offset(self):
+        offset = len(self.lines[0]) + len(self.lines[1])
+        for name, opener in [('spoke.json', open), ('spoke.json.gz', gzip.open)]:
+            path = self.write(name, opener)
+            self.assertEqual(list(iter_dump_lines(path, offset)), [self.lines[2].encode()])
+
+    def test_iter_dump_lines_reads_once(self):
+        path = self.write('spoke.json')
+        with patch('spoke_dump.open', side_effect=open) as mock_open:
+            list(iter_dump_lines(path, desc="Reading"))
+        mock_open.assert_called_once_with(path, 'rb')
+
+    def test_iter_spoke_records(self):
+        path = self.write('spoke.json.gz', gzip.open)
+        node, edge = iter_spoke_records(path)
+        self.assertEqual(node, SpokeNode('1', ['Gene'], {'name': 'BRCA1'}, NODE))
+        self.assertEqual(edge, SpokeEdge('9', 'ASSOCIATES_DaG', '2', '1', {'source': 'DisGeNET'}, EDGE))
+
+    def test_is_compressed(self):
+        self.assertTrue(is_compressed('spoke.json.zst'))
+        self.assertFalse(is_compressed('spoke.json'))
+
+if __name__ == '__main__':
+    unittest.main()
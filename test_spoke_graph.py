@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from spoke_columnar import convert_to_columnar
+from spoke_graph import IN, SpokeGraph, answer_template, match_template
+
+def node(node_id, label, name):
+    return {'type': 'node', 'id': node_id, 'labels': [label], 'properties': {'name': name, 'identifier': node_id}}
+
+def edge(edge_id, label, start, end):
+    return {'type': 'relationship', 'id': edge_id, 'label': label, 'properties': {},
+            'start': {'id': start}, 'end': {'id': end}}
+
+RECORDS = [
+    node('d1', 'Disease', 'type 2 diabetes mellitus'),
+    node('d2', 'Disease', 'obesity'),
+    node('g1', 'Gene', 'TCF7L2'),
+    node('g2', 'Gene', 'PPARG'),
+    node('g3', 'Gene', 'FTO'),
+    node('p1', 'Pathway', 'Wnt signaling'),
+    node('p2', 'Pathway', 'Adipogenesis'),
+    node('c1', 'Compound', 'metformin'),
+    edge('e1', 'ASSOCIATES_DaG', 'd1', 'g1'),
+    edge('e2', 'ASSOCIATES_DaG', 'd1', 'g2'),
+    edge('e3', 'ASSOCIATES_DaG', 'd2', 'g2'),
+    edge('e4', 'ASSOCIATES_DaG', 'd2', 'g3'),
+    edge('e5', 'PARTICIPATES_GpPW', 'g1', 'p1'),
+    edge('e6', 'PARTICIPATES_GpPW', 'g2', 'p2'),
+    edge('e7', 'TREATS_CtD', 'c1', 'd1'),
+    edge('e8', 'INTERACTS_GiG', 'g1', 'g2'),
+]
+
+class TestSpokeGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dump = os.path.join(self.tmp.name, 'spoke.json')
+        with open(self.dump, 'w') as file:
+            for record in RECORDS:
+                file.write(json.dumps(record) + '\n')
+        self.graph = SpokeGraph.from_dump(self.dump)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def ids(self, rows):
+        return sorted(self.graph.node_ids[row] for row in rows)
+
+    def test_neighbors_by_label_direction_and_type(self):
+        graph = self.graph
+        d1, g1, g2 = graph.row('d1'), graph.row('g1'), graph.row('g2')
+
+        self.assertEqual((graph.num_nodes, graph.num_edges), (8, 8))
+        self.assertEqual(self.ids(graph.neighbors(d1, 'ASSOCIATES_DaG')), ['g1', 'g2'])
+        self.assertEqual(self.ids(graph.neighbors(g2, 'ASSOCIATES_DaG', IN)), ['d1', 'd2'])
+        self.assertEqual(self.ids(graph.neighbors(g1)), ['g2', 'p1'])
+        self.assertEqual(self.ids(graph.neighbors(g1, node_type='Pathway')), ['p1'])
+        self.assertEqual(self.ids(graph.neighbors([g1, g2], 'PARTICIPATES_GpPW')), ['p1', 'p2'])
+        self.assertEqual(len(graph.neighbors(d1, 'NO_SUCH_LABEL')), 0)
+
+    def test_k_hop_and_intersect(self):
+        graph = self.graph
+        c1 = graph.row('c1')
+        self.assertEqual(self.ids(graph.k_hop(c1, 1)), ['d1'])
+        self.assertEqual(self.ids(graph.k_hop(c1, 3)), ['d1', 'g1', 'g2', 'p1', 'p2'])
+        self.assertEqual(self.ids(graph.k_hop(c1, 3, node_type='Gene')), ['g1', 'g2'])
+
+        shared = graph.intersect(graph.neighbors(graph.row('d1'), 'ASSOCIATES_DaG'),
+                                 graph.neighbors(graph.row('d2'), 'ASSOCIATES_DaG'))
+        self.assertEqual(self.ids(shared), ['g2'])
+
+    def test_find(self):
+        graph = self.graph
+        self.assertEqual(self.ids(graph.find('PPARG')), ['g2'])
+        self.assertEqual(self.ids(graph.find('Type 2 Diabetes', 'Disease')), ['d1'])
+        self.assertEqual(len(graph.find('PPARG', 'Disease')), 0)
+        self.assertEqual(self.ids(graph.find('diabetes, mellitus')), ['d1'])
+        self.assertEqual(self.ids(graph.find('signaling WNT', 'Pathway')), ['p1'])
+        self.assertEqual(len(graph.find('Wnt signaling', 'Gene')), 0)
+        self.assertEqual(len(graph.find('diabetes insipidus')), 0)
+
+    def test_numeric_ids_are_strings(self):
+        dump = os.path.join(self.tmp.name, 'numeric.json')
+        with open(dump, 'w') as file:
+            for record in [dict(node(7, 'Gene', 'PPARG')), dict(node(8, 'Disease', 'obesity')),
+                           edge(9, 'ASSOCIATES_DaG', 8, 7)]:
+                file.write(json.dumps(record) + '\n')
+        cache = os.path.join(self.tmp.name, 'numeric.columnar')
+        convert_to_columnar(dump, cache)
+
+        for graph in (SpokeGraph.from_dump(dump), SpokeGraph.from_dump(cache)):
+            self.assertEqual(graph.node_ids, ['7', '8'])
+            self.assertEqual(graph.row(7), graph.row('7'))
+            self.assertEqual(graph.describe(graph.row(8))['id'], '8')
+
+    def test_answer_template(self):
+        answer = answer_template(self.graph, "Which genes are associated with obesity?")
+        self.assertEqual(answer['template'], 'disease_genes')
+        self.assertEqual(sorted(row['gene']['name'] for row in answer['result']), ['FTO', 'PPARG'])
+
+        answer = answer_template(self.graph, "Which genes are most strongly associated with the development of "
+                                             "type 2 diabetes, and what pathways do they influence?")
+        self.assertEqual(answer['template'], 'disease_genes_pathways')
+        self.assertEqual(sorted((row['gene']['name'], row['pathway']['name']) for row in answer['result']),
+                         [('PPARG', 'Adipogenesis'), ('TCF7L2', 'Wnt signaling')])
+
+        answer = answer_template(self.graph, "What diseases are associated with the gene PPARG?")
+        self.assertEqual(sorted(row['disease']['name'] for row in answer['result']),
+                         ['obesity', 'type 2 diabetes mellitus'])
+        self.assertIsNone(match_template("How are proteins folded?"))
+        self.assertIsNone(answer_template(self.graph, "Which genes are associated with scurvy?"))
+
+    def test_save_load_and_columnar(self):
+        out_dir = os.path.join(self.tmp.name, 'spoke.graph')
+        self.graph.save(out_dir)
+        cache = os.path.join(self.tmp.name, 'spoke.columnar')
+        convert_to_columnar(self.dump, cache)
+
+        for graph in (SpokeGraph.load(out_dir), SpokeGraph.from_dump(cache)):
+            d1 = graph.row('d1')
+            self.assertEqual(graph.num_edges, 8)
+            self.assertEqual(sorted(graph.node_ids[row] for row in graph.neighbors(d1, 'ASSOCIATES_DaG')), ['g1', 'g2'])
+            self.assertEqual(graph.describe(d1), self.graph.describe(self.graph.row('d1')))
+            np.testing.assert_array_equal(graph.in_offsets, self.graph.in_offsets)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+from aql_guard import QueryLimits, guard_graph
+from benchmark_pipeline import FakeGraphDB, FakeLLM, FakeQAChain
+from qa_cache import QACache, cache_answer, cached_attempts
+from qa_pipeline import execute_attempt, execute_query_with_retries, iter_attempts, stream_answer
+from test_aql_guard import FakeArangoGraph, GraphChain
+from tracing import Tracer, format_stats, percentile
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTracing(unittest.TestCase):
+
+    def test_percentile(self):
+        self.assertEqual(percentile([5, 1, 3, 2, 4], 50), 3)
+        self.assertAlmostEqual(percentile([1, 2], 95), 1.95)
+        self.assertIsNone(percentile([], 50))
+
+    def test_nested_spans_and_jsonl(self):
+        clock = Clock()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'trace.jsonl')
+            tracer = Tracer(path, clock=clock)
+            trace = tracer.trace()
+            with trace.span('attempt', attempt=1) as attempt:
+                clock.now += 1
+                with tracer.span('aql_execution') as execution:
+                    clock.now += 2
+                    execution['rows'] = 5
+            with self.assertRaises(ValueError):
+                with trace.span('interpretation'):
+                    raise ValueError
+            with open(path) as file:
+                spans = [json.loads(line) for line in file]
+
+        self.assertEqual([span['name'] for span in spans], ['aql_execution', 'attempt', 'interpretation'])
+        self.assertEqual((spans[0]['trace'], spans[0]['parent'], spans[0]['rows']), (trace.id, 'attempt', 5))
+        self.assertEqual((attempt['seconds'], attempt['child_seconds']), (3, 2))
+        self.assertEqual(spans[2]['error'], 'ValueError')
+
+        stats = tracer.stats()
+        self.assertEqual(stats['attempt']['p50_seconds'], 3)
+        self.assertEqual(stats['interpretation']['errors'], 1)
+        self.assertEqual(stats['aql_execution']['histogram']['2.5'], 1)
+        self.assertIn('| attempt | 1 | 0 | 3.000 |', format_stats(stats))
+
+    def test_prometheus(self):
+        tracer = Tracer()
+        tracer.record('interpretation', 0.3, prompt_tokens=100, story_tokens=20)
+        tracer.record('interpretation', 7.0)
+        text = tracer.prometheus()
+        self.assertIn('spoke_llm_stage_seconds_bucket{stage="interpretation",le="0.25"} 0', text)
+        self.assertIn('spoke_llm_stage_seconds_bucket{stage="interpretation",le="0.5"} 1', text)
+        self.assertIn('spoke_llm_stage_seconds_bucket{stage="interpretation",le="+Inf"} 2', text)
+        self.assertIn('spoke_llm_stage_seconds_count{stage="interpretation"} 2', text)
+        self.assertIn('spoke_llm_stage_tokens_total{stage="interpretation"} 120', text)
+
+    def test_pipeline_spans(self):
+        tracer = Tracer()
+        trace = tracer.trace()
+        chain = FakeQAChain([[], [{'gene': 'PPARG'}]])
+        execute_query_with_retries('question', chain, FakeLLM(), 3, trace=trace)
+        stats = tracer.stats()
+        self.assertEqual({name: stage['count'] for name, stage in stats.items()},
+                         {'attempt': 2, 'aql_generation': 2, 'compaction': 1, 'interpretation': 1})
+        self.assertEqual(set(trace.timings()), {'attempt', 'aql_generation', 'compaction', 'interpretation'})
+        self.assertEqual(len(trace.spans), 6)
+
+    def test_guarded_query_spans(self):
+        tracer = Tracer()
+        trace = tracer.trace()
+        db = FakeGraphDB({'FOR n IN Nodes LIMIT 1000\nRETURN n': [{'gene': 'PPARG'}]})
+        graph = guard_graph(FakeArangoGraph(db), db, QueryLimits(), tracer)
+        response = execute_attempt('question', GraphChain(graph, ['FOR n IN Nodes RETURN n']), 1, trace)
+        self.assertEqual(response['aql_result'], [{'gene': 'PPARG'}])
+        self.assertEqual(set(tracer.stats()), {'attempt', 'aql_explain', 'aql_execution', 'aql_generation'})
+
+    def test_stream_answer_spans(self):
+        tracer = Tracer()
+        cache = QACache()
+        cache_answer(cache, 'question', 1, 'QUERY 1', [{'gene': 'PPARG'}], 'story')
+        for question, chain in (('question', FakeQAChain([])), ('other', FakeQAChain([[1]]))):
+            trace = tracer.trace()
+            events = cached_attempts(cache, question, lambda: iter_attempts(question, chain, 1), trace=trace)
+            list(stream_answer(question, events, FakeLLM('PPARG story'), trace=trace))
+
+        stats = tracer.stats()
+        self.assertEqual(stats['cache_lookup']['count'], 2)
+        self.assertEqual(stats['question']['count'], 2)
+        self.assertEqual(stats['interpretation']['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
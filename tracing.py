@@ -0,0 +1,204 @@
+import json
+import threading
+import time
+import uuid
+import weakref
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # Histogram bounds in seconds
+DEFAULT_WINDOW = 500  # Recent spans per stage kept for rolling percentiles
+METRIC_PREFIX = 'spoke_llm'
+HISTOGRAM_BARS = ' ▁▂▃▄▅▆▇█'
+
+def percentile(values, q):
+    """Return the ``q``-th percentile (0-100) of ``values`` by linear interpolation."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+class Tracer:
+    """Record timed spans of the question-answering stages.
+
+    A span is a dict of its ``trace`` id, ``name``, ``parent`` stage,
+    ``start`` time, ``seconds`` and any attributes set while it is open.
+    Finished spans are appended to the JSONL file ``path`` if given, kept
+    in a rolling window per stage for ``stats`` and counted in cumulative
+    histograms for ``prometheus``.
+
+    A span opened while another is open on the same thread becomes its
+    child and joins its trace, so helpers such as ``aql_guard.guard_graph``
+    can record spans without being handed the trace.
+    """
+
+    def __init__(self, path=None, window=DEFAULT_WINDOW, buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        self.path = path
+        self.buckets = buckets
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.traces = weakref.WeakValueDictionary()
+        self.windows = defaultdict(lambda: deque(maxlen=window))
+        self.totals = defaultdict(lambda: {'count': 0, 'errors': 0, 'seconds': 0.0, 'tokens': 0,
+                                           'buckets': [0] * len(buckets)})
+
+    def trace(self):
+        """Start a new trace, e.g. for one question."""
+        trace = Trace(self, uuid.uuid4().hex[:16])
+        self.traces[trace.id] = trace
+        return trace
+
+    @contextmanager
+    def span(self, name, trace_id=None, **attributes):
+        """Time the body as a span, yielding its dict so attributes can be added."""
+        stack = self.local.__dict__.setdefault('stack', [])
+        parent = stack[-1] if stack else None
+        span = dict(attributes, trace=trace_id or (parent and parent['trace']), name=name,
+                    parent=parent and parent['name'], start=time.time())
+        stack.append(span)
+        start = self.clock()
+        try:
+            yield span
+        except Exception as e:
+            span['error'] = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            seconds = self.clock() - start
+            if parent is not None:
+                parent['child_seconds'] = parent.get('child_seconds', 0) + seconds
+            self.finish(span, seconds)
+
+    def record(self, name, seconds, trace_id=None, **attributes):
+        """Record a span timed by the caller, for stages that yield while they run."""
+        span = dict(attributes, trace=trace_id, name=name, parent=None, start=time.time() - seconds)
+        self.finish(span, seconds)
+        return span
+
+    def finish(self, span, seconds):
+        span['seconds'] = seconds
+        with self.lock:
+            self.windows[span['name']].append(seconds)
+            totals = self.totals[span['name']]
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['errors'] += 'error' in span
+            totals['tokens'] += sum(value for key, value in span.items()
+                                    if key.endswith('_tokens') and isinstance(value, int))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    totals['buckets'][i] += 1
+            trace = self.traces.get(span['trace'])
+            if trace is not None:
+                trace.spans.append(span)
+            if self.path:
+                with open(self.path, 'a') as file:
+                    file.write(json.dumps(span, default=str) + '\n')
+
+    def stats(self):
+        """Return the count, errors and rolling p50/p95/max latency and histogram of each stage."""
+        with self.lock:
+            windows = {name: list(window) for name, window in self.windows.items()}
+            totals = {name: dict(totals) for name, totals in self.totals.items()}
+        stats = {}
+        for name, seconds in sorted(windows.items()):
+            histogram = [0] * (len(self.buckets) + 1)
+            for value in seconds:
+                histogram[next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))] += 1
+            stats[name] = {
+                'count': totals[name]['count'],
+                'errors': totals[name]['errors'],
+                'p50_seconds': percentile(seconds, 50),
+                'p95_seconds': percentile(seconds, 95),
+                'max_seconds': max(seconds),
+                'histogram': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], histogram)),
+            }
+        return stats
+
+    def prometheus(self):
+        """Return the stage latency histograms and token counters in the Prometheus text format."""
+        seconds_metric = f'{METRIC_PREFIX}_stage_seconds'
+        lines = [f'# HELP {seconds_metric} Time spent in each question-answering stage.',
+                 f'# TYPE {seconds_metric} histogram']
+        with self.lock:
+            totals = {name: dict(totals) for name, totals in sorted(self.totals.items())}
+        for name, stage in totals.items():
+            for bound, count in zip(self.buckets, stage['buckets']):
+                lines.append(f'{seconds_metric}_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{seconds_metric}_bucket{{stage="{name}",le="+Inf"}} {stage["count"]}')
+            lines.append(f'{seconds_metric}_sum{{stage="{name}"}} {stage["seconds"]}')
+            lines.append(f'{seconds_metric}_count{{stage="{name}"}} {stage["count"]}')
+        for metric, key, help_text in (('stage_errors_total', 'errors', 'Stage runs that raised an error.'),
+                                       ('stage_tokens_total', 'tokens', 'Tokens counted by each stage.')):
+            lines += [f'# HELP {METRIC_PREFIX}_{metric} {help_text}', f'# TYPE {METRIC_PREFIX}_{metric} counter']
+            lines += [f'{METRIC_PREFIX}_{metric}{{stage="{name}"}} {stage[key]}' for name, stage in totals.items()]
+        return '\n'.join(lines) + '\n'
+
+class Trace:
+    """The spans of one question, all recorded by ``tracer`` under one ``id``.
+
+    ``spans`` holds the spans finished so far.
+    """
+
+    def __init__(self, tracer, trace_id):
+        self.tracer = tracer
+        self.id = trace_id
+        self.spans = []
+
+    def span(self, name, **attributes):
+        return self.tracer.span(name, self.id, **attributes)
+
+    def record(self, name, seconds, **attributes):
+        return self.tracer.record(name, seconds, self.id, **attributes)
+
+    def timings(self):
+        """Return the total seconds spent in each stage of the trace."""
+        timings = defaultdict(float)
+        for span in self.spans:
+            timings[span['name']] += span['seconds']
+        return dict(timings)
+
+def span(trace, name, **attributes):
+    """``trace.span(name, ...)``, or a span that records nothing if ``trace`` is None."""
+    return nullcontext({}) if trace is None else trace.span(name, **attributes)
+
+def format_stats(stats):
+    """Render ``Tracer.stats()`` as a Markdown table with a text histogram per stage."""
+    lines = ['| Stage | Count | Errors | p50 (s) | p95 (s) | Max (s) | Histogram |',
+             '|---|---|---|---|---|---|---|']
+    for name, stage in stats.items():
+        counts = list(stage['histogram'].values())
+        bars = ''.join(HISTOGRAM_BARS[round(count / max(counts) * (len(HISTOGRAM_BARS) - 1))] for count in counts)
+        lines.append(f"| {name} | {stage['count']} | {stage['errors']} | {stage['p50_seconds']:.3f} | "
+                     f"{stage['p95_seconds']:.3f} | {stage['max_seconds']:.3f} | `{bars}` |")
+    if stats:
+        bounds = list(next(iter(stats.values()))['histogram'])
+        lines.append(f"\nHistogram buckets (s): {', '.join(bounds)}")
+    return '\n'.join(lines)
+
+def serve_metrics(tracer, port, host='0.0.0.0'):
+    """Serve ``tracer.prometheus()`` at ``/metrics`` on ``port`` from a background thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = tracer.prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood the console
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd